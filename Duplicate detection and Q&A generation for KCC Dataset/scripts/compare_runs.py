@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Inspect and compare deduplication runs recorded in the run history.
+
+Usage:
+    python scripts/compare_runs.py list
+    python scripts/compare_runs.py list --input Data/State_Paddy/Bihar_Paddy_Raw.csv
+    python scripts/compare_runs.py diff            # two most recent runs
+    python scripts/compare_runs.py diff 12 15 --tolerance 0.2 --fail-on-regression
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import yaml
+from utils import RunHistory
+
+
+def default_db_path(config_path: str) -> str:
+    """Run-history path from the config, falling back to the default location."""
+    try:
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        config = {}
+    return config.get('output', {}).get('run_history') or 'Data/run_history.sqlite'
+
+
+def fmt(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+
+def list_runs(history: RunHistory, limit: int, input_file: str = None):
+    """Print the most recent runs."""
+    runs = history.list_runs(limit=limit, input_file=input_file)
+    if not runs:
+        print("No runs recorded")
+        return
+    print(f"{'Run':>5}  {'Recorded':<20}{'Config':<18}{'Rows in':>10}{'Rows out':>10}{'Time (s)':>10}  Input")
+    for run in runs:
+        print(f"{run['run_id']:>5}  {run['recorded']:<20}{run['config_hash']:<18}"
+              f"{fmt(run['original_count'], ','):>10}{fmt(run['final_count'], ','):>10}"
+              f"{fmt(run['processing_time'], '.2f'):>10}  {run['input_file']}")
+
+
+def diff_runs(history: RunHistory, base_id: int, new_id: int, tolerance: float,
+              min_seconds: float) -> bool:
+    """
+    Print a stage-by-stage comparison of two runs.
+    
+    Returns:
+        True if any stage regressed
+    """
+    result = history.compare(base_id, new_id, tolerance, min_seconds)
+    base, new = result['base'], result['new']
+    
+    print("="*70)
+    print(f"Run {base_id} ({base['recorded']})  ->  Run {new_id} ({new['recorded']})")
+    print("="*70)
+    print(f"Input:  {base['input_file']}  ->  {new['input_file']}"
+          f"{'' if result['same_input'] else '  [DIFFERENT CONTENT]'}")
+    print(f"Config: {base['config_hash']}  ->  {new['config_hash']}"
+          f"{'' if result['same_config'] else '  [CHANGED]'}")
+    print(f"Rows:   {fmt(base['original_count'], ',')} -> {fmt(base['final_count'], ',')}  vs  "
+          f"{fmt(new['original_count'], ',')} -> {fmt(new['final_count'], ',')}")
+    print(f"Time:   {fmt(base['processing_time'], '.2f')}s  vs  {fmt(new['processing_time'], '.2f')}s")
+    print("-"*70)
+    print(f"{'Stage':<20}{'Base (s)':>10}{'New (s)':>10}{'Base out':>10}{'New out':>10}{'Speed':>10}")
+    for row in result['stages']:
+        change = row['throughput_change']
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['stage']:<20}{fmt(row['base_seconds'], '.2f'):>10}{fmt(row['new_seconds'], '.2f'):>10}"
+              f"{fmt(row['base_rows_out'], ','):>10}{fmt(row['new_rows_out'], ','):>10}"
+              f"{fmt(change * 100 if change is not None else None, '+.1f'):>9}%{flag}")
+    print("="*70)
+    
+    if result['regressions']:
+        print(f"Throughput regressions (> {tolerance:.0%} slower): {', '.join(result['regressions'])}")
+    else:
+        print("No throughput regressions")
+    return bool(result['regressions'])
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Compare deduplication runs from the run history")
+    parser.add_argument('--config', type=str, default='config.yaml',
+                        help='Configuration file (for output.run_history)')
+    parser.add_argument('--db', type=str, help='Run-history database (overrides config)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    list_parser = subparsers.add_parser('list', help='List recent runs')
+    list_parser.add_argument('--limit', type=int, default=20, help='Number of runs to show')
+    list_parser.add_argument('--input', type=str, help='Only runs of this input file')
+    
+    diff_parser = subparsers.add_parser('diff', help='Compare two runs stage by stage')
+    diff_parser.add_argument('base', type=int, nargs='?', help='Baseline run id (default: second latest)')
+    diff_parser.add_argument('new', type=int, nargs='?', help='Run id to check (default: latest)')
+    diff_parser.add_argument('--input', type=str, help='Pick default runs of this input file')
+    diff_parser.add_argument('--tolerance', type=float, default=0.10,
+                             help='Allowed relative throughput drop before flagging (default: 0.10)')
+    diff_parser.add_argument('--min-seconds', type=float, default=1.0,
+                             help='Ignore stages shorter than this in the new run (default: 1.0)')
+    diff_parser.add_argument('--fail-on-regression', action='store_true',
+                             help='Exit with status 1 if any stage regressed')
+    
+    args = parser.parse_args()
+    
+    db_path = args.db or default_db_path(args.config)
+    if not Path(db_path).exists():
+        print(f"Run history not found: {db_path}")
+        sys.exit(1)
+    history = RunHistory(db_path)
+    
+    try:
+        if args.command == 'list':
+            list_runs(history, args.limit, args.input)
+            return
+        
+        base_id, new_id = args.base, args.new
+        if base_id is None or new_id is None:
+            recent = history.list_runs(limit=2, input_file=args.input)
+            if len(recent) < 2:
+                print("Need at least two recorded runs to compare")
+                sys.exit(1)
+            new_id = new_id if new_id is not None else recent[0]['run_id']
+            base_id = base_id if base_id is not None else recent[1]['run_id']
+        
+        regressed = diff_runs(history, base_id, new_id, args.tolerance, args.min_seconds)
+        if regressed and args.fail_on_regression:
+            sys.exit(1)
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
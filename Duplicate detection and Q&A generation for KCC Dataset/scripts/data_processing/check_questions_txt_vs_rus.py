@@ -16,14 +16,15 @@ import logging
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List
 from tqdm import tqdm
 import yaml
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from utils.text_processing import normalize_text, clean_question
+from utils.text_processing import normalize_text, clean_question, find_exact_matches
+from utils.io import read_table, write_table, EXCEL_CACHE_DIR
 from utils.similarity import (
     fuzzy_similarity, 
     EmbeddingGenerator,
@@ -97,25 +98,23 @@ class QuestionsTxtChecker:
         logger.info(f"Loaded {len(questions)} questions")
         return questions
     
-    def load_reference_dataset(self, filepath: str, question_column: str = 'Question') -> pd.DataFrame:
+    def load_reference_dataset(self, filepath: str, question_column: str = 'Question',
+                               usecols: Optional[List[str]] = None) -> pd.DataFrame:
         """
-        Load reference dataset from CSV or Excel file.
+        Load reference dataset from CSV, Parquet or Excel file.
         
         Args:
             filepath: Path to input file
             question_column: Name of column containing questions
+            usecols: Only load these columns (None = all)
         
         Returns:
             DataFrame with loaded data
         """
         logger.info(f"Loading reference dataset from {filepath}...")
         
-        if filepath.endswith('.csv'):
-            df = pd.read_csv(filepath)
-        elif filepath.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(filepath)
-        else:
-            raise ValueError(f"Unsupported file format: {filepath}")
+        excel_cache_dir = self.config.get('input', {}).get('excel_cache_dir', EXCEL_CACHE_DIR)
+        df = read_table(filepath, usecols=usecols, excel_cache_dir=excel_cache_dir)
         
         # Validate question column exists
         if question_column not in df.columns:
@@ -130,13 +129,15 @@ class QuestionsTxtChecker:
     
     def find_similar_question(self, 
                              target_question: str, 
-                             reference_questions: list) -> Tuple[bool, Optional[str], float, str]:
+                             reference_questions: list,
+                             check_exact: bool = True) -> Tuple[bool, Optional[str], float, str]:
         """
         Find if a similar question exists in the reference dataset.
         
         Args:
             target_question: Question to check
             reference_questions: List of reference questions
+            check_exact: Run the exact stage (False when exact matches were already looked up)
         
         Returns:
             Tuple of (has_similar, similar_question, similarity_score, match_type)
@@ -145,7 +146,7 @@ class QuestionsTxtChecker:
         target_normalized = clean_question(target_question)
         
         # Stage 1: Exact matching
-        if self.config['deduplication']['exact']['enabled']:
+        if check_exact and self.config['deduplication']['exact']['enabled']:
             for ref_q in reference_questions:
                 ref_normalized = clean_question(ref_q)
                 if target_normalized == ref_normalized:
@@ -204,8 +205,8 @@ class QuestionsTxtChecker:
         
         Args:
             target_file: Path to target text file (one question per line)
-            reference_file: Path to reference dataset (CSV or Excel)
-            output_file: Path to output CSV file
+            reference_file: Path to reference dataset (CSV, Parquet or Excel)
+            output_file: Path to output file (CSV, Parquet or Excel)
             question_column: Name of column containing questions in reference
         
         Returns:
@@ -213,7 +214,8 @@ class QuestionsTxtChecker:
         """
         # Load datasets
         target_questions = self.load_questions_txt(target_file)
-        reference_df = self.load_reference_dataset(reference_file, question_column)
+        reference_df = self.load_reference_dataset(reference_file, question_column,
+                                                   usecols=[question_column])
         
         logger.info(f"Target dataset: {len(target_questions)} questions")
         logger.info(f"Reference dataset: {len(reference_df)} questions")
@@ -221,6 +223,15 @@ class QuestionsTxtChecker:
         # Prepare reference questions
         reference_questions = reference_df[question_column].tolist()
         
+        # Exact matches for all target questions at once: joined on hashes of the
+        # cleaned text, with every hash hit confirmed by comparing the texts
+        exact_matches = np.full(len(target_questions), -1)
+        if self.config['deduplication']['exact']['enabled']:
+            exact_matches = find_exact_matches(
+                [clean_question(q) for q in target_questions],
+                [clean_question(q) for q in reference_questions]
+            )
+        
         # Create DataFrame for results
         results = []
         matches_found = 0
@@ -229,10 +240,15 @@ class QuestionsTxtChecker:
         logger.info("Checking for similar questions...")
         
         for idx, question in enumerate(tqdm(target_questions, desc="Processing"), start=1):
-            has_similar, similar_q, score, match_type = self.find_similar_question(
-                question,
-                reference_questions
-            )
+            if exact_matches[idx - 1] >= 0:
+                has_similar, similar_q, score, match_type = (
+                    True, reference_questions[exact_matches[idx - 1]], 1.0, 'exact')
+            else:
+                has_similar, similar_q, score, match_type = self.find_similar_question(
+                    question,
+                    reference_questions,
+                    check_exact=False
+                )
             
             results.append({
                 'line_number': idx,
@@ -251,7 +267,7 @@ class QuestionsTxtChecker:
         
         # Save results
         logger.info(f"Saving results to {output_file}...")
-        df.to_csv(output_file, index=False)
+        write_table(df, output_file)
         
         # Generate summary report
         self._generate_report(df, output_file, matches_found)
@@ -311,7 +327,7 @@ Results saved to: {output_file}
         print(report)
         
         # Save report to file
-        report_file = output_file.replace('.csv', '_report.txt')
+        report_file = f"{os.path.splitext(output_file)[0]}_report.txt"
         with open(report_file, 'w') as f:
             f.write(report)
         logger.info(f"Report saved to {report_file}")
@@ -330,12 +346,12 @@ def main():
     parser.add_argument(
         '--reference', '-r',
         required=True,
-        help='Path to reference dataset (CSV or Excel)'
+        help='Path to reference dataset (CSV, Parquet or Excel)'
     )
     parser.add_argument(
         '--output', '-o',
         required=True,
-        help='Path to output CSV file'
+        help='Path to output file (CSV, Parquet or Excel)'
     )
     parser.add_argument(
         '--question-column', '-q',
@@ -16,14 +16,15 @@ import logging
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List
 from tqdm import tqdm
 import yaml
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from utils.text_processing import normalize_text, clean_question
+from utils.text_processing import normalize_text, clean_question, find_exact_matches
+from utils.io import read_table, write_table, EXCEL_CACHE_DIR
 from utils.similarity import (
     fuzzy_similarity, 
     EmbeddingGenerator,
@@ -72,25 +73,23 @@ class RUSvsQuestionsTxtChecker:
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
     
-    def load_rus_dataset(self, filepath: str, question_column: str = 'Question') -> pd.DataFrame:
+    def load_rus_dataset(self, filepath: str, question_column: str = 'Question',
+                         usecols: Optional[List[str]] = None) -> pd.DataFrame:
         """
-        Load RUS dataset from Excel file.
+        Load RUS dataset from Excel, CSV or Parquet file.
         
         Args:
-            filepath: Path to Excel file
+            filepath: Path to input file
             question_column: Name of column containing questions
+            usecols: Only load these columns (None = all)
         
         Returns:
             DataFrame with loaded data
         """
         logger.info(f"Loading RUS dataset from {filepath}...")
         
-        if filepath.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(filepath)
-        elif filepath.endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            raise ValueError(f"Unsupported file format: {filepath}")
+        excel_cache_dir = self.config.get('input', {}).get('excel_cache_dir', EXCEL_CACHE_DIR)
+        df = read_table(filepath, usecols=usecols, excel_cache_dir=excel_cache_dir)
         
         # Validate question column exists
         if question_column not in df.columns:
@@ -130,13 +129,15 @@ class RUSvsQuestionsTxtChecker:
     
     def find_similar_question(self, 
                              target_question: str, 
-                             reference_questions: list) -> Tuple[bool, Optional[str], float, str]:
+                             reference_questions: list,
+                             check_exact: bool = True) -> Tuple[bool, Optional[str], float, str]:
         """
         Find if a similar question exists in the reference dataset.
         
         Args:
             target_question: Question to check
             reference_questions: List of reference questions
+            check_exact: Run the exact stage (False when exact matches were already looked up)
         
         Returns:
             Tuple of (has_similar, similar_question, similarity_score, match_type)
@@ -145,7 +146,7 @@ class RUSvsQuestionsTxtChecker:
         target_normalized = clean_question(target_question)
         
         # Stage 1: Exact matching
-        if self.config['deduplication']['exact']['enabled']:
+        if check_exact and self.config['deduplication']['exact']['enabled']:
             for ref_q in reference_questions:
                 ref_normalized = clean_question(ref_q)
                 if target_normalized == ref_normalized:
@@ -205,7 +206,7 @@ class RUSvsQuestionsTxtChecker:
         Args:
             target_file: Path to RUS dataset (Excel or CSV)
             reference_file: Path to questions.txt
-            output_file: Path to output CSV file
+            output_file: Path to output file (CSV, Parquet or Excel)
             question_column: Name of column containing questions in RUS
         
         Returns:
@@ -218,6 +219,15 @@ class RUSvsQuestionsTxtChecker:
         logger.info(f"Target dataset (RUS): {len(target_df)} questions")
         logger.info(f"Reference dataset (questions.txt): {len(reference_questions)} questions")
         
+        # Exact matches for all target questions at once: joined on hashes of the
+        # cleaned text, with every hash hit confirmed by comparing the texts
+        exact_matches = np.full(len(target_df), -1)
+        if self.config['deduplication']['exact']['enabled']:
+            exact_matches = find_exact_matches(
+                [clean_question(q) for q in target_df[question_column]],
+                [clean_question(q) for q in reference_questions]
+            )
+        
         # Initialize new columns
         target_df['has_similar_in_questions_txt'] = False
         target_df['similar_questions_txt_question'] = ''
@@ -228,13 +238,18 @@ class RUSvsQuestionsTxtChecker:
         logger.info("Checking for similar questions...")
         matches_found = 0
         
-        for idx, row in tqdm(target_df.iterrows(), total=len(target_df), desc="Processing"):
+        for position, (idx, row) in enumerate(tqdm(target_df.iterrows(), total=len(target_df), desc="Processing")):
             target_question = row[question_column]
             
-            has_similar, similar_q, score, match_type = self.find_similar_question(
-                target_question,
-                reference_questions
-            )
+            if exact_matches[position] >= 0:
+                has_similar, similar_q, score, match_type = (
+                    True, reference_questions[exact_matches[position]], 1.0, 'exact')
+            else:
+                has_similar, similar_q, score, match_type = self.find_similar_question(
+                    target_question,
+                    reference_questions,
+                    check_exact=False
+                )
             
             target_df.at[idx, 'has_similar_in_questions_txt'] = has_similar
             target_df.at[idx, 'similar_questions_txt_question'] = similar_q if similar_q else ''
@@ -246,7 +261,7 @@ class RUSvsQuestionsTxtChecker:
         
         # Save results
         logger.info(f"Saving results to {output_file}...")
-        target_df.to_csv(output_file, index=False)
+        write_table(target_df, output_file)
         
         # Generate summary report
         self._generate_report(target_df, output_file, matches_found)
@@ -306,7 +321,7 @@ Results saved to: {output_file}
         print(report)
         
         # Save report to file
-        report_file = output_file.replace('.csv', '_report.txt')
+        report_file = f"{os.path.splitext(output_file)[0]}_report.txt"
         with open(report_file, 'w') as f:
             f.write(report)
         logger.info(f"Report saved to {report_file}")
@@ -330,7 +345,7 @@ def main():
     parser.add_argument(
         '--output', '-o',
         required=True,
-        help='Path to output CSV file'
+        help='Path to output file (CSV, Parquet or Excel)'
     )
     parser.add_argument(
         '--question-column', '-q',
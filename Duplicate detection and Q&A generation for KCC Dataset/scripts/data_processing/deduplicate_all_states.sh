@@ -1,5 +1,6 @@
 #!/bin/bash
 # Deduplication script for all state Paddy datasets
+# All states run in one process, so the embedding model is loaded once
 
 echo "======================================================================="
 echo "MULTI-STATE PADDY DEDUPLICATION PIPELINE"
@@ -8,32 +9,42 @@ echo "======================================================================="
 # Array of states (excluding Tamil Nadu - no data)
 states=("WestBengal" "Odisha" "Haryana" "Bihar" "MadhyaPradesh" "Chhattisgarh" "AndhraPradesh" "Telangana" "Uttarakhand" "Karnataka" "Maharashtra")
 
-# Process each state
+# Collect the states whose input exists
+inputs=()
+outputs=()
 for state in "${states[@]}"; do
-    echo ""
-    echo "======================================================================="
-    echo "Processing: $state"
-    echo "======================================================================="
-    
     input_file="Data/State_Paddy/${state}_Paddy_Raw.csv"
     output_file="outputs/final/${state}_Paddy_Unique.csv"
     
     if [ -f "$input_file" ]; then
-        PYTHONPATH=. python scripts/data_processing/deduplicate_questions.py \
-            --input "$input_file" \
-            --output "$output_file" \
-            --column QueryText
-        
-        if [ $? -eq 0 ]; then
-            echo "✓ $state deduplication complete"
-        else
-            echo "✗ $state deduplication failed"
-        fi
+        inputs+=("$input_file")
+        outputs+=("$output_file")
     else
         echo "✗ Input file not found: $input_file"
     fi
 done
 
+if [ ${#inputs[@]} -eq 0 ]; then
+    echo "✗ No state inputs found"
+    exit 1
+fi
+
+echo ""
+echo "Processing ${#inputs[@]} states: ${inputs[*]}"
+echo ""
+
+PYTHONPATH=. python scripts/data_processing/deduplicate_questions.py \
+    --inputs "${inputs[@]}" \
+    --outputs "${outputs[@]}" \
+    --column QueryText \
+    --summary outputs/final/Paddy_Unique_summary.json
+
+if [ $? -eq 0 ]; then
+    echo "✓ Deduplication complete for all states"
+else
+    echo "✗ Deduplication failed for some states (see outputs/final/Paddy_Unique_summary.json)"
+fi
+
 echo ""
 echo "======================================================================="
 echo "DEDUPLICATION COMPLETE"
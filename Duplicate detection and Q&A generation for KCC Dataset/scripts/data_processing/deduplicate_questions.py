@@ -11,24 +11,45 @@ from agricultural query datasets. Uses a hybrid approach combining:
 Usage:
     python deduplicate_questions.py --input Data/AI_ANS_25K.csv --output Data/filtered/AI_ANS_25K_deduplicated.csv
     python deduplicate_questions.py --config config.yaml
+    python deduplicate_questions.py --input Data/new.csv --output Data/new_assigned.csv --assign-to Data/cluster_state
+    python deduplicate_questions.py --input Data/new.csv --output Data/new_unique.csv --against Data/corpus_index --corpus Data/PUNJAB_Paddy_Dhan.csv
+    python deduplicate_questions.py --input Data/all_states.csv --output Data/all_states_deduplicated.csv --shards 32
+    python deduplicate_questions.py --input Data/all_states.csv --plan --plan-output Data/all_states.plan.yaml
+    cat Data/new_questions.ndjson | python deduplicate_questions.py --stream > Data/new_questions.decisions.ndjson
+    python deduplicate_questions.py --input Data/all_states.parquet --output Data/all_states_deduplicated.parquet --pipeline
+    python deduplicate_questions.py --input Data/all_states.csv --output Data/all_states_deduplicated.csv --apply-plan Data/all_states.plan.yaml
+    python deduplicate_questions.py --inputs Data/State_Paddy/*_Raw.csv --parallel-files 4 --summary Data/filtered/summary.json
 """
 
 import argparse
+import contextlib
+import copy
+import json
 import logging
+import multiprocessing
+import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Set
+from typing import Dict, List, Optional, Set, TextIO
 import yaml
 import pandas as pd
 import numpy as np
-from tqdm import tqdm
 
 from utils import (
-    normalize_text, clean_question, is_valid_question,
-    EmbeddingGenerator, compute_cosine_similarity_matrix, find_similar_pairs,
-    fuzzy_similarity,
-    cluster_by_pairs, get_cluster_representatives, get_items_to_remove,
-    DeduplicationReport, print_sample_duplicates
+    normalize_questions, hash_texts,
+    EmbeddingGenerator, find_similar_pairs_blockwise, find_similar_pairs_ivf,
+    find_fuzzy_pairs, find_fuzzy_pairs_tiled, fuzzy_pairs_by_block, semantic_pairs_by_block,
+    ExecutionSettings,
+    cluster_by_pairs, get_cluster_representatives, get_items_to_remove, ClusterState, CorpusIndex,
+    StageCheckpoint,
+    DeduplicationReport, print_sample_duplicates, get_peak_rss_mb,
+    read_table, write_table, iter_table_chunks, TableWriter, EXCEL_CACHE_DIR,
+    partition_table, shard_keys, SOURCE_ROW_COLUMN,
+    sample_table, plan_run, format_plan,
+    StreamIndex, read_record_batches, RecordWriter, BoundedPipeline
 )
 
 # Configure logging
@@ -38,6 +59,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Internal columns holding normalized text (and its 64-bit hash) shared by all stages
+TEXT_CACHE_COLUMNS = {'normalized': '_normalized', 'cleaned': '_cleaned', 'hash': '_hash'}
+
+# Internal column with each row's position in the loaded input (used by checkpoints)
+ROW_ID_COLUMN = '_row_id'
+
+# Internal column with each row's block id (deduplication.blocking)
+BLOCK_COLUMN = '_block'
+INTERNAL_COLUMNS = list(TEXT_CACHE_COLUMNS.values()) + [ROW_ID_COLUMN, BLOCK_COLUMN]
+
+# Checkpointed stages in pipeline order
+CHECKPOINT_STAGES = ['validate', 'exact', 'fuzzy', 'embedding', 'semantic']
+
 
 class QuestionDeduplicator:
     """
@@ -52,21 +86,29 @@ class QuestionDeduplicator:
             config: Configuration dictionary
         """
         self.config = config
+        self.execution = ExecutionSettings.from_config(config)
         self.report = DeduplicationReport()
         self.embedding_model = None
+        self.checkpoint = None
         
         # Track clusters for group export
         self.last_clusters = None
         self.last_representatives = None
         self.last_df = None
+        self.last_rows = None
+        self.last_input = None
         self.last_question_col = None
+        self.last_questions = None
+        self.last_embeddings = None
+        self.last_fuzzy_pairs = None
     
-    def load_data(self, filepath: str) -> pd.DataFrame:
+    def load_data(self, filepath: str, usecols: Optional[List[str]] = None) -> pd.DataFrame:
         """
-        Load data from CSV or Excel file.
+        Load data from CSV, Parquet or Excel file.
         
         Args:
             filepath: Path to input file
+            usecols: Only load these columns (None = all)
         
         Returns:
             DataFrame with loaded data
@@ -77,45 +119,149 @@ class QuestionDeduplicator:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {filepath}")
         
-        # Determine file type and load
-        if file_path.suffix.lower() == '.csv':
-            df = pd.read_csv(filepath, encoding='utf-8')
-        elif file_path.suffix.lower() in ['.xlsx', '.xls']:
-            df = pd.read_excel(filepath)
-        else:
-            raise ValueError(f"Unsupported file format: {file_path.suffix}")
+        excel_cache_dir = self.config.get('input', {}).get('excel_cache_dir', EXCEL_CACHE_DIR)
+        df = read_table(filepath, usecols=usecols, excel_cache_dir=excel_cache_dir)
         
-        logger.info(f"Loaded {len(df)} rows")
+        logger.info(f"Loaded {len(df)} rows" + (f" ({len(df.columns)} columns)" if usecols else ""))
         return df
     
     def save_data(self, df: pd.DataFrame, filepath: str):
         """
-        Save data to CSV or Excel file.
+        Save data to CSV, Parquet or Excel file.
         
         Args:
             df: DataFrame to save
             filepath: Output file path
         """
         logger.info(f"Saving data to {filepath}")
+        write_table(df, filepath)
+        logger.info(f"Saved {len(df)} rows")
+    
+    def input_columns(self, question_column: str) -> Optional[List[str]]:
+        """
+        Columns to load from the input file.
         
-        # Create output directory if needed
-        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        Args:
+            question_column: Name of column containing questions
         
-        # Determine file type and save
-        file_path = Path(filepath)
-        if file_path.suffix.lower() == '.csv':
-            df.to_csv(filepath, index=False, encoding='utf-8')
-        elif file_path.suffix.lower() in ['.xlsx', '.xls']:
-            df.to_excel(filepath, index=False)
-        else:
-            raise ValueError(f"Unsupported file format: {file_path.suffix}")
+        Returns:
+            The question column plus input.columns, or None to load every column
+        """
+        columns = self.config.get('input', {}).get('columns')
+        if not columns:
+            return None
+        return list(dict.fromkeys([question_column] + list(columns) + self.blocking_keys()))
+    
+    def blocking_keys(self) -> List[str]:
+        """Metadata columns rows must agree on to be compared (deduplication.blocking.keys)."""
+        return list((self.config['deduplication'].get('blocking') or {}).get('keys') or [])
+    
+    def filter_and_normalize(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
+        """
+        Drop invalid questions and attach cached normalized text columns.
         
-        logger.info(f"Saved {len(df)} rows")
+        Each distinct question is normalized once; the stages read the
+        cached columns instead of re-normalizing per row.
+        
+        Args:
+            df: Input DataFrame
+            column: Name of question column
+        
+        Returns:
+            DataFrame with valid questions and the text cache columns
+        """
+        texts = normalize_questions(df[column], n_jobs=self.execution.n_jobs,
+                                    chunk_size=self.execution.chunk_size, executor=self.execution.executor)
+        valid = texts['valid'].to_numpy()
+        
+        df = df[valid].reset_index(drop=True)
+        for kind, cache_col in TEXT_CACHE_COLUMNS.items():
+            df[cache_col] = texts[kind].to_numpy()[valid]
+        
+        return df
+    
+    def _cached_text(self, df: pd.DataFrame, column: str, kind: str) -> pd.Series:
+        """
+        Get normalized ('normalized') or cleaned ('cleaned') question text,
+        or the hash of the normalized text ('hash').
+        
+        Uses the cache columns from filter_and_normalize() when present.
+        """
+        cache_col = TEXT_CACHE_COLUMNS[kind]
+        if cache_col in df.columns:
+            return df[cache_col]
+        return normalize_questions(df[column], n_jobs=self.execution.n_jobs,
+                                   chunk_size=self.execution.chunk_size, executor=self.execution.executor)[kind]
+    
+    def _work_frame(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
+        """
+        Narrow frame the stages run on: the question column plus each row's
+        position in df.
+        
+        Stages filter this frame instead of the full input, so wide metadata
+        and answer columns are not copied at every stage; the output rows
+        are taken from df once at the end (see _output_frame). With blocking
+        keys, each row's block id is added as well.
+        """
+        work = pd.DataFrame({ROW_ID_COLUMN: np.arange(len(df)), column: df[column].to_numpy()})
+        keys = self.blocking_keys()
+        if keys:
+            missing = [k for k in keys if k not in df.columns]
+            if missing:
+                raise ValueError(f"Blocking columns not found in data: {missing}")
+            # Missing values form their own block; ids follow first appearance
+            work[BLOCK_COLUMN] = df.groupby(keys, dropna=False, sort=False).ngroup().to_numpy()
+            logger.info(f"Blocking on {keys}: {work[BLOCK_COLUMN].nunique()} blocks")
+        return work
+    
+    def _blocks(self, df: pd.DataFrame) -> Optional[List[np.ndarray]]:
+        """
+        Positions of df's rows grouped by block id.
+        
+        Returns:
+            One ascending position array per block, or None without blocking
+        """
+        if BLOCK_COLUMN not in df.columns:
+            return None
+        codes = df[BLOCK_COLUMN].to_numpy()
+        order = np.argsort(codes, kind='stable')
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        return np.split(order, bounds)
+    
+    def _output_frame(self, df: pd.DataFrame, source: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Build the rows to save, without the internal columns.
+        
+        With output.include_hash, the 64-bit normalized-text hash is kept as a
+        16-digit hex 'question_hash' column, so outputs can be joined on it.
+        
+        Args:
+            df: Surviving rows
+            source: Loaded input df's row ids point into; its rows are
+                materialized here in a single copy (None = df holds all columns)
+        
+        Returns:
+            Output DataFrame
+        """
+        hashes = df[TEXT_CACHE_COLUMNS['hash']] if TEXT_CACHE_COLUMNS['hash'] in df.columns else None
+        if source is not None:
+            output = source.iloc[df[ROW_ID_COLUMN].to_numpy()]
+            output.index = pd.RangeIndex(len(output))
+        else:
+            output = df.drop(columns=INTERNAL_COLUMNS, errors='ignore')
+        if hashes is not None and self.config.get('output', {}).get('include_hash', False):
+            output['question_hash'] = [f"{h:016x}" for h in hashes.to_numpy()]
+        return output
     
     def remove_exact_duplicates(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
         """
         Remove exact duplicate questions (Stage 1).
         
+        Rows are deduplicated on the 64-bit hash of their normalized text.
+        Every dropped row is then checked against the text of the row it
+        duplicates; should two different texts ever share a hash, the stage
+        falls back to comparing the texts themselves.
+        
         Args:
             df: Input DataFrame
             column: Name of question column
@@ -127,22 +273,46 @@ class QuestionDeduplicator:
         
         original_count = len(df)
         
-        # Normalize text for comparison
-        df['_normalized'] = df[column].apply(
-            lambda x: normalize_text(str(x)) if pd.notna(x) else ""
-        )
+        hashes = self._cached_text(df, column, 'hash').to_numpy()
+        
+        # Remove duplicates (keep first occurrence) on the integer key
+        codes, _ = pd.factorize(hashes)
+        _, first = np.unique(codes, return_index=True)
+        first_of_row = first[codes]
+        duplicated = first_of_row != np.arange(len(df))
         
-        # Remove duplicates (keep first occurrence)
-        df_dedup = df.drop_duplicates(subset=['_normalized'], keep='first')
-        df_dedup = df_dedup.drop(columns=['_normalized'])
+        # Verify dropped rows really repeat the text they were matched to
+        normalized = self._cached_text(df, column, 'normalized').to_numpy()
+        dropped = np.flatnonzero(duplicated)
+        if not (normalized[dropped] == normalized[first_of_row[dropped]]).all():
+            logger.warning("64-bit hash collision in exact stage, comparing normalized text instead")
+            duplicated = pd.Series(normalized).duplicated(keep='first').to_numpy()
+        
+        df_dedup = df[~duplicated]
         
         removed = original_count - len(df_dedup)
         self.report.set_exact_duplicates(removed)
         
-        logger.info(f"Removed {removed} exact duplicates ({removed/original_count*100:.2f}%)")
+        logger.info(f"Removed {removed} exact duplicates ({removed/max(original_count, 1)*100:.2f}%)")
         
         return df_dedup.reset_index(drop=True)
     
+    def _new_score_stats(self, stage: str, threshold: float):
+        """
+        Create score statistics for a stage, or None when disabled in config.
+        
+        Args:
+            stage: Stage name
+            threshold: Acceptance threshold of the stage
+        
+        Returns:
+            ScoreStats registered on the report, or None
+        """
+        options = dict(self.config.get('output', {}).get('score_stats') or {})
+        if not options.pop('enabled', True):
+            return None
+        return self.report.new_score_stats(stage, threshold, **options)
+    
     def remove_fuzzy_duplicates(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
         """
         Remove fuzzy duplicate questions (Stage 2).
@@ -167,27 +337,46 @@ class QuestionDeduplicator:
         max_comparisons = self.config['deduplication']['fuzzy'].get('max_comparisons', 100000)
         use_sampling = self.config['deduplication']['fuzzy'].get('use_sampling', True)
         
-        # Normalize questions
-        questions = df[column].apply(lambda x: clean_question(str(x)) if pd.notna(x) else "").tolist()
+        # Normalized questions
+        questions = self._cached_text(df, column, 'cleaned').tolist()
         
         # For large datasets, use optimized approach
         n = len(questions)
         total_comparisons = n * (n - 1) // 2
+        score_stats = self._new_score_stats('fuzzy', threshold)
+        budget = max_comparisons if use_sampling else None
+        blocks = self._blocks(df)
         
-        if use_sampling and total_comparisons > max_comparisons:
+        if blocks is not None:
+            # Only rows of the same block are compared, the budget applies per block
+            logger.info(f"Computing fuzzy similarities within {len(blocks)} blocks (threshold={threshold})...")
+            block_rows = self.execution.block_rows(row_bytes=16 * max(len(b) for b in blocks))
+            similar_pairs, comparisons = fuzzy_pairs_by_block(questions, blocks, threshold, algorithm, budget,
+                                                              score_stats, self.execution.n_jobs, block_rows,
+                                                              executor=self.execution.executor)
+            logger.info(f"Completed {comparisons:,} comparisons (vs {total_comparisons:,} unblocked)")
+        elif budget is not None and total_comparisons > budget:
             logger.info(f"Large dataset detected ({n} questions, {total_comparisons:,} comparisons)")
             logger.info(f"Using optimized sampling approach (max {max_comparisons:,} comparisons)")
-            similar_pairs = self._fuzzy_match_with_sampling(questions, threshold, algorithm, max_comparisons)
+            similar_pairs, comparisons = find_fuzzy_pairs(questions, threshold, algorithm, budget, score_stats,
+                                                          show_progress=True)
+            logger.info(f"Completed {comparisons:,} comparisons (vs {total_comparisons:,} full)")
         else:
+            # All pairs, as tiles scored in worker processes; tile cells hold
+            # float64 scores plus a scaled copy
             logger.info(f"Computing fuzzy similarities (threshold={threshold})...")
-            similar_pairs = []
-            for i in tqdm(range(len(questions)), desc="Fuzzy matching"):
-                for j in range(i + 1, len(questions)):
-                    sim = fuzzy_similarity(questions[i], questions[j], algorithm)
-                    if sim >= threshold:
-                        similar_pairs.append((i, j, sim))
+            similar_pairs, comparisons = find_fuzzy_pairs_tiled(questions, threshold, algorithm, score_stats,
+                                                                tile_rows=self.execution.tile_rows(cell_bytes=16),
+                                                                n_jobs=self.execution.n_jobs,
+                                                                executor=self.execution.executor,
+                                                                show_progress=True)
+        self.report.update_stage(comparisons=comparisons)
         
+        if score_stats is not None:
+            score_stats.resolve_texts(questions)
+        self.last_fuzzy_pairs = similar_pairs
         logger.info(f"Found {len(similar_pairs)} fuzzy duplicate pairs")
+        self.report.update_stage(pairs_found=len(similar_pairs))
         
         # Cluster similar questions
         if similar_pairs:
@@ -210,71 +399,15 @@ class QuestionDeduplicator:
             self.report.set_fuzzy_duplicates(0)
             return df
     
-    def _fuzzy_match_with_sampling(self, questions: list, threshold: float, 
-                                   algorithm: str, max_comparisons: int) -> list:
-        """
-        Optimized fuzzy matching using smart sampling for large datasets.
-        
-        Strategy: For each question, only compare with a sample of other questions
-        that are likely to be similar (based on length and first few characters).
-        """
-        import random
-        from collections import defaultdict
-        
-        similar_pairs = []
-        n = len(questions)
-        
-        # Group questions by length buckets (±20% length tolerance)
-        length_buckets = defaultdict(list)
-        for i, q in enumerate(questions):
-            bucket = len(q) // 10  # Bucket by length (groups of 10 chars)
-            length_buckets[bucket].append(i)
-        
-        # For each question, compare with questions in nearby length buckets
-        comparisons_made = 0
-        max_per_question = min(100, max_comparisons // n)  # Limit comparisons per question
-        
-        for i in tqdm(range(n), desc="Fuzzy matching (optimized)"):
-            q_len = len(questions[i])
-            bucket = q_len // 10
-            
-            # Get candidate indices from nearby buckets
-            candidates = []
-            for b in range(max(0, bucket - 2), bucket + 3):  # ±2 buckets
-                candidates.extend(length_buckets[b])
-            
-            # Remove self and already processed
-            candidates = [j for j in candidates if j > i]
-            
-            # Sample if too many candidates
-            if len(candidates) > max_per_question:
-                candidates = random.sample(candidates, max_per_question)
-            
-            # Compare with candidates
-            for j in candidates:
-                if comparisons_made >= max_comparisons:
-                    break
-                    
-                sim = fuzzy_similarity(questions[i], questions[j], algorithm)
-                if sim >= threshold:
-                    similar_pairs.append((i, j, sim))
-                
-                comparisons_made += 1
-            
-            if comparisons_made >= max_comparisons:
-                logger.info(f"Reached max comparisons limit ({max_comparisons:,})")
-                break
-        
-        logger.info(f"Completed {comparisons_made:,} comparisons (vs {n*(n-1)//2:,} full)")
-        return similar_pairs
-    
-    def remove_semantic_duplicates(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
+    def remove_semantic_duplicates(self, df: pd.DataFrame, column: str,
+                                   embeddings: Optional[np.ndarray] = None) -> pd.DataFrame:
         """
         Remove semantically similar questions (Stage 3).
         
         Args:
             df: Input DataFrame
             column: Name of question column
+            embeddings: Precomputed embeddings of the rows of df (skips encoding)
         
         Returns:
             DataFrame with semantic duplicates removed
@@ -287,39 +420,65 @@ class QuestionDeduplicator:
         logger.info("Stage 3: Removing semantic duplicates...")
         
         original_count = len(df)
-        threshold = self.config['deduplication']['semantic']['similarity_threshold']
-        
-        # Initialize embedding model if not already done
-        if self.embedding_model is None:
-            model_name = self.config['deduplication']['semantic']['model']
-            use_gpu = self.config['deduplication']['semantic']['use_gpu']
-            batch_size = self.config['deduplication']['semantic']['batch_size']
-            
-            self.embedding_model = EmbeddingGenerator(
-                model_name=model_name,
-                use_gpu=use_gpu,
-                batch_size=batch_size
-            )
+        semantic_config = self.config['deduplication']['semantic']
+        threshold = semantic_config['similarity_threshold']
         
         # Prepare questions
-        questions = df[column].apply(lambda x: clean_question(str(x)) if pd.notna(x) else "").tolist()
-        
-        # Generate embeddings
-        logger.info("Generating embeddings...")
-        embeddings = self.embedding_model.encode(questions, show_progress=True)
-        
-        # Compute similarity matrix
-        logger.info("Computing similarity matrix...")
-        similarity_matrix = compute_cosine_similarity_matrix(embeddings)
+        questions = self._cached_text(df, column, 'cleaned').tolist()
         
-        # Find similar pairs
-        logger.info(f"Finding similar pairs (threshold={threshold})...")
-        similar_pairs = find_similar_pairs(similarity_matrix, threshold)
+        score_stats = self._new_score_stats('semantic', threshold)
+        blocks = self._blocks(df)
+        if self.config['deduplication']['semantic'].get('english_model'):
+            # Separate embedding spaces per script group, so no single embedding matrix
+            english_threshold = semantic_config.get('english_threshold')
+            if english_threshold is None:
+                english_threshold = threshold
+            similar_pairs = self._find_routed_semantic_pairs(questions, threshold, english_threshold,
+                                                             score_stats, blocks)
+            embeddings = None
+        else:
+            if embeddings is None:
+                # Generate embeddings
+                logger.info("Generating embeddings...")
+                with self.report.stage('semantic.embedding', rows_in=len(questions)) as stage, \
+                        self.execution.limit_threads():
+                    embeddings = self._get_embedding_model().encode(questions, show_progress=True)
+                    stage['rows_out'] = len(embeddings)
+                self._save_checkpoint('embedding', df, arrays={'embeddings': np.asarray(embeddings)})
+            
+            with self.report.stage('semantic.search', rows_in=len(questions)) as stage:
+                if blocks is not None:
+                    # Each block is searched on its own
+                    logger.info(f"Finding similar pairs within {len(blocks)} blocks (threshold={threshold})...")
+                    similar_pairs, stage['comparisons'] = semantic_pairs_by_block(
+                        np.asarray(embeddings), blocks, threshold, score_stats, self.execution.n_jobs,
+                        block_rows=self._similarity_block_rows(max(len(b) for b in blocks)))
+                elif semantic_config.get('search', 'exact') == 'ivf':
+                    # Approximate: only pairs sharing a probed k-means list are scored
+                    ann = semantic_config.get('ann') or {}
+                    logger.info(f"Finding similar pairs with an IVF index (threshold={threshold})...")
+                    with self.execution.limit_threads():
+                        similar_pairs, stage['comparisons'] = find_similar_pairs_ivf(
+                            np.asarray(embeddings), threshold, n_lists=ann.get('n_lists'),
+                            n_probe=ann.get('n_probe', 8), score_stats=score_stats,
+                            block_rows=self.execution.chunk_size)
+                else:
+                    # Similarity rows are computed a block at a time, never as one NxN matrix
+                    logger.info(f"Finding similar pairs (threshold={threshold})...")
+                    with self.execution.limit_threads():
+                        similar_pairs = find_similar_pairs_blockwise(
+                            embeddings, threshold, score_stats=score_stats,
+                            block_rows=self._similarity_block_rows(len(questions), parallel=False))
+                    stage['comparisons'] = len(questions) * (len(questions) - 1) // 2
+                stage['pairs_found'] = len(similar_pairs)
         
+        if score_stats is not None:
+            score_stats.resolve_texts(questions)
         logger.info(f"Found {len(similar_pairs)} semantic duplicate pairs")
+        self.report.update_stage(pairs_found=len(similar_pairs))
         
-        # Cluster similar questions
-        if similar_pairs:
+        with self.report.stage('semantic.clustering', rows_in=len(questions)) as stage:
+            # Cluster similar questions (singletons when no pairs are found)
             clusters = cluster_by_pairs(len(questions), similar_pairs)
             
             # Select representatives
@@ -330,23 +489,35 @@ class QuestionDeduplicator:
                 scores=question_lengths,
                 strategy="best"
             )
-            
-            # Store clusters and representatives for later export
-            self.last_clusters = clusters
-            self.last_representatives = representatives
-            self.last_df = df.copy()
-            self.last_question_col = column
-            
-            # Store some duplicate groups for reporting
-            for cluster_id, items in list(clusters.items())[:20]:
-                if len(items) > 1:
-                    rep_idx = representatives[cluster_id]
-                    group_questions = [questions[i] for i in items]
-                    self.report.add_duplicate_group(
-                        group=group_questions,
-                        representative=questions[rep_idx],
-                        similarity=threshold
-                    )
+            stage['rows_out'] = len(clusters)
+        
+        # Store clusters and representatives for later export and cluster state
+        self.last_clusters = clusters
+        self.last_representatives = representatives
+        # With row ids, the full rows are only materialized if groups are exported
+        self.last_rows = df[ROW_ID_COLUMN].to_numpy() if ROW_ID_COLUMN in df.columns else None
+        self.last_df = df.drop(columns=INTERNAL_COLUMNS, errors='ignore')
+        self.last_question_col = column
+        self.last_questions = questions
+        self.last_embeddings = embeddings
+        
+        if similar_pairs:
+            # Store some duplicate groups for reporting, with the weakest link score of each
+            sample_ids = [cid for cid, items in list(clusters.items())[:20] if len(items) > 1]
+            item_cluster = {i: cid for cid in sample_ids for i in clusters[cid]}
+            min_scores = {}
+            for i, j, sim in similar_pairs:
+                cid = item_cluster.get(i)
+                if cid is not None:
+                    min_scores[cid] = min(min_scores.get(cid, sim), sim)
+            for cluster_id in sample_ids:
+                rep_idx = representatives[cluster_id]
+                group_questions = [questions[i] for i in clusters[cluster_id]]
+                self.report.add_duplicate_group(
+                    group=group_questions,
+                    representative=questions[rep_idx],
+                    similarity=float(min_scores.get(cluster_id, threshold))
+                )
             
             indices_to_remove = get_items_to_remove(len(questions), clusters, representatives)
             
@@ -363,10 +534,778 @@ class QuestionDeduplicator:
             self.report.set_semantic_duplicates(0)
             return df
     
+    def _find_routed_semantic_pairs(self, questions: list, threshold: float, english_threshold: float,
+                                    score_stats=None, blocks: Optional[List[np.ndarray]] = None) -> list:
+        """
+        Find semantic pairs with pure-English rows on the English model.
+        
+        Each script group is embedded with its own model and searched in its
+        own similarity matrix, so pairs are only found within a group: an
+        English question and its Hindi/Punjabi paraphrase are never merged.
+        With blocks, each script group is further split by block. The
+        English group is matched at its own threshold, since the English
+        model's similarity scores are not on the multilingual model's scale.
+        
+        Args:
+            questions: Cleaned questions
+            threshold: Cosine similarity threshold of the multilingual group
+            english_threshold: Cosine similarity threshold of the English group
+            score_stats: Optional ScoreStats fed with every scored pair (English
+                pairs get their own stats when english_threshold differs)
+            blocks: Positions of the questions per block (None = no blocking)
+        
+        Returns:
+            List of (index1, index2, similarity) tuples over all questions
+        """
+        logger.info("Generating embeddings with script-based model routing...")
+        with self.report.stage('semantic.embedding', rows_in=len(questions)) as stage, \
+                self.execution.limit_threads():
+            encoded = self._get_embedding_model().encode_by_script(questions, show_progress=True)
+            stage['rows_out'] = len(questions)
+        
+        similar_pairs = []
+        with self.report.stage('semantic.search', rows_in=len(questions)) as stage:
+            comparisons = 0
+            block_of = None
+            if blocks is not None:
+                block_of = np.empty(len(questions), dtype=np.int64)
+                for k, block in enumerate(blocks):
+                    block_of[block] = k
+            for route, (positions, embeddings) in encoded.items():
+                route_threshold, route_stats = threshold, score_stats
+                if route == 'english' and english_threshold != threshold:
+                    route_threshold = english_threshold
+                    if score_stats is not None:
+                        route_stats = self._new_score_stats('semantic.english', english_threshold)
+                logger.info(f"Finding similar pairs among {len(positions)} {route} questions "
+                            f"(threshold={route_threshold})...")
+                if block_of is not None:
+                    codes = block_of[positions]
+                    order = np.argsort(codes, kind='stable')
+                    route_blocks = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+                    route_pairs, route_comparisons = semantic_pairs_by_block(
+                        embeddings, route_blocks, route_threshold, route_stats, self.execution.n_jobs, ids=positions,
+                        block_rows=self._similarity_block_rows(max(len(b) for b in route_blocks)))
+                    similar_pairs.extend(route_pairs)
+                    comparisons += route_comparisons
+                    continue
+                with self.execution.limit_threads():
+                    similar_pairs.extend(find_similar_pairs_blockwise(
+                        embeddings, route_threshold, score_stats=route_stats, ids=positions,
+                        block_rows=self._similarity_block_rows(len(positions), parallel=False)))
+                comparisons += len(positions) * (len(positions) - 1) // 2
+            
+            similar_pairs.sort(key=lambda x: x[2], reverse=True)
+            stage['comparisons'] = comparisons
+            stage['pairs_found'] = len(similar_pairs)
+        
+        return similar_pairs
+    
+    def _similarity_block_rows(self, n: int, parallel: bool = True) -> int:
+        """Rows per cosine-similarity block over n embeddings (float32 scores plus a threshold mask)."""
+        return self.execution.block_rows(row_bytes=8 * n, parallel=parallel)
+    
+    def _get_embedding_model(self) -> EmbeddingGenerator:
+        """Initialize the embedding model on first use and return it."""
+        if self.embedding_model is None:
+            model_name = self.config['deduplication']['semantic']['model']
+            use_gpu = self.config['deduplication']['semantic']['use_gpu']
+            batch_size = self.config['deduplication']['semantic']['batch_size']
+            
+            self.embedding_model = EmbeddingGenerator(
+                model_name=model_name,
+                use_gpu=use_gpu,
+                batch_size=batch_size,
+                english_model_name=self.config['deduplication']['semantic'].get('english_model'),
+                chunk_size=self.execution.chunk_size,
+                service_socket=self.config['deduplication']['semantic'].get('service_socket')
+            )
+        return self.embedding_model
+    
+    def build_cluster_state(self) -> Optional[ClusterState]:
+        """
+        Build persistent cluster state from the last semantic stage.
+        
+        The clustered rows are the semantic stage's input; their positions
+        in the input file (last_rows) are stored with the state.
+        
+        Returns:
+            ClusterState, or None if the semantic stage did not run or used model routing
+        """
+        if self.last_clusters is None:
+            return None
+        if self.last_embeddings is None:
+            logger.warning("Cluster state needs a single embedding space; disable semantic.english_model to save it")
+            return None
+        
+        return ClusterState.from_clusters(
+            clusters=self.last_clusters,
+            representatives=self.last_representatives,
+            embeddings=self.last_embeddings,
+            texts=self.last_questions,
+            threshold=self.config['deduplication']['semantic']['similarity_threshold'],
+            model_name=self.config['deduplication']['semantic']['model'],
+            row_ids=self.last_rows,
+            input_file=self.last_input
+        )
+    
+    def save_cluster_state(self, directory: str) -> bool:
+        """
+        Save cluster labels, representatives and their embeddings.
+        
+        Args:
+            directory: Output directory for the state files
+        
+        Returns:
+            True if state was saved, False if there was nothing to save
+        """
+        state = self.build_cluster_state()
+        if state is None:
+            logger.warning("No cluster state to save")
+            return False
+        state.save(directory)
+        return True
+    
+    def assign_to_clusters(self, input_file: str, output_file: str,
+                           question_column: str, state_dir: str) -> pd.DataFrame:
+        """
+        Assign new questions to clusters from a previous run.
+        
+        Only the new questions are embedded; each is matched against the
+        stored cluster representatives, and unmatched questions form new
+        clusters. The updated state is written back to state_dir.
+        
+        Args:
+            input_file: Path to file with new questions
+            output_file: Path to output file (input rows plus cluster columns)
+            question_column: Name of column containing questions
+            state_dir: Directory written by save_cluster_state()
+        
+        Returns:
+            DataFrame with cluster_id, is_new_cluster and is_representative columns
+        """
+        self.report.start_timer()
+        
+        state = ClusterState.load(state_dir)
+        model_name = self.config['deduplication']['semantic']['model']
+        if state.model_name and state.model_name != model_name:
+            raise ValueError(f"Cluster state was built with {state.model_name}, config uses {model_name}")
+        
+        df = self.load_data(input_file, self.input_columns(question_column))
+        self.report.set_original_count(len(df))
+        
+        if question_column not in df.columns:
+            raise ValueError(f"Column '{question_column}' not found in data. Available columns: {df.columns.tolist()}")
+        
+        df[ROW_ID_COLUMN] = np.arange(len(df))
+        df = self.filter_and_normalize(df, question_column)
+        logger.info(f"Kept {len(df)} valid questions")
+        
+        questions = df[TEXT_CACHE_COLUMNS['cleaned']].tolist()
+        row_ids = df[ROW_ID_COLUMN].to_numpy()
+        df = self._output_frame(df)
+        
+        logger.info("Generating embeddings for new questions...")
+        embeddings = self._get_embedding_model().encode(questions, show_progress=True)
+        
+        n_existing = state.n_clusters
+        state.index.chunk_size = self._similarity_block_rows(max(state.n_clusters, 1), parallel=False)
+        labels, is_new_rep = state.assign(embeddings, questions, row_ids=row_ids, input_file=input_file,
+                                          block_rows=self._similarity_block_rows(len(questions), parallel=False))
+        
+        df['cluster_id'] = labels
+        df['is_new_cluster'] = labels >= n_existing
+        df['is_representative'] = is_new_rep
+        
+        self.save_data(df, output_file)
+        state.save(state_dir)
+        
+        self.report.set_final_count(int(is_new_rep.sum()))
+        self.report.stop_timer()
+        
+        return df
+    
+    def build_corpus_index(self, corpus_file: str, question_column: str, index_dir: str) -> CorpusIndex:
+        """
+        Index an already-deduplicated corpus for --against runs.
+        
+        The corpus is normalized and embedded once; it is not deduplicated again.
+        
+        Args:
+            corpus_file: Path to the deduplicated corpus (CSV/Excel)
+            question_column: Name of column containing questions
+            index_dir: Directory to save the index to
+        
+        Returns:
+            CorpusIndex
+        """
+        logger.info(f"Building corpus index from {corpus_file}...")
+        df = self.load_data(corpus_file, [question_column])
+        if question_column not in df.columns:
+            raise ValueError(f"Column '{question_column}' not found in corpus. Available columns: {df.columns.tolist()}")
+        
+        df = self.filter_and_normalize(df, question_column)
+        questions = df[TEXT_CACHE_COLUMNS['cleaned']].tolist()
+        embeddings = self._get_embedding_model().encode(questions, show_progress=True)
+        
+        index = CorpusIndex.build(
+            hashes=df[TEXT_CACHE_COLUMNS['hash']].to_numpy(),
+            embeddings=embeddings,
+            texts=questions,
+            threshold=self.config['deduplication']['semantic']['similarity_threshold'],
+            model_name=self.config['deduplication']['semantic']['model']
+        )
+        index.save(index_dir)
+        return index
+    
+    def deduplicate_against(self, input_file: str, output_file: str, question_column: str,
+                            index_dir: str, corpus_file: Optional[str] = None) -> pd.DataFrame:
+        """
+        Deduplicate new rows against an already-deduplicated corpus.
+        
+        Only the new rows are normalized and embedded. They are dropped when
+        their normalized text is in the corpus hash set or their nearest
+        corpus question is at least the semantic threshold similar; the rest
+        go through the usual exact, fuzzy and semantic stages among
+        themselves. The surviving rows are added to the index in place.
+        
+        Args:
+            input_file: Path to file with new rows
+            output_file: Path to output file (new rows not already in the corpus)
+            question_column: Name of column containing questions
+            index_dir: Corpus index directory
+            corpus_file: Corpus to build the index from if index_dir does not exist yet
+        
+        Returns:
+            DataFrame of new unique rows
+        """
+        semantic_config = self.config['deduplication']['semantic']
+        if not semantic_config['enabled'] or semantic_config.get('english_model'):
+            raise ValueError("--against needs the semantic stage enabled with a single model (no english_model)")
+        
+        self.report.start_timer()
+        
+        if CorpusIndex.exists(index_dir):
+            if corpus_file:
+                logger.info(f"Corpus index {index_dir} already exists, ignoring {corpus_file}")
+            index = CorpusIndex.load(index_dir)
+        elif corpus_file:
+            with self.report.stage('build_index') as stage:
+                index = self.build_corpus_index(corpus_file, question_column, index_dir)
+                stage['rows_out'] = len(index)
+        else:
+            raise FileNotFoundError(f"Corpus index not found: {index_dir} (pass --corpus to build it)")
+        
+        if index.model_name and index.model_name != semantic_config['model']:
+            raise ValueError(f"Corpus index was built with {index.model_name}, config uses {semantic_config['model']}")
+        logger.info(f"Corpus index: {len(index)} questions, {len(index.hashes)} hashes")
+        index.index.chunk_size = self._similarity_block_rows(max(len(index), 1), parallel=False)
+        
+        with self.report.stage('load') as stage:
+            df = self.load_data(input_file, self.input_columns(question_column))
+            stage['rows_out'] = len(df)
+        self.report.set_original_count(len(df))
+        
+        if question_column not in df.columns:
+            raise ValueError(f"Column '{question_column}' not found in data. Available columns: {df.columns.tolist()}")
+        
+        df_source = df
+        df = self._work_frame(df_source, question_column)
+        
+        with self.report.stage('validate', rows_in=len(df)) as stage:
+            df = self.filter_and_normalize(df, question_column)
+            stage['rows_out'] = len(df)
+        logger.info(f"Kept {len(df)} valid questions")
+        new_hashes = df[TEXT_CACHE_COLUMNS['hash']].to_numpy()
+        
+        # Exact matches against the corpus hash set
+        with self.report.stage('corpus_exact', rows_in=len(df)) as stage:
+            in_corpus = index.contains(new_hashes)
+            df = df[~in_corpus].reset_index(drop=True)
+            stage['rows_out'] = len(df)
+        corpus_exact = int(in_corpus.sum())
+        logger.info(f"Removed {corpus_exact} rows already in the corpus")
+        
+        # Exact and fuzzy duplicates among the new rows
+        if self.config['deduplication']['exact']['enabled']:
+            with self.report.stage('exact', rows_in=len(df)) as stage:
+                df = self.remove_exact_duplicates(df, question_column)
+                stage['rows_out'] = len(df)
+        self.report.stats['exact_duplicates_removed'] += corpus_exact
+        
+        with self.report.stage('fuzzy', rows_in=len(df)) as stage:
+            df = self.remove_fuzzy_duplicates(df, question_column)
+            stage['rows_out'] = len(df)
+        
+        with self.report.stage('semantic', rows_in=len(df)) as stage:
+            questions = df[TEXT_CACHE_COLUMNS['cleaned']].tolist()
+            with self.report.stage('semantic.embedding', rows_in=len(questions)) as embed_stage:
+                if questions:
+                    embeddings = self._get_embedding_model().encode(questions, show_progress=True)
+                else:
+                    embeddings = np.empty((0, index.index.dim or 0), dtype=np.float32)
+                embed_stage['rows_out'] = len(embeddings)
+            
+            # Semantic matches against the corpus
+            with self.report.stage('semantic.corpus_search', rows_in=len(questions)) as search_stage:
+                scores, _ = index.search(embeddings)
+                near_corpus = scores >= index.threshold
+                search_stage['comparisons'] = len(questions) * len(index)
+                search_stage['pairs_found'] = int(near_corpus.sum())
+            corpus_semantic = int(near_corpus.sum())
+            logger.info(f"Removed {corpus_semantic} rows semantically similar to the corpus")
+            
+            df = df[~near_corpus].reset_index(drop=True)
+            embeddings = embeddings[~near_corpus]
+            
+            # Semantic duplicates among the remaining new rows
+            kept = []
+            if len(df) > 0:
+                df = self.remove_semantic_duplicates(df, question_column, embeddings=embeddings)
+                kept = sorted(self.last_representatives.values())
+            self.report.stats['semantic_duplicates_removed'] += corpus_semantic
+            stage['rows_out'] = len(df)
+        
+        # Update the corpus with the surviving rows
+        index.add(new_hashes, embeddings[kept], [questions[i] for i in np.flatnonzero(~near_corpus)[kept]])
+        index.save(index_dir)
+        
+        df = self._output_frame(df, source=df_source)
+        with self.report.stage('save', rows_in=len(df)) as stage:
+            self.save_data(df, output_file)
+            stage['rows_out'] = len(df)
+        
+        self.report.set_final_count(len(df))
+        self.report.stop_timer()
+        
+        return df
+    
+    def deduplicate_sharded(self, input_file: str, output_file: str, question_column: str,
+                            n_shards: int) -> pd.DataFrame:
+        """
+        Deduplicate an input larger than memory by shard and merge.
+        
+        The input is streamed into n_shards files on disk, keyed by the
+        blocking columns (deduplication.blocking.keys) or else by the hash of
+        the normalized question. Each shard goes through the full pipeline on
+        its own, then the shard outputs (the representatives) are merged in
+        input order and deduplicated once more, so duplicates that ended up
+        in different shards are still found. With blocking keys every block
+        lies in one shard, so the cross-shard pass only removes exact
+        duplicates.
+        
+        Memory: one shard is in memory at a time, but the cross-shard pass
+        loads all shard representatives (the deduplicated output) at once.
+        Inputs whose deduplicated output does not fit in memory need
+        blocking keys with few duplicates, or the pipelined mode instead.
+        
+        Exact-duplicate removal matches a single run. Fuzzy and semantic
+        clusters may differ slightly, since a cluster spanning shards is
+        joined through the representatives kept in each shard.
+        
+        Args:
+            input_file: Path to input file
+            output_file: Path to output file
+            question_column: Name of column containing questions
+            n_shards: Number of shards
+        
+        Returns:
+            Deduplicated DataFrame
+        """
+        shard_config = self.config.get('processing', {}).get('shards') or {}
+        shard_root = Path(shard_config.get('directory', 'Data/shards')) / Path(input_file).stem
+        
+        self.report.start_timer()
+        
+        keys = self.blocking_keys()
+        with self.report.stage('partition') as stage:
+            shards = partition_table(
+                input_file, str(shard_root), n_shards,
+                lambda chunk: shard_keys(chunk, question_column, keys),
+                usecols=self.input_columns(question_column),
+                chunk_rows=shard_config.get('chunk_rows', 100000),
+                excel_cache_dir=self.config.get('input', {}).get('excel_cache_dir', EXCEL_CACHE_DIR)
+            )
+            stage['rows_out'] = sum(rows for _, rows in shards)
+        self.report.set_original_count(sum(rows for _, rows in shards))
+        
+        # Shard runs load the shard files whole and export nothing but their output
+        run_config = copy.deepcopy(self.config)
+        run_config.setdefault('input', {})['columns'] = None
+        run_config.setdefault('output', {})['export_groups'] = False
+        if self.config.get('output', {}).get('export_groups', False):
+            logger.info("Duplicate group export is not available in shard mode, skipping")
+        
+        # Fuzzy and semantic matching stay within a block, and a block never
+        # spans shards, so only exact duplicates can be left across shards
+        cross_config = copy.deepcopy(run_config)
+        if keys:
+            cross_config['deduplication']['fuzzy']['enabled'] = False
+            cross_config['deduplication']['semantic']['enabled'] = False
+        
+        removed = {'exact': 0, 'fuzzy': 0, 'semantic': 0}
+        
+        def run(path: str, out_path: str, stage_name: str, rows: int,
+                config: Dict = run_config) -> pd.DataFrame:
+            deduplicator = QuestionDeduplicator(config)
+            deduplicator.embedding_model = self.embedding_model
+            deduplicator.execution.executor = self.execution.executor
+            with self.report.stage(stage_name, rows_in=rows) as stage:
+                df = deduplicator.deduplicate(path, out_path, question_column)
+                stage['rows_out'] = len(df)
+            self.embedding_model = deduplicator.embedding_model
+            for kind in removed:
+                removed[kind] += deduplicator.report.stats[f'{kind}_duplicates_removed']
+            for name, stats in deduplicator.report.score_stats.items():
+                if name in self.report.score_stats:
+                    self.report.score_stats[name].merge(stats)
+                else:
+                    self.report.score_stats[name] = stats
+            return df
+        
+        shard_outputs = []
+        for k, (path, rows) in enumerate(shards):
+            if rows == 0:
+                continue
+            logger.info(f"Deduplicating shard {k + 1}/{n_shards} ({rows} rows)")
+            out_path = str(Path(path).with_name(f"{Path(path).stem}_deduplicated{Path(path).suffix}"))
+            run(path, out_path, f'shard_{k:04d}', rows)
+            shard_outputs.append(out_path)
+        
+        if not shard_outputs:
+            raise ValueError(f"No rows to deduplicate in {input_file}")
+        
+        # Cross-shard pass over the shard representatives, in input order
+        with self.report.stage('merge') as stage:
+            merged = pd.concat([read_table(p) for p in shard_outputs], ignore_index=True)
+            merged = merged.sort_values(SOURCE_ROW_COLUMN, kind='stable').drop(columns=SOURCE_ROW_COLUMN)
+            merged_file = str(shard_root / f"representatives{Path(shards[0][0]).suffix}")
+            write_table(merged, merged_file)
+            stage['rows_out'] = len(merged)
+        n_representatives = len(merged)
+        del merged
+        logger.info(f"Cross-shard pass over {n_representatives} shard representatives")
+        df = run(merged_file, output_file, 'cross_shard', n_representatives, cross_config)
+        
+        self.report.set_exact_duplicates(removed['exact'])
+        self.report.set_fuzzy_duplicates(removed['fuzzy'])
+        self.report.set_semantic_duplicates(removed['semantic'])
+        self.report.set_final_count(len(df))
+        self.report.stop_timer()
+        
+        if not shard_config.get('keep', False):
+            shutil.rmtree(shard_root, ignore_errors=True)
+        
+        return df
+    
+    def deduplicate_stream(self, input_stream: TextIO, output_stream: TextIO, question_column: str,
+                           input_format: str = 'auto'):
+        """
+        Deduplicate records read from a stream, writing a decision per record.
+        
+        Records (NDJSON or CSV with a header) are read in batches of
+        processing.stream.batch_size. Each batch is matched against all
+        earlier records through a StreamIndex (exact hashes, then the ANN
+        index of cluster representatives when the semantic stage is
+        enabled) and written out at once with 'decision' (keep/drop),
+        'cluster_id', 'match' (new/exact/semantic/invalid) and 'similarity'
+        fields added. The first record of each cluster is kept; fuzzy
+        matching is not applied to streams. Reading, encoding, searching
+        and writing overlap as in deduplicate_pipelined().
+        
+        Args:
+            input_stream: Text stream to read records from (e.g. sys.stdin)
+            output_stream: Text stream to write decided records to (e.g. sys.stdout)
+            question_column: Name of the field containing questions
+            input_format: "ndjson", "csv" or "auto"; output uses the same format
+        """
+        stream_config = self.config.get('processing', {}).get('stream') or {}
+        index = self._stream_index()
+        stream_format, batches = read_record_batches(input_stream, stream_config.get('batch_size', 1000),
+                                                     input_format)
+        writer = RecordWriter(output_stream, stream_format)
+        logger.info(f"Streaming {stream_format} records (question field '{question_column}')")
+        
+        self.report.start_timer()
+        counts = {'new': 0, 'exact': 0, 'semantic': 0, 'invalid': 0}
+        
+        def prepare(batch: List[dict]) -> tuple:
+            if not any(question_column in record for record in batch):
+                raise ValueError(f"Field '{question_column}' not found in stream records. "
+                                 f"Available fields: {list(batch[0].keys())}")
+            values = pd.Series([record.get(question_column) for record in batch], dtype=object)
+            return batch, self._prepare_batch(values, index)
+        
+        def decide(item: tuple) -> List[dict]:
+            decided = self._decide_stream_batch(*item, index)
+            for record in decided:
+                counts[record['match']] += 1
+            return decided
+        
+        with self.report.stage('stream') as stage:
+            stage['busy_seconds'] = self._run_pipeline(batches, prepare, decide, writer.write)
+            stage['rows_in'] = sum(counts.values())
+            stage['rows_out'] = counts['new']
+        
+        rows = sum(counts.values())
+        self.report.set_original_count(rows)
+        self.report.set_exact_duplicates(counts['exact'])
+        self.report.set_fuzzy_duplicates(0)
+        self.report.set_semantic_duplicates(counts['semantic'])
+        self.report.set_final_count(counts['new'])
+        self.report.stop_timer()
+        logger.info(f"Decided {rows} records: {counts['new']} kept, {counts['exact']} exact and "
+                    f"{counts['semantic']} semantic duplicates, {counts['invalid']} invalid")
+    
+    def deduplicate_pipelined(self, input_file: str, output_file: str, question_column: str):
+        """
+        Deduplicate a file chunk by chunk with overlapping read, encode, search and write steps.
+        
+        The input is read processing.pipeline.chunk_rows rows at a time.
+        While chunk k is normalized and encoded, chunk k-1 is searched
+        against a StreamIndex of everything before it and the kept rows of
+        earlier chunks are written out. The steps run on their own threads,
+        joined by queues of processing.pipeline.queue_size chunks, so only a
+        few chunks are in memory besides the index, which grows with the
+        number of unique questions. The output holds the first row of each
+        cluster, in input order.
+        
+        Decisions match deduplicate_stream(): each new question is compared
+        with the cluster representatives only, clusters are not joined
+        transitively, and fuzzy matching is not applied.
+        
+        Args:
+            input_file: Path to input file
+            output_file: Path to output file (CSV or Parquet is written chunk by chunk)
+            question_column: Name of column containing questions
+        """
+        pipeline_config = self.config.get('processing', {}).get('pipeline') or {}
+        if not Path(input_file).exists():
+            raise FileNotFoundError(f"File not found: {input_file}")
+        index = self._stream_index()
+        chunks = iter_table_chunks(
+            input_file, pipeline_config.get('chunk_rows', 10000),
+            usecols=self.input_columns(question_column),
+            excel_cache_dir=self.config.get('input', {}).get('excel_cache_dir', EXCEL_CACHE_DIR)
+        )
+        logger.info(f"Deduplicating {input_file} in chunks of {pipeline_config.get('chunk_rows', 10000)} rows")
+        
+        self.report.start_timer()
+        counts = {'new': 0, 'exact': 0, 'semantic': 0, 'invalid': 0}
+        
+        def prepare(chunk: pd.DataFrame) -> tuple:
+            if question_column not in chunk.columns:
+                raise ValueError(f"Column '{question_column}' not found in data. "
+                                 f"Available columns: {chunk.columns.tolist()}")
+            return chunk, self._prepare_batch(chunk[question_column], index)
+        
+        def decide(item: tuple) -> pd.DataFrame:
+            chunk, prepared = item
+            _, match, _ = index.assign(prepared['hashes'], prepared['embeddings'], prepared['positions'])
+            for kind in ('new', 'exact', 'semantic'):
+                counts[kind] += int((match == kind).sum())
+            counts['invalid'] += len(chunk) - len(match)
+            return chunk.iloc[prepared['valid'][match == 'new']]
+        
+        with TableWriter(output_file) as writer, self.report.stage('pipeline') as stage:
+            stage['busy_seconds'] = self._run_pipeline(chunks, prepare, decide, writer.write)
+            stage['rows_in'] = sum(counts.values())
+            stage['rows_out'] = writer.rows
+        
+        rows = sum(counts.values())
+        self.report.set_original_count(rows)
+        self.report.set_exact_duplicates(counts['exact'])
+        self.report.set_fuzzy_duplicates(0)
+        self.report.set_semantic_duplicates(counts['semantic'])
+        self.report.set_final_count(counts['new'])
+        self.report.stop_timer()
+        logger.info(f"Saved {counts['new']} of {rows} rows to {output_file}: {counts['exact']} exact and "
+                    f"{counts['semantic']} semantic duplicates, {counts['invalid']} invalid")
+    
+    def _stream_index(self) -> StreamIndex:
+        """Empty StreamIndex with the semantic threshold and ANN settings of the config."""
+        stream_config = self.config.get('processing', {}).get('stream') or {}
+        semantic_config = self.config['deduplication']['semantic']
+        ann = semantic_config.get('ann') or {}
+        return StreamIndex(
+            threshold=semantic_config['similarity_threshold'] if semantic_config['enabled'] else None,
+            n_lists=ann.get('n_lists'),
+            n_probe=ann.get('n_probe', 8),
+            train_size=stream_config.get('ann_train_size', 10000),
+            chunk_size=self.execution.chunk_size,
+            retrain_factor=stream_config.get('ann_retrain_factor', 2.0)
+        )
+    
+    def _run_pipeline(self, batches, prepare, decide, write) -> dict:
+        """
+        Run read -> prepare (normalize, encode) -> decide (search) -> write
+        on a BoundedPipeline until the input is exhausted.
+        
+        Returns:
+            Busy seconds per step
+        """
+        queue_size = (self.config.get('processing', {}).get('pipeline') or {}).get('queue_size', 2)
+        pipeline = BoundedPipeline(queue_size)
+        encoded = pipeline.stage('encode', prepare, pipeline.source('read', batches))
+        written = pipeline.stage('write', write, pipeline.stage('search', decide, encoded))
+        try:
+            for _ in written:
+                pass
+        finally:
+            pipeline.close()
+        busy = {step: round(seconds, 4) for step, seconds in pipeline.busy.items()}
+        logger.info("Busy seconds per step: " + ", ".join(f"{step} {seconds:.2f}" for step, seconds in busy.items()))
+        return busy
+    
+    def _prepare_batch(self, values: pd.Series, index: StreamIndex) -> dict:
+        """
+        Normalize a batch of questions and embed the rows that may start a new cluster.
+        
+        Runs ahead of the index: rows that an earlier batch adds to the index
+        before this one is assigned were embedded needlessly, but are still
+        matched exactly.
+        
+        Returns:
+            Dictionary with 'valid' (positions of valid rows), 'hashes' (of
+            the valid rows), 'positions' (valid rows embedded) and
+            'embeddings' (None for exact matching only)
+        """
+        texts = normalize_questions(values, n_jobs=self.execution.n_jobs, chunk_size=self.execution.chunk_size,
+                                    executor=self.execution.executor)
+        valid = np.flatnonzero(texts['valid'].to_numpy())
+        hashes = texts['hash'].to_numpy()[valid]
+        
+        positions = index.candidates(hashes)
+        embeddings = None
+        if index.threshold is not None and len(positions) > 0:
+            cleaned = texts['cleaned'].to_numpy()[valid]
+            with self.execution.limit_threads():
+                embeddings = self._get_embedding_model().encode(cleaned[positions].tolist(), show_progress=False)
+        return {'valid': valid, 'hashes': hashes, 'positions': positions, 'embeddings': embeddings}
+    
+    def _decide_stream_batch(self, batch: List[dict], prepared: dict, index: StreamIndex) -> List[dict]:
+        """
+        Decide one batch of stream records against the index.
+        
+        Returns:
+            The records with the decision fields added, in input order
+        """
+        cluster_ids, match, similarity = index.assign(prepared['hashes'], prepared['embeddings'],
+                                                      prepared['positions'])
+        
+        decided = [dict(record, decision='drop', cluster_id=None, match='invalid', similarity=None)
+                   for record in batch]
+        for k, row in enumerate(prepared['valid'].tolist()):
+            decided[row].update(
+                decision='keep' if match[k] == 'new' else 'drop',
+                cluster_id=int(cluster_ids[k]),
+                match=match[k],
+                similarity=None if np.isnan(similarity[k]) else round(float(similarity[k]), 6)
+            )
+        return decided
+    
+    def plan(self, input_file: str, question_column: str, target_recall: Optional[float] = None) -> dict:
+        """
+        Estimate what deduplicating input_file will cost, without running it.
+        
+        A sample of planning.sample_size rows is normalized, embedded and
+        matched to estimate unique counts, comparisons, time and memory of
+        each search strategy (all pairs, metadata blocks, IVF index); the
+        cheapest one reaching target_recall is chosen. See utils.planning.
+        
+        Args:
+            input_file: Path to input file
+            question_column: Name of column containing questions
+            target_recall: Minimum recall of the chosen strategy (None = planning.target_recall)
+        
+        Returns:
+            Plan dictionary; its 'config' entry is the overlay --apply-plan merges
+        """
+        planning_config = self.config.get('planning') or {}
+        keys = list(planning_config.get('blocking_keys') or self.blocking_keys())
+        if target_recall is None:
+            target_recall = planning_config.get('target_recall', 0.95)
+        
+        logger.info(f"Sampling {input_file}...")
+        sample, total_rows = sample_table(
+            input_file, planning_config.get('sample_size', 2000),
+            usecols=list(dict.fromkeys([question_column] + keys)),
+            chunk_rows=self.execution.chunk_size * 100,
+            excel_cache_dir=self.config.get('input', {}).get('excel_cache_dir', EXCEL_CACHE_DIR)
+        )
+        logger.info(f"Sampled {len(sample)} of {total_rows} rows")
+        
+        encode = None
+        if self.config['deduplication']['semantic']['enabled']:
+            try:
+                model = self._get_embedding_model()
+                encode = lambda texts: model.encode(texts, show_progress=False)
+            except ImportError as e:
+                logger.warning(f"Planning without embeddings: {e}")
+        
+        plan = plan_run(sample, total_rows, question_column, self.config, encode=encode,
+                        blocking_keys=keys, target_recall=target_recall, execution=self.execution)
+        plan['input']['file'] = input_file
+        return plan
+    
+    def _open_checkpoint(self, input_file: str) -> Optional[StageCheckpoint]:
+        """
+        Open the stage checkpoint for an input file if checkpointing is enabled.
+        
+        The checkpoint is keyed by the input content and the deduplication
+        settings, so changing either starts a fresh run.
+        """
+        checkpoint_config = self.config.get('processing', {}).get('checkpoint') or {}
+        if not checkpoint_config.get('enabled', False):
+            return None
+        return StageCheckpoint(
+            checkpoint_config.get('directory', 'Data/checkpoints'),
+            input_file,
+            self.config['deduplication']
+        )
+    
+    def _save_checkpoint(self, stage: str, df: pd.DataFrame, arrays: Optional[dict] = None,
+                         data: Optional[dict] = None):
+        """Record a completed stage's surviving rows and artifacts (no-op without a checkpoint)."""
+        if self.checkpoint is None or ROW_ID_COLUMN not in df.columns:
+            return
+        self.checkpoint.save_stage(stage, df[ROW_ID_COLUMN].to_numpy(), self.report.stats, arrays, data)
+    
+    def _restore_checkpoint(self, df_loaded: pd.DataFrame, stage: str) -> pd.DataFrame:
+        """
+        Rebuild the rows that survived a checkpointed stage.
+        
+        Args:
+            df_loaded: Work frame of the loaded input (see _work_frame)
+            stage: Completed stage to restore
+        
+        Returns:
+            Surviving rows with the text cache columns
+        """
+        validate_rows = self.checkpoint.rows('validate')
+        texts = self.checkpoint.data('validate')
+        rows = self.checkpoint.rows(stage)
+        
+        # Row ids are ascending, so positions in the validate output come from a binary search
+        positions = np.searchsorted(validate_rows, rows)
+        df = df_loaded.iloc[rows].reset_index(drop=True)
+        for kind in ('normalized', 'cleaned'):
+            df[TEXT_CACHE_COLUMNS[kind]] = np.asarray(texts[kind], dtype=object)[positions]
+        df[TEXT_CACHE_COLUMNS['hash']] = hash_texts(df[TEXT_CACHE_COLUMNS['normalized']])
+        return df
+    
     def deduplicate(self, input_file: str, output_file: str, question_column: str) -> pd.DataFrame:
         """
         Run full deduplication pipeline.
         
+        The stages run on a narrow work frame (row ids, question text and
+        the text cache); the full output rows are materialized once before
+        saving.
+        
+        With processing.checkpoint enabled, each stage's surviving rows and
+        artifacts are checkpointed, and a rerun on the same input and config
+        resumes after the last completed stage.
+        
         Args:
             input_file: Path to input file
             output_file: Path to output file
@@ -376,59 +1315,148 @@ class QuestionDeduplicator:
             Deduplicated DataFrame
         """
         self.report.start_timer()
+        self.last_input = input_file
         
         # Load data
-        df = self.load_data(input_file)
+        with self.report.stage('load') as stage:
+            df = self.load_data(input_file, self.input_columns(question_column))
+            stage['rows_out'] = len(df)
         self.report.set_original_count(len(df))
         
         # Validate question column
         if question_column not in df.columns:
             raise ValueError(f"Column '{question_column}' not found in data. Available columns: {df.columns.tolist()}")
         
-        # Filter invalid questions
-        logger.info("Filtering invalid questions...")
-        valid_mask = df[question_column].apply(lambda x: is_valid_question(str(x)) if pd.notna(x) else False)
-        df = df[valid_mask].reset_index(drop=True)
-        logger.info(f"Kept {len(df)} valid questions")
+        df_source = df
+        df = self._work_frame(df_source, question_column)
+        df_loaded = df
+        
+        # Resume after the last checkpointed stage, if any
+        self.checkpoint = self._open_checkpoint(input_file)
+        resume = self.checkpoint.last_completed(CHECKPOINT_STAGES) if self.checkpoint else None
+        done = CHECKPOINT_STAGES[:CHECKPOINT_STAGES.index(resume) + 1] if resume else []
+        if resume:
+            logger.info(f"Resuming after stage '{resume}' from checkpoint {self.checkpoint.path}")
+            self.report.stats.update(self.checkpoint.stats)
+            df = self._restore_checkpoint(df_loaded, resume)
+        
+        # Filter invalid questions and normalize each distinct question once
+        if 'validate' not in done:
+            logger.info("Filtering invalid questions...")
+            with self.report.stage('validate', rows_in=len(df)) as stage:
+                df = self.filter_and_normalize(df, question_column)
+                stage['rows_out'] = len(df)
+            logger.info(f"Kept {len(df)} valid questions")
+            self._save_checkpoint('validate', df, data={
+                kind: df[TEXT_CACHE_COLUMNS[kind]].tolist() for kind in ('normalized', 'cleaned')
+            })
         
         # Stage 1: Exact duplicates
-        if self.config['deduplication']['exact']['enabled']:
-            df = self.remove_exact_duplicates(df, question_column)
+        if 'exact' not in done:
+            if self.config['deduplication']['exact']['enabled']:
+                with self.report.stage('exact', rows_in=len(df)) as stage:
+                    df = self.remove_exact_duplicates(df, question_column)
+                    stage['rows_out'] = len(df)
+            self._save_checkpoint('exact', df)
         
         # Stage 2: Fuzzy duplicates
-        df = self.remove_fuzzy_duplicates(df, question_column)
+        if 'fuzzy' not in done:
+            fuzzy_rows = df[ROW_ID_COLUMN].to_numpy()
+            with self.report.stage('fuzzy', rows_in=len(df)) as stage:
+                df = self.remove_fuzzy_duplicates(df, question_column)
+                stage['rows_out'] = len(df)
+            pairs = np.array([(fuzzy_rows[i], fuzzy_rows[j], sim) for i, j, sim in self.last_fuzzy_pairs or []],
+                             dtype=np.float64).reshape(-1, 3)
+            self._save_checkpoint('fuzzy', df, arrays={'pairs': pairs})
         
         # Stage 3: Semantic duplicates
-        df = self.remove_semantic_duplicates(df, question_column)
+        if 'semantic' not in done:
+            embeddings = self.checkpoint.array('embedding', 'embeddings') if 'embedding' in done else None
+            with self.report.stage('semantic', rows_in=len(df)) as stage:
+                df = self.remove_semantic_duplicates(df, question_column, embeddings=embeddings)
+                stage['rows_out'] = len(df)
+            clusters_data = None
+            if self.last_clusters is not None:
+                clusters_data = {
+                    'clusters': {str(cid): [int(i) for i in items] for cid, items in self.last_clusters.items()},
+                    'representatives': {str(cid): int(rep) for cid, rep in self.last_representatives.items()}
+                }
+            self._save_checkpoint('semantic', df, data=clusters_data)
+        else:
+            # Restore the semantic clusters for group export and cluster state
+            clusters_data = self.checkpoint.data('semantic')
+            if clusters_data:
+                semantic_input = self._restore_checkpoint(df_loaded, 'fuzzy')
+                self.last_clusters = {int(cid): items for cid, items in clusters_data['clusters'].items()}
+                self.last_representatives = {int(cid): rep for cid, rep in clusters_data['representatives'].items()}
+                self.last_rows = semantic_input[ROW_ID_COLUMN].to_numpy()
+                self.last_df = semantic_input.drop(columns=INTERNAL_COLUMNS, errors='ignore')
+                self.last_question_col = question_column
+                self.last_questions = semantic_input[TEXT_CACHE_COLUMNS['cleaned']].tolist()
+                self.last_embeddings = self.checkpoint.array('embedding', 'embeddings')
+        
+        df = self._output_frame(df, source=df_source)
         
         # Save results
-        self.save_data(df, output_file)
+        with self.report.stage('save', rows_in=len(df)) as stage:
+            self.save_data(df, output_file)
+            stage['rows_out'] = len(df)
         
         # Export groups if enabled
-        if self.config.get('output', {}).get('export_groups', False):
+        output_config = self.config.get('output', {})
+        if output_config.get('export_groups', False):
             if self.last_clusters is not None and self.last_representatives is not None:
-                groups_dir = self.config.get('output', {}).get('groups_directory', 'Data/groups')
+                # Group files carry every input column of the semantic stage's rows
+                if self.last_rows is not None:
+                    self.last_df = df_source.iloc[self.last_rows]
+                    self.last_df.index = pd.RangeIndex(len(self.last_df))
+                groups_dir = output_config.get('groups_directory', 'Data/groups')
+                groups_format = output_config.get('groups_format', 'files')
                 
-                # Create subdirectory for this file
                 from pathlib import Path
                 input_basename = Path(input_file).stem
-                file_groups_dir = f"{groups_dir}/{input_basename}"
                 
-                logger.info(f"Exporting duplicate groups to {file_groups_dir}...")
-                groups_saved = self.report.save_groups_to_csv(
-                    output_dir=file_groups_dir,
-                    df_original=self.last_df,
-                    clusters=self.last_clusters,
-                    representatives=self.last_representatives,
-                    question_col=self.last_question_col,
-                    file_prefix=input_basename
-                )
+                with self.report.stage('export_groups', rows_in=len(self.last_df)) as stage:
+                    if groups_format == 'files':
+                        # One CSV per group in a subdirectory for this file
+                        file_groups_dir = f"{groups_dir}/{input_basename}"
+                        logger.info(f"Exporting duplicate groups to {file_groups_dir}...")
+                        groups_saved = self.report.save_groups_to_csv(
+                            output_dir=file_groups_dir,
+                            df_original=self.last_df,
+                            clusters=self.last_clusters,
+                            representatives=self.last_representatives,
+                            question_col=self.last_question_col,
+                            file_prefix=input_basename
+                        )
+                    else:
+                        # Single table (a directory of tables when partitioned)
+                        partition_size = output_config.get('groups_partition_size')
+                        groups_path = f"{groups_dir}/{input_basename}_groups"
+                        if not partition_size:
+                            groups_path = f"{groups_path}.{groups_format}"
+                        logger.info(f"Exporting duplicate groups to {groups_path}...")
+                        groups_saved = self.report.save_groups_table(
+                            output_path=groups_path,
+                            df_original=self.last_df,
+                            clusters=self.last_clusters,
+                            representatives=self.last_representatives,
+                            file_format=groups_format,
+                            partition_size=partition_size
+                        )
+                    stage['rows_out'] = groups_saved
                 logger.info(f"Exported {groups_saved} groups")
         
         # Finalize report
         self.report.set_final_count(len(df))
         self.report.stop_timer()
         
+        if self.checkpoint is not None:
+            if self.config['processing']['checkpoint'].get('keep', False):
+                logger.info(f"Keeping checkpoint {self.checkpoint.path}")
+            else:
+                self.checkpoint.clear()
+        
         return df
 
 
@@ -447,10 +1475,195 @@ def load_config(config_path: str) -> dict:
     return config
 
 
+def merge_config(config: dict, overlay: dict) -> dict:
+    """
+    Recursively merge overlay into config (overlay values win).
+    
+    Args:
+        config: Configuration dictionary, updated in place
+        overlay: Nested settings to apply (e.g. the 'config' entry of a plan)
+    
+    Returns:
+        The updated config
+    """
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            merge_config(config[key], value)
+        else:
+            config[key] = copy.deepcopy(value)
+    return config
+
+
+def default_output_file(config: dict, input_file: str) -> str:
+    """Output path for an input when none is given: output.directory plus the input name and output.suffix."""
+    input_path = Path(input_file)
+    output_dir = config.get('output', {}).get('directory', 'Data/filtered')
+    suffix = config.get('output', {}).get('suffix', '_deduplicated')
+    return f"{output_dir}/{input_path.stem}{suffix}{input_path.suffix}"
+
+
+def deduplicate_many(config: dict, jobs: List[dict], parallel_files: Optional[int] = None,
+                     summary_file: Optional[str] = None) -> dict:
+    """
+    Deduplicate several files in one process.
+    
+    The embedding model is loaded once and shared by all files, and up to
+    parallel_files files run at once on threads. Normalization and blocked
+    fuzzy matching of every file go to one shared process pool of
+    performance.n_jobs workers; the remaining per-file work (BLAS,
+    rapidfuzz threads) gets an even share of the workers. Each file's
+    report and metrics are saved next to its output as in a single run.
+    
+    The pool's workers are spawned rather than forked: they are started on
+    demand from the file threads, and forking a process that has threads
+    and a loaded model can deadlock the child.
+    
+    Args:
+        config: Configuration dictionary
+        jobs: One dict per file with 'input', 'output' and optionally 'column'
+            (default: input.question_column)
+        parallel_files: Files processed at once (None = processing.batch.parallel_files)
+        summary_file: Write the combined summary to this JSON file
+            (None = processing.batch.summary_file, if set)
+    
+    Returns:
+        Combined summary: per-file status, stats and stage metrics, plus totals
+    """
+    batch_config = config.get('processing', {}).get('batch') or {}
+    parallel_files = max(1, min(parallel_files or batch_config.get('parallel_files', 2), len(jobs)))
+    summary_file = summary_file or batch_config.get('summary_file')
+    default_column = config.get('input', {}).get('question_column', 'QueryText')
+    save_report = config.get('output', {}).get('save_report', True)
+    
+    execution = ExecutionSettings.from_config(config)
+    file_config = copy.deepcopy(config)
+    file_config.setdefault('performance', {})['n_jobs'] = max(1, execution.workers // parallel_files)
+    
+    # Loaded up front, so concurrent files do not each load a copy
+    shared_model = None
+    if config['deduplication']['semantic']['enabled']:
+        shared_model = QuestionDeduplicator(file_config)._get_embedding_model()
+    
+    def run(job: dict):
+        deduplicator = QuestionDeduplicator(file_config)
+        deduplicator.embedding_model = shared_model
+        deduplicator.execution.executor = executor
+        result = {'input': job['input'], 'output': job['output'], 'column': job.get('column') or default_column,
+                  'status': 'ok', 'error': None, 'report_files': []}
+        if not Path(job['input']).exists():
+            logger.warning(f"File not found: {job['input']}, skipping...")
+            result.update(status='skipped', error='input not found')
+            return deduplicator, result
+        try:
+            logger.info(f"Deduplicating {job['input']} -> {job['output']}")
+            deduplicator.deduplicate(job['input'], job['output'], result['column'])
+            if save_report:
+                report_file = f"{job['output']}.report.txt"
+                deduplicator.report.save_to_file(report_file)
+                deduplicator.report.save_metrics(f"{job['output']}.metrics.json")
+                result['report_files'] = [report_file, f"{job['output']}.metrics.json"]
+            logger.info(f"✓ Successfully processed {job['input']}")
+        except Exception as e:
+            logger.error(f"✗ Failed to process {job['input']}: {e}", exc_info=True)
+            result.update(status='failed', error=str(e))
+        return deduplicator, result
+    
+    start = time.perf_counter()
+    executor = None
+    if execution.n_jobs != 1:
+        executor = ProcessPoolExecutor(max_workers=execution.max_workers,
+                                       mp_context=multiprocessing.get_context('spawn'))
+    try:
+        # One thread limit for the whole batch: nested per-stage limits then
+        # restore the same value whichever file finishes first
+        with ExecutionSettings(n_jobs=file_config['performance']['n_jobs']).limit_threads(), \
+                ThreadPoolExecutor(max_workers=parallel_files) as files:
+            outcomes = list(files.map(run, jobs))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+    
+    # Run history is written from this thread only (one SQLite writer)
+    run_history = config.get('output', {}).get('run_history')
+    files = []
+    for deduplicator, result in outcomes:
+        if result['status'] == 'ok':
+            report = deduplicator.report.to_dict()
+            result['stats'] = report['stats']
+            # Peak RSS is process-wide (all files at once), so it is only given in the totals
+            result['stages'] = [{key: value for key, value in stage.items() if key != 'peak_rss_mb'}
+                                for stage in report['stages']]
+            if run_history:
+                deduplicator.report.record_run(run_history, file_config, result['input'], result['output'],
+                                               result['report_files'])
+        files.append(result)
+    
+    done = [f for f in files if f['status'] == 'ok']
+    original = sum(f['stats']['original_count'] for f in done)
+    final = sum(f['stats']['final_count'] for f in done)
+    summary = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'parallel_files': parallel_files,
+        'n_jobs_per_file': file_config['performance']['n_jobs'],
+        'totals': {
+            'files': len(files),
+            'succeeded': len(done),
+            'failed': sum(f['status'] == 'failed' for f in files),
+            'skipped': sum(f['status'] == 'skipped' for f in files),
+            'original_count': original,
+            'final_count': final,
+            'total_removed': original - final,
+            'reduction_percentage': (original - final) / original * 100 if original else 0.0,
+            'wall_time': round(elapsed, 4),
+            'processing_time': round(sum(f['stats']['processing_time'] for f in done), 4),
+            'process_peak_rss_mb': get_peak_rss_mb(),
+        },
+        'files': files,
+    }
+    
+    if summary_file:
+        Path(summary_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        logger.info(f"Combined summary saved to {summary_file}")
+    
+    return summary
+
+
+def format_batch_summary(summary: dict) -> str:
+    """Format a deduplicate_many() summary as a per-file table with totals."""
+    lines = [
+        "=" * 100,
+        f"{'File':<44}{'Status':>9}{'Rows in':>11}{'Rows out':>11}{'Removed %':>11}{'Time (s)':>12}",
+        "-" * 100,
+    ]
+    for f in summary['files']:
+        name = Path(f['input']).name
+        name = name if len(name) <= 42 else name[:39] + '...'
+        if f['status'] == 'ok':
+            stats = f['stats']
+            lines.append(f"{name:<44}{f['status']:>9}{stats['original_count']:>11,}{stats['final_count']:>11,}"
+                         f"{stats['reduction_percentage']:>11.2f}{stats['processing_time']:>12.2f}")
+        else:
+            lines.append(f"{name:<44}{f['status']:>9}  {f['error']}")
+    totals = summary['totals']
+    lines += [
+        "-" * 100,
+        f"{'Total (' + str(totals['succeeded']) + '/' + str(totals['files']) + ' files)':<44}{'':>9}"
+        f"{totals['original_count']:>11,}{totals['final_count']:>11,}{totals['reduction_percentage']:>11.2f}"
+        f"{totals['wall_time']:>12.2f}",
+        f"{summary['parallel_files']} files at a time, {summary['n_jobs_per_file']} jobs per file; "
+        f"summed file time {totals['processing_time']:.2f}s",
+        "=" * 100,
+    ]
+    return "\n".join(lines)
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
-        description="Deduplicate questions from CSV/Excel files"
+        description="Deduplicate questions from CSV/Parquet/Excel files"
     )
     parser.add_argument(
         '--config',
@@ -473,6 +1686,100 @@ def main():
         type=str,
         help='Question column name (overrides config)'
     )
+    parser.add_argument(
+        '--columns',
+        type=str,
+        help='Comma-separated extra columns to load and keep besides the question column (overrides config)'
+    )
+    parser.add_argument(
+        '--save-state',
+        type=str,
+        help='Directory to save cluster state for later incremental assignment'
+    )
+    parser.add_argument(
+        '--assign-to',
+        type=str,
+        help='Assign input questions to clusters in this state directory instead of deduplicating'
+    )
+    parser.add_argument(
+        '--checkpoint-dir',
+        type=str,
+        help='Checkpoint each stage to this directory and resume an interrupted run (overrides config)'
+    )
+    parser.add_argument(
+        '--against',
+        type=str,
+        help='Corpus index directory: keep only input rows not already in the corpus, then add them to the index'
+    )
+    parser.add_argument(
+        '--corpus',
+        type=str,
+        help='Already-deduplicated corpus file used to build the --against index if it does not exist'
+    )
+    parser.add_argument(
+        '--shards',
+        type=int,
+        help='Partition the input into this many shards on disk, deduplicate each, then merge (overrides config)'
+    )
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='Estimate the run cost from a sample of the input and choose a search strategy, without deduplicating'
+    )
+    parser.add_argument(
+        '--plan-output',
+        type=str,
+        help='Write the plan to this YAML file (implies --plan)'
+    )
+    parser.add_argument(
+        '--target-recall',
+        type=float,
+        help='Minimum semantic recall of the planned strategy (overrides planning.target_recall)'
+    )
+    parser.add_argument(
+        '--apply-plan',
+        type=str,
+        help='Run with the settings of a plan written by --plan-output'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Read NDJSON or CSV records from stdin and write keep/drop decisions to stdout, batch by batch'
+    )
+    parser.add_argument(
+        '--stream-format',
+        type=str,
+        choices=['auto', 'ndjson', 'csv'],
+        default='auto',
+        help='Record format of --stream input and output (default: detect from the first line)'
+    )
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='Deduplicate the input chunk by chunk, overlapping reading, encoding, search and writing (bounded memory)'
+    )
+    parser.add_argument(
+        '--inputs',
+        type=str,
+        nargs='+',
+        help='Deduplicate several input files in one process, sharing the model and worker pool'
+    )
+    parser.add_argument(
+        '--outputs',
+        type=str,
+        nargs='+',
+        help='Output file per --inputs file, in the same order (default: output directory and suffix from config)'
+    )
+    parser.add_argument(
+        '--parallel-files',
+        type=int,
+        help='Number of --inputs files processed at once (overrides config)'
+    )
+    parser.add_argument(
+        '--summary',
+        type=str,
+        help='Write the combined per-file summary of an --inputs run to this JSON file (overrides config)'
+    )
     
     args = parser.parse_args()
     
@@ -484,6 +1791,53 @@ def main():
         sys.exit(1)
     
     # Override config with command-line arguments
+    if args.checkpoint_dir:
+        config.setdefault('processing', {})
+        config['processing']['checkpoint'] = {
+            **(config['processing'].get('checkpoint') or {}),
+            'enabled': True,
+            'directory': args.checkpoint_dir
+        }
+    
+    if args.apply_plan:
+        with open(args.apply_plan, 'r') as f:
+            plan = yaml.safe_load(f)
+        merge_config(config, plan.get('config') or {})
+        logger.info(f"Applied plan {args.apply_plan}: strategy '{plan.get('chosen')}'")
+    
+    if args.stream:
+        # Decisions go to stdout; logs and the summary go to stderr
+        question_column = args.column or config.get('input', {}).get('question_column', 'QueryText')
+        deduplicator = QuestionDeduplicator(config)
+        try:
+            deduplicator.deduplicate_stream(sys.stdin, sys.stdout, question_column, args.stream_format)
+            with contextlib.redirect_stdout(sys.stderr):
+                deduplicator.report.print_summary()
+        except Exception as e:
+            logger.error(f"Stream deduplication failed: {e}", exc_info=True)
+            sys.exit(1)
+        return
+    
+    if args.columns:
+        config.setdefault('input', {})
+        config['input']['columns'] = [c.strip() for c in args.columns.split(',') if c.strip()]
+    
+    if args.inputs:
+        if args.outputs and len(args.outputs) != len(args.inputs):
+            logger.error(f"--outputs needs one path per input ({len(args.inputs)}), got {len(args.outputs)}")
+            sys.exit(1)
+        outputs = args.outputs or [default_output_file(config, path) for path in args.inputs]
+        jobs = [{'input': path, 'output': out, 'column': args.column} for path, out in zip(args.inputs, outputs)]
+        try:
+            summary = deduplicate_many(config, jobs, args.parallel_files, args.summary)
+        except Exception as e:
+            logger.error(f"Deduplication failed: {e}", exc_info=True)
+            sys.exit(1)
+        print(format_batch_summary(summary))
+        if summary['totals']['failed'] or summary['totals']['skipped']:
+            sys.exit(1)
+        return
+    
     if args.input:
         input_file = args.input
     else:
@@ -496,11 +1850,7 @@ def main():
     if args.output:
         output_file = args.output
     else:
-        # Generate output filename
-        input_path = Path(input_file)
-        output_dir = config.get('output', {}).get('directory', 'Data/filtered')
-        suffix = config.get('output', {}).get('suffix', '_deduplicated')
-        output_file = f"{output_dir}/{input_path.stem}{suffix}{input_path.suffix}"
+        output_file = default_output_file(config, input_file)
     
     question_column = args.column or config.get('input', {}).get('question_column', 'QueryText')
     
@@ -517,18 +1867,53 @@ def main():
     deduplicator = QuestionDeduplicator(config)
     
     try:
-        df_result = deduplicator.deduplicate(input_file, output_file, question_column)
+        if args.plan or args.plan_output:
+            plan = deduplicator.plan(input_file, question_column, args.target_recall)
+            print(format_plan(plan))
+            if args.plan_output:
+                Path(args.plan_output).parent.mkdir(parents=True, exist_ok=True)
+                with open(args.plan_output, 'w', encoding='utf-8') as f:
+                    yaml.safe_dump(plan, f, sort_keys=False, allow_unicode=True)
+                logger.info(f"Plan saved to {args.plan_output}")
+            return
+        
+        if args.assign_to:
+            deduplicator.assign_to_clusters(input_file, output_file, question_column, args.assign_to)
+            logger.info("Cluster assignment completed successfully!")
+            return
+        
+        n_shards = args.shards or (config.get('processing', {}).get('shards') or {}).get('count')
+        if args.against:
+            df_result = deduplicator.deduplicate_against(input_file, output_file, question_column,
+                                                         args.against, args.corpus)
+        elif n_shards and n_shards > 1:
+            df_result = deduplicator.deduplicate_sharded(input_file, output_file, question_column, n_shards)
+        elif args.pipeline or (config.get('processing', {}).get('pipeline') or {}).get('enabled', False):
+            deduplicator.deduplicate_pipelined(input_file, output_file, question_column)
+        else:
+            df_result = deduplicator.deduplicate(input_file, output_file, question_column)
+        
+        if args.save_state:
+            deduplicator.save_cluster_state(args.save_state)
         
         # Print report
         deduplicator.report.print_summary()
         
         # Save report if configured
+        report_files = []
         if config.get('output', {}).get('save_report', True):
             report_file = f"{output_file}.report.txt"
             deduplicator.report.save_to_file(report_file)
+            deduplicator.report.save_metrics(f"{output_file}.metrics.json")
+            report_files = [report_file, f"{output_file}.metrics.json"]
         
-        logger.info("Deduplication completed successfully!")
+        # Append to the run history
+        run_history = config.get('output', {}).get('run_history')
+        if run_history:
+            deduplicator.report.record_run(run_history, config, input_file, output_file, report_files)
         
+        logger.info("Deduplication completed successfully!")
+    
     except Exception as e:
         logger.error(f"Deduplication failed: {e}", exc_info=True)
         sys.exit(1)
@@ -8,12 +8,23 @@ Steps:
 3. Generate Q&A for unique questions
 4. Merge with existing PUNJAB_Paddy_Dhan.csv
 5. Final deduplication of merged data
+
+Intermediate files (filtered and merged data) are written as zstd-compressed
+Parquet, which is smaller and much faster to reload than CSV. Input CSVs are
+read as text so that mixed columns (numeric-looking IDs, blanks) and the
+concatenated merge keep one Arrow type per column.
 """
 
 import pandas as pd
 import subprocess
 import sys
 import os
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.io import write_table
 
 print("="*70)
 print("PADDY DATA PROCESSING WORKFLOW")
@@ -21,14 +32,14 @@ print("="*70)
 
 # Step 1: Filter Paddy Crop
 print("\nStep 1: Filtering Paddy (Dhan) crop...")
-df_all = pd.read_csv('Data/PB_Combined_Cleaned.csv')
+df_all = pd.read_csv('Data/PB_Combined_Cleaned.csv', dtype=str)
 print(f"  Total rows: {len(df_all)}")
 
 df_paddy = df_all[df_all['Crop'] == 'Paddy (Dhan)']
 print(f"  Paddy rows: {len(df_paddy)}")
 
-df_paddy.to_csv('Data/PB_Paddy_Filtered_New.csv', index=False)
-print(f"  Saved to: Data/PB_Paddy_Filtered_New.csv")
+write_table(df_paddy, 'Data/PB_Paddy_Filtered_New.parquet')
+print(f"  Saved to: Data/PB_Paddy_Filtered_New.parquet")
 
 # Step 2: Deduplication
 print("\nStep 2: Deduplicating Paddy data...")
@@ -36,7 +47,7 @@ print("  Running deduplication pipeline...")
 
 result = subprocess.run([
     'python', 'scripts/data_processing/deduplicate_questions.py',
-    '--input', 'Data/PB_Paddy_Filtered_New.csv',
+    '--input', 'Data/PB_Paddy_Filtered_New.parquet',
     '--output', 'outputs/deduplicated/PB_Paddy_Unique_New.csv',
     '--column', 'QueryText'
 ], env={**os.environ, 'PYTHONPATH': '/home/ubuntu/Kshitij/unique-qs'}, 
@@ -48,7 +59,7 @@ if result.returncode != 0:
     sys.exit(1)
 
 # Parse deduplication results
-df_unique = pd.read_csv('outputs/deduplicated/PB_Paddy_Unique_New.csv')
+df_unique = pd.read_csv('outputs/deduplicated/PB_Paddy_Unique_New.csv', dtype=str)
 print(f"  Unique questions: {len(df_unique)}")
 
 # Step 3: Q&A Generation
@@ -60,7 +71,7 @@ print("  Skipping for now - will use existing PB_Paddy_QA_Final.csv")
 # Check if Q&A file exists
 qa_file = 'outputs/qa_results/PB_Paddy_QA_Final.csv'
 if os.path.exists(qa_file):
-    df_qa = pd.read_csv(qa_file)
+    df_qa = pd.read_csv(qa_file, dtype=str)
     print(f"  Using existing Q&A file: {len(df_qa)} rows")
 else:
     print(f"  WARNING: Q&A file not found: {qa_file}")
@@ -71,7 +82,7 @@ else:
 
 # Step 4: Merge with existing PUNJAB_Paddy_Dhan.csv
 print("\nStep 4: Merging with existing PUNJAB_Paddy_Dhan.csv...")
-df_existing = pd.read_csv('Data/PUNJAB_Paddy_Dhan.csv')
+df_existing = pd.read_csv('Data/PUNJAB_Paddy_Dhan.csv', dtype=str)
 print(f"  Existing data rows: {len(df_existing)}")
 print(f"  New Q&A rows: {len(df_qa)}")
 
@@ -82,8 +93,8 @@ print(f"  Common columns: {len(common_cols)}")
 df_merged = pd.concat([df_existing[common_cols], df_qa[common_cols]], ignore_index=True)
 print(f"  Merged rows: {len(df_merged)}")
 
-df_merged.to_csv('outputs/cleaned_data/PB_Paddy_Merged.csv', index=False)
-print(f"  Saved to: outputs/cleaned_data/PB_Paddy_Merged.csv")
+write_table(df_merged, 'outputs/cleaned_data/PB_Paddy_Merged.parquet')
+print(f"  Saved to: outputs/cleaned_data/PB_Paddy_Merged.parquet")
 
 # Step 5: Final deduplication
 print("\nStep 5: Final deduplication of merged data...")
@@ -99,7 +110,7 @@ else:
 
 result = subprocess.run([
     'python', 'scripts/data_processing/deduplicate_questions.py',
-    '--input', 'outputs/cleaned_data/PB_Paddy_Merged.csv',
+    '--input', 'outputs/cleaned_data/PB_Paddy_Merged.parquet',
     '--output', 'outputs/deduplicated/PB_Paddy_Final_Unique.csv',
     '--column', dedup_column
 ], env={**os.environ, 'PYTHONPATH': '/home/ubuntu/Kshitij/unique-qs'},
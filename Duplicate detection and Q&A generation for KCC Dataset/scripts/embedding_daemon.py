@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Run the local embedding daemon, or check on a running one.
+
+While the daemon runs, every EmbeddingGenerator (deduplicate_questions.py,
+check_cross_duplicates.py, check_questions_txt_vs_rus.py, ...) encodes
+through it instead of loading its own copy of the model.
+
+Usage:
+    python scripts/embedding_daemon.py serve --gpu &
+    python scripts/embedding_daemon.py status
+    EMBEDDING_SERVICE_SOCKET=/run/user/1000/emb.sock python scripts/embedding_daemon.py serve
+"""
+
+import argparse
+import logging
+import signal
+import sys
+from pathlib import Path
+
+# Add project root to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import yaml
+from utils.embedding_service import EmbeddingClient, EmbeddingServer, default_socket_path
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def semantic_config(config_path: str) -> dict:
+    """The deduplication.semantic section of the config ({} if there is no config)."""
+    try:
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+    return config.get('deduplication', {}).get('semantic', {}) or {}
+
+
+def configured_models(semantic: dict) -> list:
+    """Semantic model (and English model, if any) from the config, to preload."""
+    return [m for m in (semantic.get('model'), semantic.get('english_model')) if m]
+
+
+def stop(signum, frame):
+    """Signal handler: leave serve_forever() as on Ctrl-C."""
+    raise KeyboardInterrupt
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Local embedding daemon shared by the pipeline scripts")
+    parser.add_argument('--socket', type=str, help='Unix socket path (default: EMBEDDING_SERVICE_SOCKET or '
+                                                   f'{default_socket_path()})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    serve_parser = subparsers.add_parser('serve', help='Load models and serve encode requests')
+    serve_parser.add_argument('--config', type=str, default='config.yaml',
+                              help='Configuration file whose semantic models are preloaded (and whose '
+                                   'semantic.use_gpu is used without --gpu/--cpu)')
+    serve_parser.add_argument('--model', action='append', default=None,
+                              help='Model to preload (repeatable; overrides config)')
+    device = serve_parser.add_mutually_exclusive_group()
+    device.add_argument('--gpu', action='store_true', default=None, help='Load models on CUDA')
+    device.add_argument('--cpu', action='store_false', dest='gpu', default=None, help='Load models on CPU')
+    serve_parser.add_argument('--max-batch-texts', type=int, default=4096,
+                              help='Most texts merged into one model call (default: 4096)')
+    serve_parser.add_argument('--max-wait-ms', type=float, default=20.0,
+                              help='Time to wait for concurrent requests to merge (default: 20)')
+    
+    subparsers.add_parser('status', help='Check whether a daemon is running')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'status':
+        client = EmbeddingClient(args.socket, timeout=5)
+        if not client.available():
+            print(f"No embedding service at {client.socket_path}")
+            sys.exit(1)
+        reply, _ = client.request({'op': 'ping'})
+        print(f"Embedding service at {client.socket_path} ({reply.get('device', 'cpu')})")
+        print(f"  Models loaded: {', '.join(reply['models']) or '-'}")
+        print(f"  Requests: {reply['stats']['requests']:,}  Texts: {reply['stats']['texts']:,}  "
+              f"Model calls: {reply['stats']['batches']:,}")
+        return
+    
+    semantic = semantic_config(args.config)
+    server = EmbeddingServer(
+        socket_path=args.socket,
+        use_gpu=bool(semantic.get('use_gpu', False)) if args.gpu is None else args.gpu,
+        max_batch_texts=args.max_batch_texts,
+        max_wait_ms=args.max_wait_ms,
+        preload=args.model or configured_models(semantic)
+    )
+    # SIGTERM (e.g. from a pipeline that started the daemon) shuts down cleanly
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,9 @@ Complete processing pipeline for Punjab Paddy data
 """
 import csv
 import os
+import subprocess
 import sys
+import time
 
 # Anthropic API Key
 API_KEY = "YOUR_ANTHROPIC_API_KEY_HERE"
@@ -105,6 +107,37 @@ def step2_deduplicate(input_file, output_file):
     print(f"Deduplication completed successfully")
     return output_file
 
+def start_embedding_daemon(socket_path=None):
+    """
+    Start the embedding daemon so both deduplication runs share one loaded model.
+    The daemon loads it on the device set by semantic.use_gpu in config.yaml.
+    Returns the daemon process, or None if a daemon is already running or it
+    did not come up (the runs then load the model themselves).
+    """
+    # Same default as utils.embedding_service.default_socket_path()
+    socket_path = socket_path or os.environ.get('EMBEDDING_SERVICE_SOCKET') or \
+        f"/tmp/kcc-embedding-{os.getuid()}/service.sock"
+    if os.path.exists(socket_path):
+        print(f"Using running embedding daemon at {socket_path}")
+        return None
+    
+    cmd = ["venv/bin/python", "scripts/embedding_daemon.py", "--socket", socket_path, "serve",
+           "--config", "config.yaml"]
+    print(f"Starting embedding daemon: {' '.join(cmd)}")
+    daemon = subprocess.Popen(cmd, cwd="/home/ubuntu/Kshitij/unique-qs",
+                              env={**os.environ, "PYTHONPATH": "/home/ubuntu/Kshitij/unique-qs"})
+    
+    # Loading the model takes a while; the socket appears once it is ready
+    for _ in range(600):
+        if os.path.exists(socket_path):
+            return daemon
+        if daemon.poll() is not None:
+            break
+        time.sleep(1)
+    print("WARNING: Embedding daemon did not start, deduplication will load the model itself")
+    daemon.terminate()
+    return None
+
 def step3_generate_qa(input_file, output_file):
     """
     Step 3: Generate Questions and Answers for each row
@@ -203,6 +236,19 @@ def main():
     print("PUNJAB PADDY DATA PROCESSING PIPELINE")
     print("="*60)
     
+    # Keep one embedding model warm for both deduplication runs
+    daemon = start_embedding_daemon()
+    try:
+        run_steps()
+    finally:
+        if daemon is not None:
+            daemon.terminate()
+            daemon.wait()
+
+def run_steps():
+    """
+    Steps 1-5: filter, deduplicate, generate Q&A, merge, deduplicate again
+    """
     # Step 1: Filter Punjab Paddy data
     step1_output = step1_filter_punjab_paddy()
     
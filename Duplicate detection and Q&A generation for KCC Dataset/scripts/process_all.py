@@ -1,17 +1,19 @@
 #!/usr/bin/env python3
 """
 Batch processing script to deduplicate all data files.
-Processes both CSV and Excel files with the same configuration.
+Processes both CSV and Excel files with the same configuration, in one
+process that loads the embedding model once (see deduplicate_many).
 """
 
 import sys
 from pathlib import Path
 
-# Add parent directory to path to import deduplicate_questions
+# Add project root (utils) and the data processing scripts to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent / 'data_processing'))
 
 import logging
-from deduplicate_questions import QuestionDeduplicator, load_config
+from deduplicate_questions import deduplicate_many, format_batch_summary, load_config
 
 logging.basicConfig(
     level=logging.INFO,
@@ -40,41 +42,9 @@ def main():
         }
     ]
     
-    # Process each file
-    for i, file_info in enumerate(files_to_process, 1):
-        logger.info("="*70)
-        logger.info(f"Processing file {i}/{len(files_to_process)}: {file_info['input']}")
-        logger.info("="*70)
-        
-        # Check if file exists
-        if not Path(file_info['input']).exists():
-            logger.warning(f"File not found: {file_info['input']}, skipping...")
-            continue
-        
-        try:
-            # Create deduplicator
-            deduplicator = QuestionDeduplicator(config)
-            
-            # Run deduplication
-            df_result = deduplicator.deduplicate(
-                input_file=file_info['input'],
-                output_file=file_info['output'],
-                question_column=file_info['column']
-            )
-            
-            # Print report
-            deduplicator.report.print_summary()
-            
-            # Save report
-            report_file = f"{file_info['output']}.report.txt"
-            deduplicator.report.save_to_file(report_file)
-            
-            logger.info(f"✓ Successfully processed {file_info['input']}")
-            logger.info("")
-            
-        except Exception as e:
-            logger.error(f"✗ Failed to process {file_info['input']}: {e}", exc_info=True)
-            continue
+    # Process all files in one run, sharing the model and worker pool
+    summary = deduplicate_many(config, files_to_process)
+    print(format_batch_summary(summary))
     
     logger.info("="*70)
     logger.info("BATCH PROCESSING COMPLETE")
@@ -0,0 +1,11 @@
+"""
+Shared pytest setup: make the project's utils package importable.
+
+Run from the project directory with: python -m pytest -q
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,34 @@
+"""Tests for utils/checkpoint.py."""
+
+import numpy as np
+
+from utils.checkpoint import StageCheckpoint
+
+CONFIG = {'exact': {'enabled': True}}
+
+
+def test_checkpoint_resumes_same_input(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text("QueryText\nhow to sow wheat\n")
+    StageCheckpoint(str(tmp_path / "ckpt"), str(path), CONFIG).save_stage('exact', np.array([0]), {})
+    checkpoint = StageCheckpoint(str(tmp_path / "ckpt"), str(path), CONFIG)
+    assert checkpoint.is_completed('exact')
+    assert checkpoint.rows('exact').tolist() == [0]
+
+
+def test_checkpoint_not_resumed_after_edit_in_the_middle(tmp_path):
+    path = tmp_path / "input.csv"
+    head, tail = "QueryText\n" + "a" * (2 << 20) + "\n", "\n" + "z" * (2 << 20) + "\n"
+    path.write_text(head + "how to sow wheat" + tail)
+    StageCheckpoint(str(tmp_path / "ckpt"), str(path), CONFIG).save_stage('exact', np.array([0]), {})
+    # Same size, same first and last MiB
+    path.write_text(head + "how to sow paddy" + tail)
+    assert not StageCheckpoint(str(tmp_path / "ckpt"), str(path), CONFIG).is_completed('exact')
+
+
+def test_checkpoint_keyed_by_config(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text("QueryText\nhow to sow wheat\n")
+    StageCheckpoint(str(tmp_path / "ckpt"), str(path), CONFIG).save_stage('exact', np.array([0]), {})
+    other = {'exact': {'enabled': True}, 'fuzzy': {'threshold': 0.9}}
+    assert not StageCheckpoint(str(tmp_path / "ckpt"), str(path), other).is_completed('exact')
@@ -0,0 +1,73 @@
+"""Tests for utils/clustering.py."""
+
+import os
+
+import numpy as np
+import pytest
+
+from utils.clustering import ClusterState
+
+
+def unit(*rows):
+    vectors = np.asarray(rows, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def state():
+    # Rows 0 and 2 form one cluster, row 1 another; they came from rows 10, 11, 14 of the input
+    return ClusterState.from_clusters({5: [0, 2], 9: [1]}, {5: 2, 9: 1},
+                                      unit([1, 0, 0], [0, 1, 0], [0.99, 0.1, 0]),
+                                      ["aphids", "sowing", "aphid control"], 0.9,
+                                      row_ids=np.array([10, 11, 14]), input_file="jan.csv")
+
+
+def test_from_clusters_records_source_rows(state):
+    assert state.labels.tolist() == [0, 1, 0]
+    assert state.rep_ids.tolist() == [2, 1]
+    assert state.row_ids.tolist() == [10, 11, 14]
+    assert state.batches.tolist() == [0, 0, 0]
+    assert state.inputs == ["jan.csv"]
+
+
+def test_assign_adds_a_batch(state):
+    # Joins cluster 0, then two near-identical new rows form one new cluster
+    labels, is_new_rep = state.assign(unit([0.98, 0.05, 0], [0, 0, 1], [0, 0.05, 1]),
+                                      ["aphids?", "rain", "rainfall"],
+                                      row_ids=np.array([3, 7, 8]), input_file="feb.csv")
+    assert labels.tolist() == [0, 2, 2]
+    assert is_new_rep.tolist() == [False, False, True]
+    # rep_ids are state positions: the new representative is state row 3 + 2
+    assert state.rep_ids.tolist() == [2, 1, 5]
+    assert state.rep_texts[2] == "rainfall"
+    assert state.row_ids.tolist() == [10, 11, 14, 3, 7, 8]
+    assert state.batches.tolist() == [0, 0, 0, 1, 1, 1]
+    assert state.inputs == ["jan.csv", "feb.csv"]
+    k = state.rep_ids[2]
+    assert (state.inputs[state.batches[k]], state.row_ids[k]) == ("feb.csv", 8)
+
+
+def test_save_load_round_trip(tmp_path, state):
+    state.assign(unit([0, 0, 1]), ["rain"], row_ids=np.array([4]), input_file="feb.csv")
+    state.save(str(tmp_path))
+    loaded = ClusterState.load(str(tmp_path))
+    assert loaded.labels.tolist() == state.labels.tolist()
+    assert loaded.rep_ids.tolist() == state.rep_ids.tolist()
+    assert loaded.row_ids.tolist() == [10, 11, 14, 4]
+    assert loaded.batches.tolist() == [0, 0, 0, 1]
+    assert loaded.inputs == ["jan.csv", "feb.csv"]
+
+
+def test_load_state_without_source_rows(tmp_path, state):
+    state.save(str(tmp_path))
+    os.remove(tmp_path / "row_ids.npy")
+    os.remove(tmp_path / "batches.npy")
+    loaded = ClusterState.load(str(tmp_path))
+    assert loaded.row_ids.tolist() == [-1, -1, -1]
+    assert loaded.batches.tolist() == [0, 0, 0]
+
+
+def test_mismatched_source_rows_rejected(state):
+    with pytest.raises(ValueError, match="one entry per label"):
+        ClusterState(state.labels, state.rep_ids, state.rep_texts, state.index, 0.9,
+                     row_ids=np.array([1, 2]))
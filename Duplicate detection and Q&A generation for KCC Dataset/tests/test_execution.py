@@ -0,0 +1,28 @@
+"""Tests for utils/execution.py."""
+
+import pytest
+
+from utils.execution import parse_memory_size
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("16GB", 16 << 30),
+    ("16G", 16 << 30),
+    ("8K", 8 << 10),
+    ("512 MB", 512 << 20),
+    ("512m", 512 << 20),
+    ("1.5GB", int(1.5 * (1 << 30))),
+    ("2T", 2 << 40),
+    ("100", 100),
+    ("100B", 100),
+    (4096, 4096),
+    (None, None),
+])
+def test_parse_memory_size(value, expected):
+    assert parse_memory_size(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "16X", "GB", "1.2.3G", "-1GB"])
+def test_parse_memory_size_rejects_bad_values(value):
+    with pytest.raises(ValueError, match="Invalid memory size"):
+        parse_memory_size(value)
@@ -0,0 +1,56 @@
+"""Tests for utils/reporting.py."""
+
+import pandas as pd
+import pytest
+
+from utils.reporting import DeduplicationReport
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({'QueryText': [f"question {i}" for i in range(10)]})
+
+
+# Sparse cluster ids, as left by the pipeline (singleton clusters are skipped)
+CLUSTERS = {3: [0, 1], 70: [2, 3], 71: [9], 900: [4, 5, 6], 5000: [7, 8]}
+REPRESENTATIVES = {3: 0, 70: 3, 71: 9, 900: 5, 5000: 8}
+
+
+def test_groups_table(tmp_path, frame):
+    path = tmp_path / "groups.csv"
+    saved = DeduplicationReport().save_groups_table(str(path), frame, CLUSTERS, REPRESENTATIVES)
+    assert saved == 4
+    table = pd.read_csv(path)
+    assert table['cluster_id'].tolist() == [3, 3, 70, 70, 900, 900, 900, 5000, 5000]
+    # Representative first within each cluster
+    assert table.groupby('cluster_id')['is_representative'].first().all()
+    assert table['is_representative'].sum() == 4
+    assert table.loc[table['cluster_id'] == 900, 'cluster_size'].tolist() == [3, 3, 3]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_groups_table_partitions(tmp_path, frame, file_format):
+    out_dir = tmp_path / "groups"
+    saved = DeduplicationReport().save_groups_table(str(out_dir), frame, CLUSTERS, REPRESENTATIVES,
+                                                    file_format=file_format, partition_size=2)
+    assert saved == 4
+    files = sorted(out_dir.iterdir())
+    # Partitions hold partition_size groups each, however sparse the cluster ids
+    assert [f.name for f in files] == [f"groups_00000-00001.{file_format}",
+                                       f"groups_00002-00003.{file_format}"]
+    read = pd.read_csv if file_format == "csv" else pd.read_parquet
+    assert [sorted(set(read(f)['cluster_id'])) for f in files] == [[3, 70], [900, 5000]]
+
+
+def test_groups_table_partitions_without_groups(tmp_path, frame):
+    out_dir = tmp_path / "groups"
+    saved = DeduplicationReport().save_groups_table(str(out_dir), frame, {0: [0], 1: [1]}, {0: 0, 1: 1},
+                                                    partition_size=2)
+    assert saved == 0
+    assert not out_dir.exists()
+
+
+def test_groups_table_rejects_unknown_format(tmp_path, frame):
+    with pytest.raises(ValueError, match="Unsupported groups format"):
+        DeduplicationReport().save_groups_table(str(tmp_path / "g.json"), frame, CLUSTERS, REPRESENTATIVES,
+                                                file_format="json")
@@ -0,0 +1,40 @@
+"""Tests for utils/run_history.py."""
+
+from utils.run_history import RunHistory, file_fingerprint, quick_fingerprint
+
+
+def write_blocks(path, middle: bytes):
+    path.write_bytes(b"a" * (2 << 20) + middle + b"z" * (2 << 20))
+
+
+def test_file_fingerprint_sees_every_byte(tmp_path):
+    path = tmp_path / "input.csv"
+    write_blocks(path, b"before")
+    full, quick = file_fingerprint(str(path)), quick_fingerprint(str(path))
+    write_blocks(path, b"after!")
+    assert file_fingerprint(str(path)) != full
+    # The quick fingerprint only reads the ends, so a same-size edit in the middle is missed
+    assert quick_fingerprint(str(path)) == quick
+
+
+def test_fingerprints_of_missing_file(tmp_path):
+    assert file_fingerprint(str(tmp_path / "missing.csv")) is None
+    assert quick_fingerprint(str(tmp_path / "missing.csv")) is None
+
+
+def test_compare_matches_repeated_stages(tmp_path):
+    def metrics(seconds):
+        return {'stats': {}, 'stages': [
+            {'stage': 'shard', 'seconds': 2.0},
+            {'stage': 'shard', 'seconds': seconds},
+        ]}
+
+    history = RunHistory(str(tmp_path / "history.sqlite"))
+    try:
+        base = history.record(metrics(2.0), {}, str(tmp_path / "in.csv"), str(tmp_path / "out.csv"))
+        new = history.record(metrics(4.0), {}, str(tmp_path / "in.csv"), str(tmp_path / "out.csv"))
+        result = history.compare(base, new)
+    finally:
+        history.close()
+    assert [row['stage'] for row in result['stages']] == ['shard', 'shard#2']
+    assert result['regressions'] == ['shard#2']
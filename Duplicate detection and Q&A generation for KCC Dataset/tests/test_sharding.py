@@ -0,0 +1,64 @@
+"""Tests for utils/sharding.py."""
+
+import pandas as pd
+import pytest
+
+from utils.sharding import SOURCE_ROW_COLUMN, partition_table, shard_keys
+
+
+@pytest.fixture
+def questions():
+    return pd.DataFrame({
+        'QueryText': ['How to control aphids?', 'how to  control APHIDS?', 'Wheat sowing time',
+                      'Paddy blast treatment', 'wheat sowing time', 'Fertilizer dose for maize'],
+        'StateName': ['PUNJAB', 'HARYANA', 'PUNJAB', 'PUNJAB', 'HARYANA', 'PUNJAB'],
+        'Crop': ['Wheat', 'Wheat', 'Wheat', 'Paddy', 'Wheat', 'Maize'],
+    })
+
+
+def test_shard_keys_by_question(questions):
+    keys = shard_keys(questions, 'QueryText')
+    # Exact duplicates after normalization share a key
+    assert keys[0] == keys[1]
+    assert keys[2] == keys[4]
+    assert len(set(keys.tolist())) == 4
+
+
+def test_shard_keys_by_block(questions):
+    keys = shard_keys(questions, 'QueryText', ['StateName', 'Crop'])
+    assert keys[0] == keys[2]
+    assert keys[1] == keys[4]
+    assert keys[0] != keys[1]
+
+
+def test_shard_keys_missing_column(questions):
+    with pytest.raises(ValueError, match="Columns not found"):
+        shard_keys(questions, 'QueryText', ['District'])
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_partition_table(tmp_path, questions, suffix):
+    path = tmp_path / f"input{suffix}"
+    if suffix == ".csv":
+        questions.to_csv(path, index=False)
+    else:
+        questions.to_parquet(path, index=False)
+
+    shards = partition_table(str(path), str(tmp_path / "shards"), 3,
+                             lambda chunk: shard_keys(chunk, 'QueryText'), chunk_rows=2)
+    assert len(shards) == 3
+    assert sum(rows for _, rows in shards) == len(questions)
+
+    frames = [pd.read_csv(p) if suffix == ".csv" else pd.read_parquet(p)
+              for p, rows in shards if rows]
+    for frame in frames:
+        # Input order is kept within a shard
+        assert frame[SOURCE_ROW_COLUMN].is_monotonic_increasing
+    merged = pd.concat(frames).sort_values(SOURCE_ROW_COLUMN)
+    assert merged[SOURCE_ROW_COLUMN].tolist() == list(range(len(questions)))
+    assert merged['QueryText'].tolist() == questions['QueryText'].tolist()
+
+    # Duplicates land in the same shard
+    shard_of = {row: k for k, frame in enumerate(frames) for row in frame[SOURCE_ROW_COLUMN]}
+    assert shard_of[0] == shard_of[1]
+    assert shard_of[2] == shard_of[4]
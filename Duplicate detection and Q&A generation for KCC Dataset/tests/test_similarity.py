@@ -0,0 +1,52 @@
+"""Tests for utils/similarity.py."""
+
+import numpy as np
+import pytest
+
+from utils.reporting import ScoreStats
+from utils.similarity import find_fuzzy_pairs, find_fuzzy_pairs_tiled, fuzzy_tiles
+
+TEXTS = [
+    "how to control aphids in wheat", "how to control aphid in wheat", "wheat sowing time",
+    "sowing time of wheat", "paddy blast treatment", "treatment of blast in paddy",
+    "fertilizer dose for maize", "fertiliser dose for maize", "weather information",
+    "weather info", "how to control aphids in mustard", "paddy blast disease treatment",
+    "market rate of wheat", "wheat market rate", "seed rate of wheat",
+]
+
+
+@pytest.mark.parametrize("n, tile_rows", [(1, 4), (10, 3), (10, 10), (15, 4)])
+def test_fuzzy_tiles_cover_upper_triangle(n, tile_rows):
+    covered = set()
+    for row_start, row_stop, col_start, col_stop in fuzzy_tiles(n, tile_rows):
+        for i in range(row_start, row_stop):
+            for j in range(max(col_start, i + 1), col_stop):
+                assert (i, j) not in covered
+                covered.add((i, j))
+    assert covered == {(i, j) for i in range(n) for j in range(i + 1, n)}
+
+
+@pytest.mark.parametrize("tile_rows", [2, 4, 7, 100])
+def test_tiled_pairs_match_find_fuzzy_pairs(tile_rows):
+    expected, expected_comparisons = find_fuzzy_pairs(TEXTS, 0.8)
+    pairs, comparisons = find_fuzzy_pairs_tiled(TEXTS, 0.8, tile_rows=tile_rows)
+    assert comparisons == expected_comparisons == len(TEXTS) * (len(TEXTS) - 1) // 2
+    assert [(i, j) for i, j, _ in pairs] == [(i, j) for i, j, _ in expected]
+    assert [s for _, _, s in pairs] == pytest.approx([s for _, _, s in expected])
+
+
+def test_tiled_pairs_use_ids_and_fill_score_stats():
+    ids = np.arange(100, 100 + len(TEXTS))
+    expected_stats, stats = ScoreStats(0.8), ScoreStats(0.8)
+    expected, _ = find_fuzzy_pairs(TEXTS, 0.8, ids=ids, score_stats=expected_stats)
+    pairs, _ = find_fuzzy_pairs_tiled(TEXTS, 0.8, ids=ids, score_stats=stats, tile_rows=4)
+    assert [(i, j) for i, j, _ in pairs] == [(i, j) for i, j, _ in expected]
+    assert all(i >= 100 and j >= 100 for i, j, _ in pairs)
+    assert stats.total == expected_stats.total
+    assert stats.counts.tolist() == expected_stats.counts.tolist()
+
+
+def test_tiled_pairs_same_with_workers():
+    single, _ = find_fuzzy_pairs_tiled(TEXTS, 0.7, tile_rows=4, n_jobs=1)
+    parallel, _ = find_fuzzy_pairs_tiled(TEXTS, 0.7, tile_rows=4, n_jobs=2)
+    assert single == parallel
@@ -0,0 +1,125 @@
+"""Tests for utils/streaming.py."""
+
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from utils.streaming import BoundedPipeline, StreamIndex
+
+
+def test_pipeline_keeps_order():
+    pipeline = BoundedPipeline(queue_size=2)
+    try:
+        numbers = pipeline.source('read', range(100))
+        squares = pipeline.stage('square', lambda x: x * x, numbers)
+        shifted = pipeline.stage('shift', lambda x: x + 1, squares)
+        assert list(shifted) == [x * x + 1 for x in range(100)]
+    finally:
+        pipeline.close()
+    assert set(pipeline.busy) == {'read', 'square', 'shift'}
+
+
+def test_pipeline_is_bounded():
+    produced = []
+
+    def count():
+        for x in itertools.count():
+            produced.append(x)
+            yield x
+
+    pipeline = BoundedPipeline(queue_size=1)
+    try:
+        results = pipeline.stage('double', lambda x: 2 * x, pipeline.source('read', count()))
+        assert next(results) == 0
+        time.sleep(0.5)
+        # One item taken, plus at most queue_size + 1 held per step
+        assert len(produced) <= 1 + 2 * 2
+    finally:
+        pipeline.close()
+
+
+def test_pipeline_reraises_step_errors():
+    def fail(x):
+        if x == 3:
+            raise RuntimeError("bad item")
+        return x
+
+    pipeline = BoundedPipeline(queue_size=2)
+    try:
+        results = pipeline.stage('check', fail, pipeline.source('read', range(10)))
+        with pytest.raises(RuntimeError, match="bad item"):
+            list(results)
+    finally:
+        pipeline.close()
+
+
+def test_pipeline_close_stops_endless_source():
+    pipeline = BoundedPipeline(queue_size=1)
+    results = pipeline.source('read', itertools.count())
+    assert next(results) == 0
+    pipeline.close()
+    assert not any(thread.is_alive() for thread in pipeline._threads)
+
+
+def test_pipeline_rejects_empty_queue():
+    with pytest.raises(ValueError):
+        BoundedPipeline(queue_size=0)
+
+
+def unit(*rows):
+    vectors = np.asarray(rows, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_assign_exact_matches():
+    index = StreamIndex()
+    hashes = np.array([7, 8, 7], dtype=np.uint64)
+    clusters, match, similarity = index.assign(hashes)
+    assert clusters.tolist() == [0, 1, 0]
+    assert match.tolist() == ['new', 'new', 'exact']
+    assert np.isnan(similarity[0]) and similarity[2] == 1.0
+
+    # A later batch joins the clusters seen before
+    clusters, match, _ = index.assign(np.array([8, 9], dtype=np.uint64))
+    assert clusters.tolist() == [1, 2]
+    assert match.tolist() == ['exact', 'new']
+    assert len(index) == 3
+
+
+def test_assign_semantic_matches():
+    index = StreamIndex(threshold=0.9)
+    hashes = np.array([1, 2, 3, 1], dtype=np.uint64)
+    positions = index.candidates(hashes)
+    assert positions.tolist() == [0, 1, 2]
+    embeddings = unit([1, 0, 0], [0.99, 0.1, 0], [0, 1, 0])
+    clusters, match, similarity = index.assign(hashes, embeddings, positions)
+    assert clusters.tolist() == [0, 0, 1, 0]
+    assert match.tolist() == ['new', 'semantic', 'new', 'exact']
+    assert similarity[1] == pytest.approx(0.995, abs=1e-3)
+
+    # New rows of a later batch are searched against the kept representatives
+    hashes = np.array([4, 5], dtype=np.uint64)
+    positions = index.candidates(hashes)
+    clusters, match, _ = index.assign(hashes, unit([0.05, 1, 0], [0, 0, 1]), positions)
+    assert clusters.tolist() == [1, 2]
+    assert match.tolist() == ['semantic', 'new']
+
+
+def test_assign_requires_embeddings_of_new_rows():
+    index = StreamIndex(threshold=0.9)
+    hashes = np.array([1, 2], dtype=np.uint64)
+    with pytest.raises(ValueError, match="No embeddings"):
+        index.assign(hashes, unit([1, 0]), np.array([0]))
+
+
+def test_index_switches_to_ivf_and_retrains():
+    rng = np.random.default_rng(0)
+    index = StreamIndex(threshold=0.99, train_size=50, retrain_factor=2.0, chunk_size=64)
+    for batch in range(5):
+        hashes = np.arange(batch * 40, (batch + 1) * 40, dtype=np.uint64)
+        index.assign(hashes, rng.normal(size=(40, 16)), np.arange(40))
+    assert len(index) == 200
+    assert index.trained_size == 160
+    assert len(index.index) == 200
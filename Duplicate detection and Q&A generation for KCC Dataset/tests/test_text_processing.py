@@ -0,0 +1,30 @@
+"""Tests for utils/text_processing.py."""
+
+import numpy as np
+import pandas as pd
+
+from utils.text_processing import clean_question, is_valid_question, normalize_questions, normalize_text
+
+VALUES = ["How to control  APHIDS in wheat?", 12345678901, 3.14159265358, None,
+          "How to control  APHIDS in wheat?", "short", "Sowing time of paddy crop"]
+
+
+def test_normalize_questions_matches_per_row_functions():
+    result = normalize_questions(pd.Series(VALUES, dtype=object))
+    assert result['valid'].tolist() == [is_valid_question(v) for v in VALUES]
+    assert result['normalized'].tolist() == [normalize_text(v) for v in VALUES]
+    assert result['cleaned'].tolist() == [clean_question(v) if isinstance(v, str) else "" for v in VALUES]
+
+
+def test_normalize_questions_non_string_values_are_invalid():
+    result = normalize_questions(pd.Series([12345678901, 3.14159265358]))
+    assert not result['valid'].any()
+    assert result['normalized'].tolist() == ["", ""]
+
+
+def test_normalize_questions_keeps_index_and_hashes_duplicates():
+    values = pd.Series(VALUES, index=np.arange(10, 10 + len(VALUES)), dtype=object)
+    result = normalize_questions(values)
+    assert result.index.equals(values.index)
+    assert result['hash'].iloc[0] == result['hash'].iloc[4]
+    assert result['hash'].iloc[0] != result['hash'].iloc[6]
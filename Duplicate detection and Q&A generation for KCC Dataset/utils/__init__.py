@@ -7,7 +7,12 @@ from .text_processing import (
     normalize_batch,
     clean_question,
     extract_keywords,
-    is_valid_question
+    is_valid_question,
+    normalize_questions,
+    detect_script,
+    detect_scripts,
+    hash_texts,
+    find_exact_matches
 )
 
 from .similarity import (
@@ -16,7 +21,18 @@ from .similarity import (
     EmbeddingGenerator,
     compute_cosine_similarity_matrix,
     find_similar_pairs,
-    compute_semantic_similarity
+    find_similar_pairs_blockwise,
+    find_fuzzy_pairs,
+    find_fuzzy_pairs_tiled,
+    fuzzy_tiles,
+    fuzzy_pairs_by_block,
+    semantic_pairs_by_block,
+    compute_semantic_similarity,
+    normalize_embeddings,
+    EmbeddingIndex,
+    IVFIndex,
+    find_similar_pairs_ivf,
+    ivf_list_count
 )
 
 from .clustering import (
@@ -24,12 +40,70 @@ from .clustering import (
     cluster_by_pairs,
     get_cluster_representatives,
     get_items_to_keep,
-    get_items_to_remove
+    get_items_to_remove,
+    ClusterState
 )
 
+from .corpus_index import CorpusIndex
+
+from .checkpoint import StageCheckpoint
+
 from .reporting import (
     DeduplicationReport,
-    print_sample_duplicates
+    ScoreStats,
+    print_sample_duplicates,
+    get_peak_rss_mb
+)
+
+from .run_history import (
+    RunHistory,
+    config_hash,
+    file_fingerprint,
+    quick_fingerprint
+)
+
+from .io import (
+    read_table,
+    write_table,
+    write_excel,
+    iter_table_chunks,
+    TableWriter,
+    excel_cache_path,
+    EXCEL_CACHE_DIR,
+    HAS_PYARROW
+)
+
+from .execution import (
+    ExecutionSettings,
+    parse_memory_size,
+    available_memory
+)
+
+from .sharding import (
+    partition_table,
+    shard_keys,
+    SOURCE_ROW_COLUMN
+)
+
+from .planning import (
+    sample_table,
+    estimate_distinct,
+    plan_run,
+    format_plan
+)
+
+from .embedding_service import (
+    EmbeddingClient,
+    EmbeddingServer,
+    EmbeddingServiceError
+)
+
+from .streaming import (
+    StreamIndex,
+    read_record_batches,
+    RecordWriter,
+    BoundedPipeline,
+    DECISION_FIELDS
 )
 
 __all__ = [
@@ -39,6 +113,11 @@ __all__ = [
     'clean_question',
     'extract_keywords',
     'is_valid_question',
+    'normalize_questions',
+    'detect_script',
+    'detect_scripts',
+    'hash_texts',
+    'find_exact_matches',
     
     # Similarity
     'fuzzy_similarity',
@@ -46,7 +125,18 @@ __all__ = [
     'EmbeddingGenerator',
     'compute_cosine_similarity_matrix',
     'find_similar_pairs',
+    'find_similar_pairs_blockwise',
+    'find_fuzzy_pairs',
+    'find_fuzzy_pairs_tiled',
+    'fuzzy_tiles',
+    'fuzzy_pairs_by_block',
+    'semantic_pairs_by_block',
     'compute_semantic_similarity',
+    'normalize_embeddings',
+    'EmbeddingIndex',
+    'IVFIndex',
+    'find_similar_pairs_ivf',
+    'ivf_list_count',
     
     # Clustering
     'cluster_by_similarity',
@@ -54,8 +144,61 @@ __all__ = [
     'get_cluster_representatives',
     'get_items_to_keep',
     'get_items_to_remove',
+    'ClusterState',
+    
+    # Corpus index
+    'CorpusIndex',
+    
+    # Checkpoints
+    'StageCheckpoint',
     
     # Reporting
     'DeduplicationReport',
+    'ScoreStats',
     'print_sample_duplicates',
+    'get_peak_rss_mb',
+    
+    # Run history
+    'RunHistory',
+    'config_hash',
+    'file_fingerprint',
+    'quick_fingerprint',
+    
+    # Table I/O
+    'read_table',
+    'write_table',
+    'write_excel',
+    'iter_table_chunks',
+    'TableWriter',
+    'excel_cache_path',
+    'EXCEL_CACHE_DIR',
+    'HAS_PYARROW',
+    
+    # Execution settings
+    'ExecutionSettings',
+    'parse_memory_size',
+    'available_memory',
+    
+    # Sharding
+    'partition_table',
+    'shard_keys',
+    'SOURCE_ROW_COLUMN',
+    
+    # Cost planning
+    'sample_table',
+    'estimate_distinct',
+    'plan_run',
+    'format_plan',
+    
+    # Embedding service
+    'EmbeddingClient',
+    'EmbeddingServer',
+    'EmbeddingServiceError',
+    
+    # Streaming
+    'StreamIndex',
+    'read_record_batches',
+    'RecordWriter',
+    'BoundedPipeline',
+    'DECISION_FIELDS',
 ]
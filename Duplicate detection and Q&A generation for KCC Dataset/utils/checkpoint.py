@@ -0,0 +1,143 @@
+"""
+Stage checkpoints for resuming an interrupted deduplication run.
+
+After each completed stage the surviving row ids (positions in the loaded
+input file), the report statistics and the stage's artifacts are written to
+a directory keyed by the input file content and the deduplication config.
+A rerun with the same input and config resumes after the last completed
+stage instead of starting over.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+from .run_history import config_hash, file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class StageCheckpoint:
+    """
+    Checkpoint directory for one (input file, config) pair.
+    
+    Usage:
+        ckpt = StageCheckpoint("Data/checkpoints", input_file, config['deduplication'])
+        if ckpt.is_completed('fuzzy'):
+            rows = ckpt.rows('fuzzy')
+        ckpt.save_stage('fuzzy', rows, stats, arrays={'pairs': pairs})
+        ckpt.clear()  # after a successful run
+    """
+    
+    def __init__(self, root: str, input_file: str, config: dict):
+        """
+        Open the checkpoint directory for an input file and config.
+        
+        Args:
+            root: Directory holding all checkpoints
+            input_file: Input file path (its content is part of the key)
+            config: Settings that determine stage results (e.g. config['deduplication'])
+        """
+        # Full content hash: a checkpoint of an edited input must never be resumed
+        fingerprint = (file_fingerprint(input_file) or 'missing').replace(':', '-')
+        key = f"{Path(input_file).stem}-{fingerprint}-{config_hash(config)}"
+        self.path = Path(root) / key
+        self.manifest = self._read_manifest()
+    
+    def _read_manifest(self) -> dict:
+        """Load the manifest, or an empty one for a new checkpoint."""
+        manifest_file = self.path / "manifest.json"
+        if manifest_file.exists():
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'completed': [], 'stats': {}}
+    
+    def _write_manifest(self):
+        """Persist the manifest."""
+        # Write then rename, so a crash never leaves a half-written manifest
+        tmp_file = self.path / "manifest.json.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_file, self.path / "manifest.json")
+    
+    @property
+    def completed(self) -> List[str]:
+        """Completed stages in the order they finished."""
+        return list(self.manifest['completed'])
+    
+    @property
+    def stats(self) -> dict:
+        """Report statistics as of the last completed stage."""
+        return dict(self.manifest['stats'])
+    
+    def is_completed(self, stage: str) -> bool:
+        """Check whether a stage has a checkpoint."""
+        return stage in self.manifest['completed']
+    
+    def last_completed(self, stages: List[str]) -> Optional[str]:
+        """
+        Latest stage of a pipeline order that has a checkpoint.
+        
+        Args:
+            stages: Stage names in pipeline order
+        
+        Returns:
+            Stage name, or None if no stage has completed
+        """
+        done = [s for s in stages if self.is_completed(s)]
+        return done[-1] if done else None
+    
+    def save_stage(self, stage: str, rows: np.ndarray, stats: dict,
+                   arrays: Optional[Dict[str, np.ndarray]] = None,
+                   data: Optional[dict] = None):
+        """
+        Record a completed stage.
+        
+        Args:
+            stage: Stage name
+            rows: Row ids that survived the stage
+            stats: Report statistics after the stage
+            arrays: Numeric artifacts, saved as .npy
+            data: JSON-serializable artifacts
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        np.save(self.path / f"{stage}.rows.npy", np.asarray(rows, dtype=np.int64))
+        for name, array in (arrays or {}).items():
+            np.save(self.path / f"{stage}.{name}.npy", array)
+        if data is not None:
+            with open(self.path / f"{stage}.json", 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        
+        if stage not in self.manifest['completed']:
+            self.manifest['completed'].append(stage)
+        self.manifest['stats'] = dict(stats)
+        self._write_manifest()
+        logger.info(f"Checkpoint saved after stage '{stage}' ({len(rows)} rows)")
+    
+    def rows(self, stage: str) -> np.ndarray:
+        """Row ids that survived a stage."""
+        return np.load(self.path / f"{stage}.rows.npy")
+    
+    def array(self, stage: str, name: str) -> Optional[np.ndarray]:
+        """A numeric artifact of a stage, or None if it was not saved."""
+        array_file = self.path / f"{stage}.{name}.npy"
+        return np.load(array_file) if array_file.exists() else None
+    
+    def data(self, stage: str) -> Optional[dict]:
+        """JSON artifacts of a stage, or None if none were saved."""
+        data_file = self.path / f"{stage}.json"
+        if not data_file.exists():
+            return None
+        with open(data_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def clear(self):
+        """Delete this checkpoint."""
+        if self.path.exists():
+            shutil.rmtree(self.path)
+        self.manifest = {'completed': [], 'stats': {}}
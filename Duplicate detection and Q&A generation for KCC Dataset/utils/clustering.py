@@ -2,10 +2,14 @@
 Clustering utilities for grouping similar questions.
 """
 
+import json
 import numpy as np
-from typing import List, Dict, Set
+from pathlib import Path
+from typing import List, Dict, Set, Optional, Tuple
 import logging
 
+from .similarity import EmbeddingIndex, find_similar_pairs_blockwise
+
 logger = logging.getLogger(__name__)
 
 
@@ -181,3 +185,226 @@ def get_items_to_remove(n_items: int,
     keep = get_items_to_keep(clusters, representatives)
     all_items = set(range(n_items))
     return all_items - keep
+
+
+class ClusterState:
+    """
+    Persisted clusters from a deduplication run.
+    
+    Stores a dense cluster label for every clustered row, the representative
+    and its embedding for each cluster, and the similarity threshold. New
+    questions are assigned to the nearest representative, so an update
+    costs O(new rows x clusters) instead of a full re-clustering.
+    
+    State rows are numbered in the order they were added (the clustered
+    rows of the first run, then the rows of each assign() call). labels and
+    rep_ids refer to these state positions. Each state row also records its
+    source row (position in its input file) and batch (index into inputs,
+    the input file of each run), so labels can be joined back to the data:
+    state row k is row row_ids[k] of inputs[batches[k]].
+    """
+    
+    def __init__(self, labels: np.ndarray, rep_ids: np.ndarray, rep_texts: List[str],
+                 rep_index: EmbeddingIndex, threshold: float,
+                 model_name: Optional[str] = None,
+                 row_ids: Optional[np.ndarray] = None,
+                 batches: Optional[np.ndarray] = None,
+                 inputs: Optional[List[Optional[str]]] = None):
+        """
+        Initialize cluster state.
+        
+        Args:
+            labels: Cluster id for each state row (cluster ids are 0..n_clusters-1)
+            rep_ids: State position of the representative of each cluster
+            rep_texts: Cleaned text of each representative
+            rep_index: Embedding index holding one vector per cluster
+            threshold: Cosine similarity threshold used for clustering
+            model_name: Embedding model the vectors were produced with
+            row_ids: Source row of each state row in its input file (None = unknown, -1)
+            batches: Index into inputs of each state row (None = all from inputs[0])
+            inputs: Input file of each batch (None = one unknown input)
+        """
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.rep_ids = np.asarray(rep_ids, dtype=np.int64)
+        self.rep_texts = list(rep_texts)
+        self.index = rep_index
+        self.threshold = float(threshold)
+        self.model_name = model_name
+        n = len(self.labels)
+        self.row_ids = (np.full(n, -1, dtype=np.int64) if row_ids is None
+                        else np.asarray(row_ids, dtype=np.int64))
+        self.batches = (np.zeros(n, dtype=np.int64) if batches is None
+                        else np.asarray(batches, dtype=np.int64))
+        self.inputs = list(inputs) if inputs is not None else [None]
+        if len(self.row_ids) != n or len(self.batches) != n:
+            raise ValueError(f"row_ids and batches need one entry per label ({n})")
+    
+    @property
+    def n_rows(self) -> int:
+        return len(self.labels)
+    
+    @property
+    def n_clusters(self) -> int:
+        return len(self.rep_ids)
+    
+    @classmethod
+    def from_clusters(cls, clusters: Dict[int, List[int]],
+                      representatives: Dict[int, int],
+                      embeddings: np.ndarray,
+                      texts: List[str],
+                      threshold: float,
+                      model_name: Optional[str] = None,
+                      row_ids: Optional[np.ndarray] = None,
+                      input_file: Optional[str] = None) -> "ClusterState":
+        """
+        Build state from the output of cluster_by_pairs().
+        
+        Args:
+            clusters: Dictionary mapping cluster_id -> list of item indices
+            representatives: Dictionary mapping cluster_id -> representative item index
+            embeddings: NxD embeddings of the clustered items
+            texts: Cleaned text of the clustered items
+            threshold: Cosine similarity threshold used for clustering
+            model_name: Embedding model name
+            row_ids: Source row of each clustered item in input_file (None = unknown)
+            input_file: Input file the items came from
+        
+        Returns:
+            ClusterState with clusters relabelled densely in order of first item
+        """
+        labels = np.full(len(texts), -1, dtype=np.int64)
+        rep_ids = []
+        for new_id, root in enumerate(sorted(clusters, key=lambda c: min(clusters[c]))):
+            labels[clusters[root]] = new_id
+            rep_ids.append(representatives[root])
+        
+        index = EmbeddingIndex()
+        if rep_ids:
+            index.add(np.asarray(embeddings)[rep_ids])
+        
+        return cls(labels, rep_ids, [texts[i] for i in rep_ids], index, threshold, model_name,
+                   row_ids=row_ids, inputs=[input_file])
+    
+    def assign(self, embeddings: np.ndarray, texts: List[str],
+               row_ids: Optional[np.ndarray] = None, input_file: Optional[str] = None,
+               block_rows: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Assign new items to existing clusters or create new clusters.
+        
+        Items whose nearest representative is at least `threshold` similar
+        join that cluster. The remaining items are clustered among themselves
+        and each resulting group becomes a new cluster, represented by its
+        longest question. The state is updated in place; the items are
+        added as a new batch.
+        
+        Args:
+            embeddings: MxD embeddings of the new items
+            texts: Cleaned text of the new items
+            row_ids: Source row of each item in input_file (None = unknown)
+            input_file: Input file the items came from
+            block_rows: Rows scored per matrix product among unmatched items
+        
+        Returns:
+            Tuple of (labels, is_new_representative) arrays of length M
+        """
+        m = len(texts)
+        labels = np.full(m, -1, dtype=np.int64)
+        is_new_rep = np.zeros(m, dtype=bool)
+        if m == 0:
+            return labels, is_new_rep
+        row_ids = np.full(m, -1, dtype=np.int64) if row_ids is None else np.asarray(row_ids, dtype=np.int64)
+        
+        embeddings = np.asarray(embeddings)
+        scores, ids = self.index.search(embeddings, k=1)
+        matched = scores[:, 0] >= self.threshold
+        labels[matched] = ids[matched, 0]
+        
+        unmatched = np.flatnonzero(~matched)
+        if len(unmatched) > 0:
+            pairs = find_similar_pairs_blockwise(embeddings[unmatched], self.threshold, block_rows=block_rows)
+            new_clusters = cluster_by_pairs(len(unmatched), pairs)
+            lengths = np.array([len(texts[i]) for i in unmatched])
+            new_reps = get_cluster_representatives(new_clusters, scores=lengths, strategy="best")
+            
+            rep_local = []
+            for root in sorted(new_clusters, key=lambda c: min(new_clusters[c])):
+                labels[unmatched[new_clusters[root]]] = self.n_clusters + len(rep_local)
+                rep_local.append(new_reps[root])
+            
+            rep_rows = unmatched[rep_local]
+            is_new_rep[rep_rows] = True
+            self.index.add(embeddings[rep_rows])
+            self.rep_ids = np.concatenate([self.rep_ids, self.n_rows + rep_rows])
+            self.rep_texts.extend(texts[i] for i in rep_rows)
+        
+        self.labels = np.concatenate([self.labels, labels])
+        self.row_ids = np.concatenate([self.row_ids, row_ids])
+        self.batches = np.concatenate([self.batches, np.full(m, len(self.inputs), dtype=np.int64)])
+        self.inputs.append(input_file)
+        logger.info(f"Assigned {int(matched.sum())} items to existing clusters, "
+                    f"created {int(is_new_rep.sum())} new clusters")
+        
+        return labels, is_new_rep
+    
+    def save(self, directory: str):
+        """
+        Save state to a directory.
+        
+        Args:
+            directory: Output directory (created if missing)
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        
+        np.save(path / "labels.npy", self.labels)
+        np.save(path / "rep_ids.npy", self.rep_ids)
+        np.save(path / "row_ids.npy", self.row_ids)
+        np.save(path / "batches.npy", self.batches)
+        self.index.save(str(path / "rep_embeddings.npy"))
+        with open(path / "rep_texts.json", 'w', encoding='utf-8') as f:
+            json.dump(self.rep_texts, f, ensure_ascii=False)
+        with open(path / "state.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                'threshold': self.threshold,
+                'model_name': self.model_name,
+                'n_rows': self.n_rows,
+                'n_clusters': self.n_clusters,
+                'inputs': self.inputs
+            }, f, indent=2)
+        
+        logger.info(f"Cluster state saved to {directory} ({self.n_clusters} clusters, {self.n_rows} rows)")
+    
+    @classmethod
+    def load(cls, directory: str) -> "ClusterState":
+        """
+        Load state previously written with save().
+        
+        Args:
+            directory: State directory
+        
+        Returns:
+            ClusterState instance
+        """
+        path = Path(directory)
+        if not (path / "state.json").exists():
+            raise FileNotFoundError(f"Cluster state not found: {directory}")
+        
+        with open(path / "state.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(path / "rep_texts.json", 'r', encoding='utf-8') as f:
+            rep_texts = json.load(f)
+        
+        # States saved before source rows were recorded load with unknown (-1) rows
+        row_ids = np.load(path / "row_ids.npy") if (path / "row_ids.npy").exists() else None
+        batches = np.load(path / "batches.npy") if (path / "batches.npy").exists() else None
+        return cls(
+            labels=np.load(path / "labels.npy"),
+            rep_ids=np.load(path / "rep_ids.npy"),
+            rep_texts=rep_texts,
+            rep_index=EmbeddingIndex.load(str(path / "rep_embeddings.npy")),
+            threshold=meta['threshold'],
+            model_name=meta.get('model_name'),
+            row_ids=row_ids,
+            batches=batches,
+            inputs=meta.get('inputs')
+        )
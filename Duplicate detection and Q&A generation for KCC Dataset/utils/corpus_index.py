@@ -0,0 +1,175 @@
+"""
+Persistent index of an already-deduplicated corpus.
+
+Holds a sorted set of 64-bit hashes of normalized question text (for exact
+matches) and an embedding index of the corpus questions (for semantic
+matches), so new rows can be checked against the corpus without
+re-normalizing, re-embedding or re-comparing the corpus itself.
+"""
+
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from .similarity import EmbeddingIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusIndex:
+    """
+    Hash set plus embedding index of a deduplicated corpus.
+    
+    Usage:
+        index = CorpusIndex.load("Data/corpus_index/PUNJAB_Paddy_Dhan")
+        seen = index.contains(hash_texts(normalized))
+        scores, ids = index.search(embeddings)
+        index.add(new_hashes, new_embeddings, new_texts)
+        index.save("Data/corpus_index/PUNJAB_Paddy_Dhan")
+    """
+    
+    def __init__(self, hashes: np.ndarray, embedding_index: EmbeddingIndex, texts: List[str],
+                 threshold: float, model_name: Optional[str] = None):
+        """
+        Initialize corpus index.
+        
+        Args:
+            hashes: uint64 hashes of normalized corpus questions
+            embedding_index: Embeddings of the corpus questions
+            texts: Cleaned text of each embedded question
+            threshold: Cosine similarity threshold for a semantic match
+            model_name: Embedding model the vectors were produced with
+        """
+        self.hashes = np.unique(np.asarray(hashes, dtype=np.uint64))
+        self.index = embedding_index
+        self.texts = list(texts)
+        self.threshold = float(threshold)
+        self.model_name = model_name
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    @classmethod
+    def build(cls, hashes: np.ndarray, embeddings: np.ndarray, texts: List[str],
+              threshold: float, model_name: Optional[str] = None) -> "CorpusIndex":
+        """
+        Build an index from corpus hashes, embeddings and texts.
+        
+        Args:
+            hashes: uint64 hashes of normalized corpus questions
+            embeddings: NxD embeddings of the corpus questions
+            texts: Cleaned text of the corpus questions
+            threshold: Cosine similarity threshold for a semantic match
+            model_name: Embedding model name
+        
+        Returns:
+            CorpusIndex instance
+        """
+        index = EmbeddingIndex()
+        if len(texts) > 0:
+            index.add(embeddings)
+        return cls(hashes, index, texts, threshold, model_name)
+    
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Check which hashes are already in the corpus.
+        
+        Args:
+            hashes: uint64 hashes of normalized questions
+        
+        Returns:
+            Boolean array, True where the question is an exact corpus match
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.hashes, hashes)
+        positions[positions == len(self.hashes)] = 0
+        return self.hashes[positions] == hashes
+    
+    def search(self, embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the most similar corpus question for each embedding.
+        
+        Args:
+            embeddings: MxD query embeddings
+        
+        Returns:
+            Tuple of (scores, ids) arrays of length M (id -1 for an empty corpus)
+        """
+        scores, ids = self.index.search(embeddings, k=1)
+        return scores[:, 0], ids[:, 0]
+    
+    def add(self, hashes: np.ndarray, embeddings: np.ndarray, texts: List[str]):
+        """
+        Add questions to the corpus in place.
+        
+        Args:
+            hashes: uint64 hashes to add to the exact-match set
+            embeddings: Embeddings of the questions to add to the semantic index
+            texts: Cleaned text of the embedded questions
+        """
+        self.hashes = np.union1d(self.hashes, np.asarray(hashes, dtype=np.uint64))
+        if len(texts) > 0:
+            self.index.add(embeddings)
+            self.texts.extend(texts)
+    
+    def save(self, directory: str):
+        """
+        Save index to a directory.
+        
+        Args:
+            directory: Output directory (created if missing)
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        
+        np.save(path / "hashes.npy", self.hashes)
+        self.index.save(str(path / "embeddings.npy"))
+        with open(path / "texts.json", 'w', encoding='utf-8') as f:
+            json.dump(self.texts, f, ensure_ascii=False)
+        with open(path / "index.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                'threshold': self.threshold,
+                'model_name': self.model_name,
+                'n_hashes': int(len(self.hashes)),
+                'n_embeddings': len(self)
+            }, f, indent=2)
+        
+        logger.info(f"Corpus index saved to {directory} ({len(self)} questions, {len(self.hashes)} hashes)")
+    
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        """Check whether a corpus index has been saved in directory."""
+        return (Path(directory) / "index.json").exists()
+    
+    @classmethod
+    def load(cls, directory: str) -> "CorpusIndex":
+        """
+        Load an index previously written with save().
+        
+        Args:
+            directory: Index directory
+        
+        Returns:
+            CorpusIndex instance
+        """
+        path = Path(directory)
+        if not cls.exists(directory):
+            raise FileNotFoundError(f"Corpus index not found: {directory}")
+        
+        with open(path / "index.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(path / "texts.json", 'r', encoding='utf-8') as f:
+            texts = json.load(f)
+        
+        return cls(
+            hashes=np.load(path / "hashes.npy"),
+            embedding_index=EmbeddingIndex.load(str(path / "embeddings.npy")),
+            texts=texts,
+            threshold=meta['threshold'],
+            model_name=meta.get('model_name')
+        )
@@ -0,0 +1,419 @@
+"""
+Local embedding daemon shared by the pipeline scripts.
+
+One process keeps the sentence-transformer models loaded and serves
+encode requests over a Unix socket; EmbeddingGenerator uses it instead of
+loading its own copy whenever the socket answers. Requests arriving within
+a short window are merged into one model call, so concurrent clients share
+batches.
+
+Wire format: each message is a frame of two big-endian uint32 lengths
+(JSON header, binary payload) followed by the header and the payload.
+Embeddings are returned as a float32 payload with the shape in the header.
+
+The default socket lives in a per-user directory (mode 0700) and is
+created with mode 0600; clients only use sockets owned by their own user.
+"""
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Directory (with the user id appended) and name of the socket used when
+# neither an explicit path nor EMBEDDING_SERVICE_SOCKET is given
+DEFAULT_SOCKET_DIR = '/tmp/kcc-embedding'
+DEFAULT_SOCKET_NAME = 'service.sock'
+
+# Texts sent per encode request, so no single request runs into the client timeout
+MAX_REQUEST_TEXTS = 2048
+
+_FRAME_HEADER = struct.Struct('!II')
+
+
+class EmbeddingServiceError(ConnectionError):
+    """The embedding daemon could not be reached or failed a request."""
+
+
+def default_socket_path() -> str:
+    """Socket path from EMBEDDING_SERVICE_SOCKET, or DEFAULT_SOCKET_NAME in this user's DEFAULT_SOCKET_DIR."""
+    return (os.environ.get('EMBEDDING_SERVICE_SOCKET')
+            or os.path.join(f"{DEFAULT_SOCKET_DIR}-{os.getuid()}", DEFAULT_SOCKET_NAME))
+
+
+def _owned_by_user(path: str) -> bool:
+    """Whether path exists and belongs to the current user."""
+    try:
+        return os.stat(path).st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def canonical_model_name(model_name: str) -> str:
+    """Model name without the 'sentence-transformers/' prefix (both load the same model)."""
+    prefix = 'sentence-transformers/'
+    return model_name[len(prefix):] if model_name.startswith(prefix) else model_name
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    """Read exactly n bytes, or raise EOFError if the peer closed first."""
+    chunks = []
+    while n > 0:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not chunk:
+            raise EOFError("Connection closed")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_frame(sock: socket.socket, header: dict, payload: bytes = b''):
+    """Send one frame (JSON header plus binary payload)."""
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_FRAME_HEADER.pack(len(header_bytes), len(payload)) + header_bytes + payload)
+
+
+def recv_frame(sock: socket.socket) -> Tuple[dict, bytes]:
+    """Receive one frame sent with send_frame()."""
+    header_len, payload_len = _FRAME_HEADER.unpack(_recv_exact(sock, _FRAME_HEADER.size))
+    header = json.loads(_recv_exact(sock, header_len).decode('utf-8'))
+    payload = _recv_exact(sock, payload_len) if payload_len else b''
+    return header, payload
+
+
+class EmbeddingClient:
+    """
+    Client of the embedding daemon, holding one connection.
+    
+    Usage:
+        client = EmbeddingClient()
+        if client.available():
+            embeddings = client.encode("paraphrase-multilingual-mpnet-base-v2", texts)
+    """
+    
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 600.0):
+        """
+        Initialize client.
+        
+        Args:
+            socket_path: Daemon socket (None = default_socket_path())
+            timeout: Seconds to wait for a reply
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise EmbeddingServiceError(f"Embedding service not reachable at {self.socket_path}: {e}") from e
+            self._sock = sock
+        return self._sock
+    
+    def request(self, header: dict, payload: bytes = b'') -> Tuple[dict, bytes]:
+        """
+        Send a request and wait for the reply.
+        
+        Raises:
+            EmbeddingServiceError: If the daemon is unreachable or reports an error
+        """
+        with self._lock:
+            sock = self._connect()
+            try:
+                send_frame(sock, header, payload)
+                reply, reply_payload = recv_frame(sock)
+            except (OSError, EOFError) as e:
+                self.close()
+                raise EmbeddingServiceError(f"Embedding service request failed: {e}") from e
+        if 'error' in reply:
+            raise EmbeddingServiceError(f"Embedding service error: {reply['error']}")
+        return reply, reply_payload
+    
+    def ping(self) -> Optional[dict]:
+        """
+        Ask the daemon for its status.
+        
+        Sockets owned by another user are ignored.
+        
+        Returns:
+            Reply with 'device', 'models' and 'stats', or None if no daemon answers
+        """
+        if not _owned_by_user(self.socket_path):
+            return None
+        try:
+            reply, _ = self.request({'op': 'ping'})
+            return reply
+        except EmbeddingServiceError:
+            return None
+    
+    def available(self) -> bool:
+        """Check whether the daemon answers on the socket."""
+        return self.ping() is not None
+    
+    def encode(self, model_name: str, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode texts with a model held by the daemon.
+        
+        Texts are sent MAX_REQUEST_TEXTS per request.
+        
+        Args:
+            model_name: Sentence-transformer model name (loaded by the daemon on first use)
+            texts: Texts to encode
+            batch_size: Model batch size the daemon should use
+        
+        Returns:
+            NxD float32 embedding matrix
+        """
+        texts = list(texts)
+        chunks = []
+        for start in range(0, max(len(texts), 1), MAX_REQUEST_TEXTS):
+            reply, payload = self.request({'op': 'encode', 'model': model_name,
+                                           'texts': texts[start:start + MAX_REQUEST_TEXTS],
+                                           'batch_size': batch_size})
+            chunks.append(np.frombuffer(payload, dtype=np.float32).reshape(reply['shape']))
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    
+    def close(self):
+        """Close the connection (reopened by the next request)."""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+class RemoteModel:
+    """
+    Stand-in for a SentenceTransformer whose encode() runs in the daemon,
+    so EmbeddingGenerator can use either interchangeably.
+    """
+    
+    def __init__(self, client: EmbeddingClient, model_name: str):
+        self.client = client
+        self.model_name = model_name
+    
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True) -> np.ndarray:
+        """Encode texts through the daemon (same signature subset as SentenceTransformer.encode)."""
+        return self.client.encode(self.model_name, texts, batch_size=batch_size)
+
+
+class _EncodeRequest:
+    """One client request waiting for the batching worker."""
+    
+    def __init__(self, model_name: str, texts: List[str], batch_size: int):
+        self.model_name = model_name
+        self.texts = texts
+        self.batch_size = batch_size
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class EmbeddingServer:
+    """
+    Embedding daemon: keeps models warm and batches requests from concurrent clients.
+    
+    Connection threads only parse requests and wait; a single worker thread
+    owns the models. It takes the next request and, when other clients
+    are connected, gathers more arriving within max_wait_ms (up to
+    max_batch_texts texts), then encodes each model's texts in one call.
+    A lone client is served without waiting.
+    
+    Usage:
+        server = EmbeddingServer(use_gpu=True, preload=["paraphrase-multilingual-mpnet-base-v2"])
+        server.serve_forever()
+    """
+    
+    def __init__(self, socket_path: Optional[str] = None, use_gpu: bool = False,
+                 max_batch_texts: int = 4096, max_wait_ms: float = 20.0,
+                 preload: Optional[List[str]] = None):
+        """
+        Initialize server.
+        
+        Args:
+            socket_path: Socket to listen on (None = default_socket_path())
+            use_gpu: Load models on CUDA
+            max_batch_texts: Most texts merged into one model call
+            max_wait_ms: How long the worker waits for more requests to merge
+            preload: Models to load before accepting requests
+        """
+        try:
+            from sentence_transformers import SentenceTransformer  # noqa: F401
+        except ImportError:
+            raise ImportError("sentence-transformers not installed. Run: pip install sentence-transformers")
+        
+        self.socket_path = socket_path or default_socket_path()
+        self.device = 'cuda' if use_gpu else 'cpu'
+        self.max_batch_texts = max_batch_texts
+        self.max_wait = max_wait_ms / 1000.0
+        self.models: Dict[str, object] = {}
+        self.requests = queue.Queue()
+        self.stats = {'requests': 0, 'texts': 0, 'batches': 0}
+        self.connections = 0
+        self._connections_lock = threading.Lock()
+        self._server = None
+        
+        for model_name in preload or []:
+            self._model(model_name)
+    
+    def _model(self, model_name: str):
+        """Load a model on first use and keep it."""
+        name = canonical_model_name(model_name)
+        if name not in self.models:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"Loading model {name} on {self.device}...")
+            self.models[name] = SentenceTransformer(name, device=self.device)
+            logger.info("Model loaded successfully")
+        return self.models[name]
+    
+    def submit(self, model_name: str, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Queue texts for the worker and wait for their embeddings (called by connection threads)."""
+        request = _EncodeRequest(model_name, texts, batch_size)
+        self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+    
+    def _gather(self) -> List[_EncodeRequest]:
+        """
+        Next request plus those arriving within max_wait, up to max_batch_texts texts.
+        
+        Only waits when more requests are queued or other clients are
+        connected; a single client's requests are encoded at once.
+        """
+        batch = [self.requests.get()]
+        n_texts = len(batch[0].texts)
+        if self.requests.empty() and self.connections <= 1:
+            return batch
+        deadline = time.monotonic() + self.max_wait
+        while n_texts < self.max_batch_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            n_texts += len(request.texts)
+        return batch
+    
+    def _work(self):
+        """Worker loop: encode gathered requests, one model call per model."""
+        while True:
+            batch = self._gather()
+            by_model: Dict[str, List[_EncodeRequest]] = {}
+            for request in batch:
+                by_model.setdefault(canonical_model_name(request.model_name), []).append(request)
+            for model_name, requests in by_model.items():
+                try:
+                    texts = [t for request in requests for t in request.texts]
+                    embeddings = self._model(model_name).encode(
+                        texts,
+                        batch_size=max(request.batch_size for request in requests),
+                        show_progress_bar=False,
+                        convert_to_numpy=True
+                    ).astype(np.float32, copy=False)
+                    start = 0
+                    for request in requests:
+                        request.result = embeddings[start:start + len(request.texts)]
+                        start += len(request.texts)
+                    self.stats['batches'] += 1
+                    self.stats['texts'] += len(texts)
+                except Exception as e:
+                    logger.error(f"Encoding with {model_name} failed: {e}")
+                    for request in requests:
+                        request.error = e
+                finally:
+                    for request in requests:
+                        request.done.set()
+    
+    def _handle(self, sock: socket.socket):
+        """Serve one client connection until it closes."""
+        while True:
+            try:
+                header, _ = recv_frame(sock)
+            except (EOFError, OSError):
+                return
+            op = header.get('op')
+            try:
+                if op == 'ping':
+                    send_frame(sock, {'ok': True, 'device': self.device, 'models': sorted(self.models),
+                                      'stats': self.stats})
+                elif op == 'encode':
+                    self.stats['requests'] += 1
+                    embeddings = self.submit(header['model'], header['texts'], header.get('batch_size', 32))
+                    send_frame(sock, {'shape': list(embeddings.shape)}, np.ascontiguousarray(embeddings).tobytes())
+                else:
+                    send_frame(sock, {'error': f"unknown op {op!r}"})
+            except (OSError, EOFError):
+                return
+            except Exception as e:
+                send_frame(sock, {'error': str(e)})
+    
+    def _prepare_socket_dir(self):
+        """Create the socket's directory (mode 0700 for the default one) and check its owner."""
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if directory.startswith(DEFAULT_SOCKET_DIR) and not _owned_by_user(directory):
+            raise RuntimeError(f"Socket directory {directory} belongs to another user")
+    
+    def serve_forever(self):
+        """Listen on the socket and serve until interrupted; the socket file is removed on exit."""
+        self._prepare_socket_dir()
+        if os.path.exists(self.socket_path):
+            if EmbeddingClient(self.socket_path, timeout=5).available():
+                raise RuntimeError(f"An embedding service is already running at {self.socket_path}")
+            os.unlink(self.socket_path)  # stale socket of a daemon that did not shut down cleanly
+        
+        server = self
+        
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with server._connections_lock:
+                    server.connections += 1
+                try:
+                    server._handle(self.request)
+                finally:
+                    with server._connections_lock:
+                        server.connections -= 1
+        
+        threading.Thread(target=self._work, name='embedding-worker', daemon=True).start()
+        # Only the owning user may connect: the socket is created with mode 0600
+        old_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.daemon_threads = True
+        logger.info(f"Embedding service listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            logger.info("Embedding service stopped")
+    
+    def shutdown(self):
+        """Stop serve_forever() (from another thread)."""
+        if self._server is not None:
+            self._server.shutdown()
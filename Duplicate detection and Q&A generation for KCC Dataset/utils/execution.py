@@ -0,0 +1,195 @@
+"""
+Execution settings shared by the pipeline stages.
+
+Holds the `performance` section of the config (chunk size, worker count and
+memory limit) so normalization, fuzzy scoring, embedding and similarity
+search all size their work the same way. With a memory limit, block sizes
+are derived from the memory budget instead of the fixed chunk size.
+"""
+
+import math
+import os
+import re
+from contextlib import nullcontext
+from typing import Optional, Union
+import logging
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+logger = logging.getLogger(__name__)
+
+# Share of the memory budget a single block may use; the rest is left for
+# the data frames, embeddings and model already held by the pipeline
+BLOCK_MEMORY_FRACTION = 0.25
+
+_SIZE_UNITS = {'': 1, 'B': 1,
+               'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40,
+               'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30, 'TB': 1 << 40}
+
+
+def parse_memory_size(value: Union[str, int, float, None]) -> Optional[int]:
+    """
+    Parse a memory size such as "16GB", "16G", "512 MB" or a plain byte count.
+    
+    Args:
+        value: Size string, number of bytes, or None
+    
+    Returns:
+        Size in bytes, or None if value is None
+    
+    Raises:
+        ValueError: If value is not a recognised size
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r'\s*(\d+(?:\.\d*)?|\.\d+)\s*([KMGT]?B?)\s*', str(value).upper())
+    if not match:
+        raise ValueError(f"Invalid memory size: {value!r} (expected e.g. '16GB', '512M' or 'auto')")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def available_memory() -> Optional[int]:
+    """
+    Memory currently available to the process, in bytes.
+    
+    Reads MemAvailable from /proc/meminfo (Linux) and falls back to the
+    physical memory size where sysconf reports it.
+    
+    Returns:
+        Bytes available, or None if it cannot be determined
+    """
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class ExecutionSettings:
+    """
+    Chunk size, worker count and memory budget for the pipeline stages.
+    
+    Usage:
+        settings = ExecutionSettings.from_config(config)
+        normalize_questions(values, n_jobs=settings.n_jobs, chunk_size=settings.chunk_size)
+        rows = settings.block_rows(row_bytes=n * 4)  # rows of an n-wide float32 block
+    """
+    
+    def __init__(self, chunk_size: int = 1000, n_jobs: int = 1,
+                 memory_limit: Union[str, int, None] = None):
+        """
+        Initialize execution settings.
+        
+        Args:
+            chunk_size: Items per task or block when no memory limit is set
+            n_jobs: Parallel workers (1 = sequential, -1 = all cores)
+            memory_limit: Memory budget: a size such as "16GB", "auto" for the
+                currently available RAM, or None to use chunk_size as is
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if n_jobs == 0 or n_jobs < -1:
+            raise ValueError(f"n_jobs must be -1 or a positive number, got {n_jobs}")
+        self.chunk_size = int(chunk_size)
+        self.n_jobs = int(n_jobs)
+        # Process pool shared by several runs in one process (see deduplicate_many);
+        # stages use it instead of starting their own
+        self.executor = None
+        if isinstance(memory_limit, str) and memory_limit.strip().lower() == 'auto':
+            self.memory_limit = available_memory()
+            if self.memory_limit is None:
+                logger.warning("Could not determine available memory, using chunk_size for block sizes")
+        else:
+            self.memory_limit = parse_memory_size(memory_limit)
+    
+    @classmethod
+    def from_config(cls, config: dict) -> "ExecutionSettings":
+        """
+        Build settings from the `performance` section of a config.
+        
+        Args:
+            config: Full configuration dictionary
+        
+        Returns:
+            ExecutionSettings instance
+        """
+        performance = config.get('performance') or {}
+        return cls(
+            chunk_size=performance.get('chunk_size', 1000),
+            n_jobs=performance.get('n_jobs', 1),
+            memory_limit=performance.get('memory_limit')
+        )
+    
+    @property
+    def workers(self) -> int:
+        """Number of workers n_jobs resolves to on this machine."""
+        return (os.cpu_count() or 1) if self.n_jobs < 0 else self.n_jobs
+    
+    @property
+    def max_workers(self) -> Optional[int]:
+        """max_workers argument for concurrent.futures executors (None = all cores)."""
+        return None if self.n_jobs < 0 else self.n_jobs
+    
+    def block_rows(self, row_bytes: int, parallel: bool = True) -> int:
+        """
+        Rows per block for work whose memory grows by row_bytes per row.
+        
+        Without a memory limit this is chunk_size. With one, a block may use
+        a quarter of the budget, shared by all workers when parallel.
+        
+        Args:
+            row_bytes: Bytes one row of the block needs (e.g. 4 * n for an
+                n-wide float32 similarity row)
+            parallel: Whether every worker holds a block at the same time
+        
+        Returns:
+            Number of rows (at least 1)
+        """
+        if self.memory_limit is None:
+            return self.chunk_size
+        budget = self.memory_limit * BLOCK_MEMORY_FRACTION
+        if parallel:
+            budget /= self.workers
+        return max(1, int(budget // max(1, row_bytes)))
+    
+    def tile_rows(self, cell_bytes: int, parallel: bool = True) -> int:
+        """
+        Side of square tiles (e.g. fuzzy score tiles) whose cells use cell_bytes each.
+        
+        Without a memory limit this is chunk_size. With one, a tile may use
+        a quarter of the budget, shared by all workers when parallel.
+        
+        Args:
+            cell_bytes: Bytes one cell of the tile needs
+            parallel: Whether every worker holds a tile at the same time
+        
+        Returns:
+            Number of rows (and columns) per tile (at least 1)
+        """
+        if self.memory_limit is None:
+            return self.chunk_size
+        return max(1, math.isqrt(self.block_rows(row_bytes=cell_bytes, parallel=parallel)))
+    
+    def limit_threads(self):
+        """
+        Context manager capping BLAS/OpenMP threads (NumPy, scikit-learn,
+        PyTorch on CPU) at n_jobs. Does nothing for n_jobs=-1.
+        """
+        if self.n_jobs < 0 or threadpool_limits is None:
+            return nullcontext()
+        return threadpool_limits(limits=self.n_jobs)
+    
+    def __repr__(self) -> str:
+        limit = f"{self.memory_limit / (1 << 30):.1f}GB" if self.memory_limit else None
+        return f"ExecutionSettings(chunk_size={self.chunk_size}, n_jobs={self.n_jobs}, memory_limit={limit})"
@@ -0,0 +1,356 @@
+"""
+Table I/O helpers shared by the pipeline scripts.
+
+Reads and writes CSV, Parquet and Excel by file extension. When pyarrow is
+installed, CSVs are parsed with its multithreaded engine and Parquet files
+are written with zstd compression. A `usecols` projection materializes only
+the columns a step needs. Excel workbooks are converted to Parquet once and
+later loads read the cached copy until the workbook changes. Excel outputs
+are streamed row by row instead of building the whole workbook in memory.
+iter_table_chunks() and TableWriter read and write CSV and Parquet a chunk
+at a time.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional
+import logging
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+logger = logging.getLogger(__name__)
+
+CSV_SUFFIXES = ('.csv',)
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+EXCEL_SUFFIXES = ('.xlsx', '.xls')
+
+# Default location of Parquet copies of Excel inputs
+EXCEL_CACHE_DIR = 'Data/.excel_cache'
+
+# Rows per worksheet supported by .xlsx (including the header)
+EXCEL_MAX_ROWS = 1048576
+
+
+def _require_pyarrow(filepath: str):
+    if not HAS_PYARROW:
+        raise ImportError(f"Reading/writing {filepath} requires pyarrow (pip install pyarrow)")
+
+
+def excel_cache_path(filepath: str, cache_dir: str) -> Path:
+    """
+    Parquet cache file for an Excel workbook.
+    
+    The name is keyed by the workbook's absolute path, modification time and
+    size, so editing or replacing the workbook invalidates the cached copy.
+    
+    Args:
+        filepath: Excel file path
+        cache_dir: Cache directory
+    
+    Returns:
+        Path of the cached Parquet file
+    """
+    stat = os.stat(filepath)
+    path_key = hashlib.sha1(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:12]
+    return Path(cache_dir) / f"{Path(filepath).stem}-{path_key}-{stat.st_mtime_ns}-{stat.st_size}.parquet"
+
+
+def _read_excel_cached(filepath: str, usecols: Optional[List[str]], cache_dir: str) -> pd.DataFrame:
+    """Read an Excel file through its Parquet cache, converting it on a miss."""
+    cache_file = excel_cache_path(filepath, cache_dir)
+    if cache_file.exists():
+        logger.info(f"Reading cached Parquet copy {cache_file}")
+        return read_table(str(cache_file), usecols=usecols)
+    
+    # The whole sheet is cached so any later column projection can be served
+    df = pd.read_excel(filepath)
+    
+    # Parquet columns need a single type; store cells of mixed-type columns as text
+    mixed = [c for c in df.columns if df[c].dtype == object
+             and pd.api.types.infer_dtype(df[c], skipna=True).startswith('mixed')]
+    if mixed:
+        logger.info(f"Storing mixed-type columns as text: {mixed}")
+        for column in mixed:
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix('.parquet.tmp')
+    try:
+        df.to_parquet(tmp_file, index=False, compression='zstd')
+    except (pyarrow.ArrowException, ValueError) as e:
+        logger.warning(f"Could not cache {filepath} as Parquet ({e}), reading it uncached")
+        tmp_file.unlink(missing_ok=True)
+    else:
+        # Drop copies of earlier versions of the same workbook
+        prefix = cache_file.name.rsplit('-', 2)[0] + '-'
+        for stale in cache_file.parent.iterdir():
+            if stale.name.startswith(prefix) and stale.suffix == '.parquet':
+                stale.unlink()
+        os.replace(tmp_file, cache_file)
+        logger.info(f"Cached {filepath} as {cache_file}")
+    
+    if usecols is None:
+        return df
+    missing = [c for c in usecols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Column not found in {filepath}: {missing}")
+    return df[usecols]
+
+
+def read_table(filepath: str, usecols: Optional[List[str]] = None,
+               encoding: str = 'utf-8', excel_cache_dir: Optional[str] = EXCEL_CACHE_DIR) -> pd.DataFrame:
+    """
+    Load a CSV, Parquet or Excel file.
+    
+    Args:
+        filepath: Input file path
+        usecols: Only load these columns (None = all)
+        encoding: Text encoding for CSV files
+        excel_cache_dir: Directory for Parquet copies of Excel files (None = no cache)
+    
+    Returns:
+        DataFrame
+    """
+    suffix = Path(filepath).suffix.lower()
+    usecols = list(usecols) if usecols is not None else None
+    
+    if suffix in CSV_SUFFIXES:
+        if HAS_PYARROW:
+            try:
+                return pd.read_csv(filepath, usecols=usecols, encoding=encoding, engine='pyarrow')
+            except KeyError as e:
+                raise ValueError(f"Column not found in {filepath}: {e}") from e
+            except pd.errors.ParserError as e:
+                # The pyarrow parser is stricter than the C parser; retry with the latter
+                logger.warning(f"pyarrow CSV engine failed on {filepath} ({e}), using the default engine")
+        return pd.read_csv(filepath, usecols=usecols, encoding=encoding)
+    
+    if suffix in PARQUET_SUFFIXES:
+        _require_pyarrow(filepath)
+        try:
+            return pd.read_parquet(filepath, columns=usecols)
+        except pyarrow.ArrowInvalid as e:
+            raise ValueError(f"Column not found in {filepath}: {e}") from e
+    
+    if suffix in EXCEL_SUFFIXES:
+        if excel_cache_dir and HAS_PYARROW:
+            return _read_excel_cached(filepath, usecols, excel_cache_dir)
+        return pd.read_excel(filepath, usecols=usecols)
+    
+    raise ValueError(f"Unsupported file format: {suffix}")
+
+
+def write_table(df: pd.DataFrame, filepath: str, compression: str = 'zstd'):
+    """
+    Save a DataFrame as CSV, Parquet or Excel (by extension).
+    
+    Args:
+        df: DataFrame to save
+        filepath: Output file path (parent directories are created)
+        compression: Parquet compression codec
+    """
+    suffix = Path(filepath).suffix.lower()
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    
+    if suffix in CSV_SUFFIXES:
+        df.to_csv(filepath, index=False, encoding='utf-8')
+    elif suffix in PARQUET_SUFFIXES:
+        _require_pyarrow(filepath)
+        df.to_parquet(filepath, index=False, compression=compression)
+    elif suffix == '.xlsx':
+        write_excel(df, filepath)
+    elif suffix in EXCEL_SUFFIXES:
+        df.to_excel(filepath, index=False)
+    else:
+        raise ValueError(f"Unsupported file format: {suffix}")
+
+
+def iter_table_chunks(filepath: str, chunk_rows: int, usecols: Optional[List[str]] = None,
+                      encoding: str = 'utf-8',
+                      excel_cache_dir: Optional[str] = EXCEL_CACHE_DIR) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV, Parquet or Excel file chunk_rows rows at a time.
+    
+    CSV fields are read as text (missing fields as ""), so every chunk has
+    the same column types. Excel sheets are read whole (they are capped at
+    about 1M rows) and split into chunks.
+    
+    Args:
+        filepath: Input file path
+        chunk_rows: Rows per chunk
+        usecols: Only read these columns (None = all)
+        encoding: Text encoding for CSV files
+        excel_cache_dir: Directory for Parquet copies of Excel files (None = no cache)
+    
+    Yields:
+        DataFrames with a RangeIndex continuing across chunks (input row positions)
+    """
+    suffix = Path(filepath).suffix.lower()
+    usecols = list(usecols) if usecols is not None else None
+    
+    if suffix in CSV_SUFFIXES:
+        try:
+            chunks = pd.read_csv(filepath, usecols=usecols, encoding=encoding, chunksize=chunk_rows,
+                                 dtype=str, keep_default_na=False)
+        except ValueError as e:
+            raise ValueError(f"Column not found in {filepath}: {e}") from e
+    elif suffix in PARQUET_SUFFIXES:
+        _require_pyarrow(filepath)
+        parquet_file = pq.ParquetFile(filepath)
+        if usecols is not None:
+            missing = [c for c in usecols if c not in parquet_file.schema_arrow.names]
+            if missing:
+                raise ValueError(f"Column not found in {filepath}: {missing}")
+        chunks = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=usecols))
+    else:
+        df = read_table(filepath, usecols=usecols, encoding=encoding, excel_cache_dir=excel_cache_dir)
+        chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    
+    offset = 0
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+class TableWriter:
+    """
+    Write a CSV or Parquet file a chunk at a time.
+    
+    Excel outputs cannot be appended to, so their chunks are collected and
+    written on close().
+    
+    Usage:
+        with TableWriter("Data/filtered/out.parquet") as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+    
+    def __init__(self, filepath: str, compression: str = 'zstd'):
+        """
+        Initialize writer (parent directories are created, an existing file is replaced).
+        
+        Args:
+            filepath: Output file path
+            compression: Parquet compression codec
+        """
+        self.filepath = filepath
+        self.suffix = Path(filepath).suffix.lower()
+        if self.suffix not in CSV_SUFFIXES + PARQUET_SUFFIXES + EXCEL_SUFFIXES:
+            raise ValueError(f"Unsupported file format: {self.suffix}")
+        if self.suffix in PARQUET_SUFFIXES:
+            _require_pyarrow(filepath)
+        self.compression = compression
+        self.rows = 0
+        self._started = False
+        self._parquet_writer = None
+        self._frames = []
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    
+    def write(self, df: pd.DataFrame):
+        """Append rows (the first chunk fixes the columns)."""
+        if self.suffix in CSV_SUFFIXES:
+            df.to_csv(self.filepath, mode='a' if self._started else 'w', header=not self._started,
+                      index=False, encoding='utf-8')
+        elif self.suffix in PARQUET_SUFFIXES:
+            table = pyarrow.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.filepath, table.schema, compression=self.compression)
+            else:
+                table = table.cast(self._parquet_writer.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            self._frames.append(df)
+        self._started = True
+        self.rows += len(df)
+    
+    def close(self):
+        """Finish the file."""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if self._frames:
+            write_table(pd.concat(self._frames, ignore_index=True), self.filepath)
+            self._frames = []
+    
+    def __enter__(self) -> "TableWriter":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _iter_rows(df: pd.DataFrame, chunk_size: int):
+    """Yield rows as tuples of Python values (missing values as None), a chunk at a time."""
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def write_excel(df: pd.DataFrame, filepath: str, sheet_name: str = 'Sheet1',
+                chunk_size: int = 10000):
+    """
+    Stream a DataFrame to an .xlsx file with bounded memory.
+    
+    Uses xlsxwriter in constant_memory mode (each row is flushed to disk as
+    soon as the next one starts), or openpyxl's write-only mode when
+    xlsxwriter is not installed. Either way only chunk_size rows are
+    converted to Python objects at a time.
+    
+    Args:
+        df: DataFrame to save
+        filepath: Output .xlsx path
+        sheet_name: Worksheet name
+        chunk_size: Rows converted per batch
+    """
+    if len(df) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(df)} rows exceed the Excel sheet limit of {EXCEL_MAX_ROWS - 1}; "
+                         f"write .parquet or .csv instead")
+    
+    header = [str(c) for c in df.columns]
+    
+    if HAS_XLSXWRITER:
+        workbook = xlsxwriter.Workbook(filepath, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+            'remove_timezone': True,
+        })
+        worksheet = workbook.add_worksheet(sheet_name)
+        
+        # Column formats apply to every cell written without its own format
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+        for col, dtype in enumerate(df.dtypes):
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                worksheet.set_column(col, col, 19, date_format)
+        
+        worksheet.write_row(0, 0, header, workbook.add_format({'bold': True}))
+        for row, values in enumerate(_iter_rows(df, chunk_size), start=1):
+            worksheet.write_row(row, 0, values)
+        workbook.close()
+        return
+    
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append(header)
+    for values in _iter_rows(df, chunk_size):
+        worksheet.append(values)
+    workbook.save(filepath)
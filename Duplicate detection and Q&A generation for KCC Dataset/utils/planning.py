@@ -0,0 +1,439 @@
+"""
+Cost planning for deduplication runs.
+
+A uniform sample of the input is normalized, embedded and matched to
+estimate how many questions reach each stage and what each semantic search
+strategy costs on the full input: all pairs, metadata blocks or an IVF
+index. The recall of blocking and IVF is measured on the sample against an
+all-pairs search. The cheapest strategy that reaches the target recall is
+chosen. Its settings come back as a config overlay that a later run can
+apply.
+"""
+
+import math
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import process
+
+from .execution import ExecutionSettings, available_memory
+from .io import CSV_SUFFIXES, PARQUET_SUFFIXES, EXCEL_CACHE_DIR, HAS_PYARROW, read_table
+from .similarity import (
+    FUZZY_SCORERS, fuzzy_similarity, normalize_embeddings,
+    find_similar_pairs_blockwise, find_similar_pairs_ivf, ivf_list_count
+)
+from .text_processing import normalize_questions
+
+if HAS_PYARROW:
+    import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Share of IVF lists probed per query, tried on the sample from cheapest up
+IVF_PROBE_FRACTIONS = [1 / 32, 1 / 16, 1 / 8, 1 / 4, 1 / 2]
+
+# Dimension assumed for search costs when no embeddings could be computed
+DEFAULT_EMBEDDING_DIM = 768
+
+
+def sample_table(filepath: str, sample_size: int, usecols: Optional[List[str]] = None,
+                 seed: int = 0, chunk_rows: int = 100000, encoding: str = 'utf-8',
+                 excel_cache_dir: Optional[str] = EXCEL_CACHE_DIR) -> Tuple[pd.DataFrame, int]:
+    """
+    Draw a uniform random sample of rows from a table without loading it whole.
+    
+    The input is read in chunks; every row gets a random key and the
+    sample_size rows with the smallest keys are kept. Excel sheets are read
+    at once (they are capped at ~1M rows).
+    
+    Args:
+        filepath: Input file path
+        sample_size: Rows to sample
+        usecols: Only read these columns (None = all)
+        seed: Random seed
+        chunk_rows: Rows read per chunk
+        encoding: Text encoding for CSV files
+        excel_cache_dir: Directory for Parquet copies of Excel files (None = no cache)
+    
+    Returns:
+        Tuple of (sampled rows in input order, total number of input rows)
+    """
+    suffix = Path(filepath).suffix.lower()
+    usecols = list(usecols) if usecols is not None else None
+    rng = np.random.default_rng(seed)
+    
+    if suffix in PARQUET_SUFFIXES and HAS_PYARROW:
+        parquet_file = pq.ParquetFile(filepath)
+        chunks = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=usecols))
+    elif suffix in CSV_SUFFIXES:
+        chunks = pd.read_csv(filepath, usecols=usecols, encoding=encoding, chunksize=chunk_rows)
+    else:
+        chunks = [read_table(filepath, usecols=usecols, encoding=encoding, excel_cache_dir=excel_cache_dir)]
+    
+    sample, sample_keys, total = None, np.empty(0), 0
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        chunk.index = pd.RangeIndex(total, total + len(chunk))
+        total += len(chunk)
+        keys = np.concatenate([sample_keys, rng.random(len(chunk))])
+        merged = chunk if sample is None else pd.concat([sample, chunk])
+        keep = np.sort(np.argsort(keys, kind='stable')[:sample_size])
+        sample, sample_keys = merged.iloc[keep], keys[keep]
+    
+    if sample is None:
+        raise ValueError(f"No rows in {filepath}")
+    return sample.reset_index(drop=True), total
+
+
+def estimate_distinct(keys: np.ndarray, total: int) -> int:
+    """
+    Estimate the number of distinct values among total rows from a uniform sample.
+    
+    Uses the GEE estimator (Charikar et al., 2000): values seen once in the
+    sample are scaled by sqrt(total / sample size), values seen more often
+    are counted once.
+    
+    Args:
+        keys: Sampled values (e.g. normalized-text hashes)
+        total: Number of rows the sample was drawn from
+    
+    Returns:
+        Estimated distinct count
+    """
+    n = len(keys)
+    if n == 0:
+        return 0
+    _, counts = np.unique(keys, return_counts=True)
+    if n >= total:
+        return len(counts)
+    singletons = int((counts == 1).sum())
+    estimate = math.sqrt(total / n) * singletons + int((counts > 1).sum())
+    return int(min(total, round(estimate)))
+
+
+def scaled_block_pairs(block_sizes: np.ndarray, n: int, budget: Optional[int] = None) -> int:
+    """
+    Pairs compared within blocks when n rows follow the sample's block shares.
+    
+    Args:
+        block_sizes: Rows per block in the sample
+        n: Rows on the full input
+        budget: Optional per-block comparison cap
+    
+    Returns:
+        Estimated number of within-block pairs
+    """
+    sizes = np.asarray(block_sizes, dtype=np.float64)
+    if sizes.sum() == 0:
+        return 0
+    rows = sizes / sizes.sum() * n
+    pairs = rows * np.maximum(rows - 1, 0) / 2
+    if budget is not None:
+        pairs = np.minimum(pairs, budget)
+    return int(pairs.sum())
+
+
+def pair_recall(found: list, reference: list) -> Optional[float]:
+    """
+    Share of reference pairs that were found.
+    
+    Returns:
+        Recall in [0, 1], or None if there are no reference pairs
+    """
+    if not reference:
+        return None
+    reference_keys = {(i, j) for i, j, _ in reference}
+    found_keys = {(i, j) for i, j, _ in found}
+    return len(reference_keys & found_keys) / len(reference_keys)
+
+
+def _rate(units: float, fn: Callable[[], object]) -> float:
+    """Units processed per second by fn."""
+    start = time.perf_counter()
+    fn()
+    return units / max(time.perf_counter() - start, 1e-9)
+
+
+def measure_fuzzy_rate(texts: List[str], algorithm: str, n_jobs: int = 1,
+                       max_texts: int = 500) -> Tuple[float, float]:
+    """
+    Fuzzy comparisons per second, for all-pairs (cdist) and sampled matching.
+    
+    Args:
+        texts: Cleaned sample texts
+        algorithm: Fuzzy matching algorithm
+        n_jobs: Threads for cdist
+        max_texts: Texts scored against each other for the measurement
+    
+    Returns:
+        Tuple of (all-pairs rate, sampled rate) in pairs per second
+    """
+    texts = texts[:max_texts]
+    if len(texts) < 2:
+        return 0.0, 0.0
+    scorer = FUZZY_SCORERS[algorithm]
+    all_rate = _rate(len(texts) ** 2, lambda: process.cdist(texts, texts, scorer=scorer, workers=n_jobs))
+    m = len(texts)
+    pairs = [(texts[k % m], texts[(k * 7 + 1) % m]) for k in range(min(2000, m * 4))]
+    sampled_rate = _rate(len(pairs), lambda: [fuzzy_similarity(a, b, algorithm) for a, b in pairs])
+    return all_rate, sampled_rate
+
+
+def measure_similarity_rate(dim: int, rows: int = 1024, cols: int = 8192) -> float:
+    """Cosine similarities scored per second by a float32 matrix product (with threshold mask)."""
+    rng = np.random.default_rng(0)
+    a = normalize_embeddings(rng.standard_normal((rows, dim), dtype=np.float32))
+    b = normalize_embeddings(rng.standard_normal((cols, dim), dtype=np.float32))
+    a[:8] @ b.T  # warm up BLAS
+    return _rate(rows * cols, lambda: (a @ b.T) >= 0.9)
+
+
+def _strategy(name: str, description: str, recall: Optional[float], fuzzy_comparisons: int,
+              semantic_comparisons: int, memory_bytes: float, rates: dict, n_embed: int,
+              config: dict) -> dict:
+    """Cost record of one strategy (times in seconds from the measured rates)."""
+    embedding_seconds = n_embed / rates['embeddings_per_second'] if rates.get('embeddings_per_second') else None
+    fuzzy_rate = rates.get('fuzzy_pairs_per_second')
+    fuzzy_seconds = fuzzy_comparisons / fuzzy_rate if fuzzy_rate else 0.0
+    search_seconds = semantic_comparisons / rates['similarity_pairs_per_second']
+    return {
+        'name': name,
+        'description': description,
+        'recall': None if recall is None else round(float(recall), 4),
+        'fuzzy_comparisons': int(fuzzy_comparisons),
+        'semantic_comparisons': int(semantic_comparisons),
+        'embedding_seconds': None if embedding_seconds is None else round(embedding_seconds, 3),
+        'fuzzy_seconds': round(fuzzy_seconds, 3),
+        'search_seconds': round(search_seconds, 3),
+        'total_seconds': round((embedding_seconds or 0.0) + fuzzy_seconds + search_seconds, 3),
+        'memory_mb': round(memory_bytes / (1 << 20), 1),
+        'config': config,
+    }
+
+
+def plan_run(sample: pd.DataFrame, total_rows: int, question_column: str, config: dict,
+             encode: Optional[Callable[[List[str]], np.ndarray]] = None,
+             blocking_keys: Optional[List[str]] = None, target_recall: float = 0.95,
+             execution: Optional[ExecutionSettings] = None) -> dict:
+    """
+    Estimate the cost of each search strategy and choose the cheapest one.
+    
+    Strategies:
+        all_pairs: every pair of unique questions is compared (recall 1)
+        blocked:   only rows agreeing on blocking_keys are compared
+        ivf:       semantic search through an IVF index, probing the
+                   smallest share of lists that reaches target_recall
+    
+    Semantic comparison counts assume no rows are removed by the fuzzy
+    stage, so they are upper bounds.
+    
+    Args:
+        sample: Uniform sample of input rows (see sample_table)
+        total_rows: Rows in the full input
+        question_column: Name of column containing questions
+        config: Full configuration dictionary
+        encode: Embeds a list of texts (None = semantic costs without
+            embedding time and with unknown recall)
+        blocking_keys: Metadata columns to evaluate blocking on
+        target_recall: Minimum share of the all-pairs semantic pairs a strategy must find
+        execution: Chunk size, workers and memory limit of the planned run
+    
+    Returns:
+        Plan dictionary (plain Python types, safe to dump as YAML)
+    """
+    execution = execution or ExecutionSettings.from_config(config)
+    dedup_config = config['deduplication']
+    blocking_keys = list(blocking_keys or [])
+    warnings = []
+    
+    # Rows surviving validation and exact deduplication
+    texts = normalize_questions(sample[question_column])
+    valid = texts['valid'].to_numpy()
+    s = len(sample)
+    n_valid = int(round(total_rows * valid.sum() / max(s, 1)))
+    hashes = texts['hash'].to_numpy()[valid]
+    if dedup_config['exact']['enabled']:
+        n_unique = estimate_distinct(hashes, n_valid)
+        _, first = np.unique(hashes, return_index=True)
+        positions = np.flatnonzero(valid)[np.sort(first)]
+    else:
+        n_unique = n_valid
+        positions = np.flatnonzero(valid)
+    questions = texts['cleaned'].to_numpy()[positions].tolist()
+    
+    block_sizes = None
+    block_codes = None
+    if blocking_keys:
+        block_codes = sample.iloc[positions].groupby(blocking_keys, dropna=False, sort=False).ngroup().to_numpy()
+        block_sizes = np.bincount(block_codes)
+    
+    # Throughputs measured on this machine
+    rates = {}
+    fuzzy_config = dedup_config['fuzzy']
+    if fuzzy_config['enabled']:
+        rates['fuzzy_pairs_per_second'], sampled_rate = measure_fuzzy_rate(
+            questions, fuzzy_config['algorithm'], execution.n_jobs)
+    
+    semantic_config = dedup_config['semantic']
+    threshold = semantic_config['similarity_threshold']
+    embeddings = None
+    if semantic_config['enabled'] and encode is not None and len(questions) > 1:
+        with execution.limit_threads():
+            start = time.perf_counter()
+            embeddings = normalize_embeddings(encode(questions))
+            rates['embeddings_per_second'] = len(questions) / max(time.perf_counter() - start, 1e-9)
+    elif semantic_config['enabled']:
+        warnings.append("Embedding model unavailable: semantic recall and embedding time not estimated")
+    dim = embeddings.shape[1] if embeddings is not None else DEFAULT_EMBEDDING_DIM
+    with execution.limit_threads():
+        rates['similarity_pairs_per_second'] = measure_similarity_rate(dim)
+    
+    # Reference: semantic pairs of the sample under an all-pairs search
+    reference = None
+    if embeddings is not None:
+        reference = find_similar_pairs_blockwise(embeddings, threshold, block_rows=execution.chunk_size)
+    
+    all_pairs = n_unique * (n_unique - 1) // 2
+    n_semantic = n_unique if semantic_config['enabled'] else 0
+    vectors_bytes = n_semantic * dim * 4
+    
+    def fuzzy_comparisons(block_sizes: Optional[np.ndarray]) -> int:
+        """Fuzzy stage comparisons, following the stage's sampling rule."""
+        if not fuzzy_config['enabled']:
+            return 0
+        budget = fuzzy_config.get('max_comparisons', 100000) if fuzzy_config.get('use_sampling', True) else None
+        if block_sizes is not None:
+            return scaled_block_pairs(block_sizes, n_unique, budget)
+        return all_pairs if budget is None else min(all_pairs, budget)
+    
+    def fuzzy_rate_for(comparisons: int, full: int) -> dict:
+        """Rates with the fuzzy rate of the path the stage takes (cdist, or sampled pairs)."""
+        if fuzzy_config['enabled'] and comparisons < full:
+            return {**rates, 'fuzzy_pairs_per_second': sampled_rate}
+        return rates
+    
+    strategies = []
+    
+    # All pairs
+    comparisons = fuzzy_comparisons(None)
+    block_rows = execution.block_rows(row_bytes=8 * n_semantic, parallel=False)
+    strategies.append(_strategy(
+        'all_pairs', 'compare every pair of unique questions', 1.0, comparisons,
+        all_pairs if semantic_config['enabled'] else 0,
+        vectors_bytes + min(block_rows, n_semantic) * n_semantic * 8,
+        fuzzy_rate_for(comparisons, all_pairs), n_semantic,
+        {'deduplication': {'blocking': {'keys': []}, 'semantic': {'search': 'exact'}}}))
+    
+    # Metadata blocks
+    if block_sizes is not None:
+        recall = None
+        if reference is not None:
+            recall = pair_recall([p for p in reference if block_codes[p[0]] == block_codes[p[1]]], reference)
+        largest = int(round(block_sizes.max() / block_sizes.sum() * n_unique))
+        within = scaled_block_pairs(block_sizes, n_unique)
+        comparisons = fuzzy_comparisons(block_sizes)
+        block_rows = execution.block_rows(row_bytes=8 * largest)
+        strategies.append(_strategy(
+            'blocked', f"compare rows within blocks of {', '.join(blocking_keys)} "
+                       f"({len(block_sizes)} in the sample)",
+            recall, comparisons, within if semantic_config['enabled'] else 0,
+            vectors_bytes + min(block_rows, largest) * largest * 8 * execution.workers,
+            fuzzy_rate_for(comparisons, within), n_semantic,
+            {'deduplication': {'blocking': {'keys': blocking_keys}, 'semantic': {'search': 'exact'}}}))
+    
+    # IVF index (single embedding space only)
+    if semantic_config['enabled'] and not semantic_config.get('english_model') and n_unique > 1:
+        fraction, recall = IVF_PROBE_FRACTIONS[-1], None
+        if reference:
+            sample_lists = ivf_list_count(len(embeddings))
+            for fraction in IVF_PROBE_FRACTIONS:
+                found, _ = find_similar_pairs_ivf(embeddings, threshold, n_lists=sample_lists,
+                                                  n_probe=max(1, math.ceil(fraction * sample_lists)),
+                                                  block_rows=execution.chunk_size)
+                recall = pair_recall(found, reference)
+                if recall >= target_recall:
+                    break
+        n_lists = ivf_list_count(n_unique)
+        n_probe = max(1, math.ceil(fraction * n_lists))
+        # Pairs sharing a probed list, plus k-means training and list assignment
+        searched = int(all_pairs * n_probe / n_lists) + 11 * n_unique * n_lists
+        comparisons = fuzzy_comparisons(None)
+        strategies.append(_strategy(
+            'ivf', f"IVF index with {n_lists} lists, {n_probe} probed per question",
+            recall, comparisons, searched,
+            2 * vectors_bytes + execution.chunk_size * math.ceil(n_unique / n_lists) * 8,
+            fuzzy_rate_for(comparisons, all_pairs), n_semantic,
+            {'deduplication': {'blocking': {'keys': []}, 'semantic': {
+                'search': 'ivf', 'ann': {'n_lists': n_lists, 'n_probe': n_probe}}}}))
+    
+    # Cheapest strategy that reaches the target recall (all pairs always does)
+    eligible = [st for st in strategies if st['recall'] is not None and st['recall'] >= target_recall]
+    chosen = min(eligible, key=lambda st: st['total_seconds'])
+    
+    memory_budget = execution.memory_limit or available_memory()
+    if memory_budget and chosen['memory_mb'] * (1 << 20) > memory_budget:
+        shards = math.ceil(chosen['memory_mb'] * (1 << 20) / memory_budget)
+        warnings.append(f"Estimated memory {chosen['memory_mb']:.0f}MB exceeds the "
+                        f"{memory_budget / (1 << 20):.0f}MB available; consider --shards {max(2, shards)}")
+    if reference is not None and len(reference) < 20:
+        warnings.append(f"Only {len(reference)} semantic pairs in the sample; recall estimates are rough "
+                        f"(raise planning.sample_size)")
+    
+    return {
+        'input': {'rows': int(total_rows), 'sampled_rows': int(s)},
+        'estimates': {
+            'valid_rows': n_valid,
+            'unique_questions': int(n_unique),
+            'exact_duplicates': int(n_valid - n_unique),
+            'sample_semantic_pairs': None if reference is None else len(reference),
+            'blocks_in_sample': None if block_sizes is None else int(len(block_sizes)),
+        },
+        'rates': {k: round(float(v), 1) for k, v in rates.items()},
+        'target_recall': float(target_recall),
+        'strategies': [{k: v for k, v in st.items() if k != 'config'} for st in strategies],
+        'chosen': chosen['name'],
+        'config': chosen['config'],
+        'warnings': warnings,
+    }
+
+
+def format_plan(plan: dict) -> str:
+    """
+    Render a plan as a text table.
+    
+    Args:
+        plan: Plan from plan_run()
+    
+    Returns:
+        Multi-line string
+    """
+    estimates = plan['estimates']
+    lines = [
+        "=" * 70,
+        "DEDUPLICATION PLAN",
+        "=" * 70,
+        f"Input rows:              {plan['input']['rows']:,} (sampled {plan['input']['sampled_rows']:,})",
+        f"Valid rows (est.):       {estimates['valid_rows']:,}",
+        f"Unique questions (est.): {estimates['unique_questions']:,}",
+    ]
+    if estimates['sample_semantic_pairs'] is not None:
+        lines.append(f"Semantic pairs in sample: {estimates['sample_semantic_pairs']:,}")
+    lines += ["", f"{'Strategy':<10} {'Recall':>7} {'Fuzzy cmp':>14} {'Semantic cmp':>16} "
+                  f"{'Embed s':>9} {'Fuzzy s':>9} {'Search s':>9} {'Total s':>9} {'Memory MB':>10}"]
+    for st in plan['strategies']:
+        recall = f"{st['recall']:.3f}" if st['recall'] is not None else "n/a"
+        embed = f"{st['embedding_seconds']:.1f}" if st['embedding_seconds'] is not None else "n/a"
+        marker = " *" if st['name'] == plan['chosen'] else ""
+        lines.append(f"{st['name']:<10} {recall:>7} {st['fuzzy_comparisons']:>14,} {st['semantic_comparisons']:>16,} "
+                     f"{embed:>9} {st['fuzzy_seconds']:>9.1f} {st['search_seconds']:>9.1f} "
+                     f"{st['total_seconds']:>9.1f} {st['memory_mb']:>10.1f}{marker}")
+    chosen = next(st for st in plan['strategies'] if st['name'] == plan['chosen'])
+    lines += ["", f"Chosen (target recall {plan['target_recall']:.2f}): {chosen['name']} - {chosen['description']}"]
+    for warning in plan['warnings']:
+        lines.append(f"Warning: {warning}")
+    lines.append("=" * 70)
+    return "\n".join(lines)
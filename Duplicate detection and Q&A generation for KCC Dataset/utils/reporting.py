@@ -2,14 +2,211 @@
 Reporting utilities for deduplication statistics and visualization.
 """
 
+import json
+import random
+import sys
+import time
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Set
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set
 import logging
 from datetime import datetime
 
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
 logger = logging.getLogger(__name__)
 
 
+def get_peak_rss_mb() -> Optional[float]:
+    """
+    Get peak resident set size of this process in MB.
+    
+    Returns:
+        Peak RSS in MB, or None if the platform does not report it
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class ScoreStats:
+    """
+    Fixed-memory similarity score statistics for one stage.
+    
+    Scores are fed in while pairs are generated, so nothing is stored per
+    pair: a fixed-bin histogram counts every comparison and two reservoirs
+    (Algorithm R) keep uniform samples of accepted pairs (score >= threshold)
+    and near misses (threshold - near_miss_margin <= score < threshold).
+    
+    Usage:
+        stats = ScoreStats(threshold=0.92)
+        stats.observe(i, j, score)                 # one comparison
+        stats.observe_many(rows, cols, scores)     # numpy arrays
+        stats.resolve_texts(questions)             # attach texts to samples
+    """
+    
+    def __init__(self, threshold: float, bins: int = 50, near_miss_margin: float = 0.05,
+                 sample_size: int = 20, score_range: tuple = (0.0, 1.0), seed: int = 0):
+        """
+        Args:
+            threshold: Acceptance threshold of the stage
+            bins: Number of histogram bins over score_range
+            near_miss_margin: Width of the near-miss band below the threshold
+            sample_size: Reservoir size for each of accepted / near-miss pairs
+            score_range: (low, high) histogram range; scores outside are clipped
+            seed: Random seed for reservoir sampling
+        """
+        self.threshold = threshold
+        self.near_miss_margin = near_miss_margin
+        self.near_miss_floor = threshold - near_miss_margin
+        self.low, self.high = score_range
+        self.bins = bins
+        self._scale = bins / (self.high - self.low)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.total = 0
+        self.sample_size = sample_size
+        self.seen = {'accepted': 0, 'near_miss': 0}
+        self.samples = {'accepted': [], 'near_miss': []}
+        self._random = random.Random(seed)
+        self._rng = np.random.default_rng(seed)
+    
+    def _offer(self, kind: str, sample: tuple):
+        """Offer one sample to a reservoir."""
+        self.seen[kind] += 1
+        reservoir = self.samples[kind]
+        if len(reservoir) < self.sample_size:
+            reservoir.append(sample)
+        else:
+            slot = self._random.randrange(self.seen[kind])
+            if slot < self.sample_size:
+                reservoir[slot] = sample
+    
+    def _offer_many(self, kind: str, rows: np.ndarray, cols: np.ndarray, scores: np.ndarray):
+        """Offer a batch of samples to a reservoir."""
+        reservoir = self.samples[kind]
+        start = self.seen[kind]
+        self.seen[kind] += len(scores)
+        
+        # Fill the reservoir first, then replace with probability size / seen
+        fill = max(0, min(self.sample_size - len(reservoir), len(scores)))
+        for k in range(fill):
+            reservoir.append((int(rows[k]), int(cols[k]), float(scores[k])))
+        if fill < len(scores):
+            positions = start + np.arange(fill, len(scores)) + 1
+            slots = self._rng.integers(0, positions)
+            for k in np.flatnonzero(slots < self.sample_size):
+                reservoir[slots[k]] = (int(rows[fill + k]), int(cols[fill + k]), float(scores[fill + k]))
+    
+    def observe(self, i: int, j: int, score: float):
+        """Record one compared pair."""
+        b = int((score - self.low) * self._scale)
+        self.counts[min(max(b, 0), self.bins - 1)] += 1
+        self.total += 1
+        if score >= self.threshold:
+            self._offer('accepted', (i, j, float(score)))
+        elif score >= self.near_miss_floor:
+            self._offer('near_miss', (i, j, float(score)))
+    
+    def observe_many(self, rows: np.ndarray, cols: np.ndarray, scores: np.ndarray):
+        """Record a batch of compared pairs (parallel arrays)."""
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.size == 0:
+            return
+        b = ((scores - self.low) * self._scale).astype(np.int64)
+        self.counts += np.bincount(np.clip(b, 0, self.bins - 1), minlength=self.bins)
+        self.total += scores.size
+        
+        accepted = scores >= self.threshold
+        near_miss = ~accepted & (scores >= self.near_miss_floor)
+        for kind, mask in (('accepted', accepted), ('near_miss', near_miss)):
+            if mask.any():
+                self._offer_many(kind, np.asarray(rows)[mask], np.asarray(cols)[mask], scores[mask])
+    
+    def copy_empty(self, seed: int = 0) -> "ScoreStats":
+        """New empty ScoreStats with the same settings (e.g. for one block of a stage)."""
+        return ScoreStats(self.threshold, self.bins, self.near_miss_margin, self.sample_size,
+                          (self.low, self.high), seed)
+    
+    def merge(self, other: "ScoreStats"):
+        """
+        Add the comparisons recorded by another ScoreStats with the same settings.
+        
+        Histograms and counts are summed, so they are exact. Each merged
+        reservoir is drawn from both reservoirs in proportion to the pairs
+        each one has seen. This is only approximately a uniform sample of
+        all pairs. A side whose reservoir runs out is topped up from the
+        other, so small blocks can be over-represented after many merges.
+        Use the samples as examples, not for estimates.
+        """
+        self.counts += other.counts
+        self.total += other.total
+        for kind in self.samples:
+            ours, theirs = list(self.samples[kind]), list(other.samples[kind])
+            self._random.shuffle(ours)
+            self._random.shuffle(theirs)
+            n_ours, n_theirs = self.seen[kind], other.seen[kind]
+            merged = []
+            while len(merged) < self.sample_size and (ours or theirs):
+                if ours and (not theirs or self._random.random() * (n_ours + n_theirs) < n_ours):
+                    merged.append(ours.pop())
+                    n_ours -= 1
+                else:
+                    merged.append(theirs.pop())
+                    n_theirs -= 1
+            self.samples[kind] = merged
+            self.seen[kind] += other.seen[kind]
+    
+    def resolve_texts(self, texts: List[str]):
+        """Replace sampled (i, j, score) ids with the compared texts."""
+        for kind, reservoir in self.samples.items():
+            self.samples[kind] = [
+                (s[0], s[1], s[2]) if isinstance(s[0], str) else (texts[s[0]], texts[s[1]], s[2])
+                for s in reservoir
+            ]
+    
+    def to_dict(self) -> dict:
+        """Histogram, counts and samples (highest score first) as a dictionary."""
+        edges = np.linspace(self.low, self.high, self.bins + 1)
+        return {
+            'threshold': self.threshold,
+            'near_miss_floor': round(self.near_miss_floor, 6),
+            'comparisons': self.total,
+            'accepted': self.seen['accepted'],
+            'near_miss': self.seen['near_miss'],
+            'bin_edges': [round(float(e), 6) for e in edges],
+            'counts': self.counts.tolist(),
+            'samples': {
+                kind: [{'a': a, 'b': b, 'score': round(s, 4)}
+                       for a, b, s in sorted(reservoir, key=lambda x: x[2], reverse=True)]
+                for kind, reservoir in self.samples.items()
+            },
+        }
+    
+    def format_lines(self, width: int = 40) -> List[str]:
+        """Text histogram of the bins around the threshold plus near-miss samples."""
+        lines = [f"comparisons={self.total:,} accepted={self.seen['accepted']:,} "
+                 f"near_miss={self.seen['near_miss']:,} (threshold {self.threshold})"]
+        # Show from three near-miss bands below the threshold upwards
+        first = max(0, int((self.threshold - 3 * self.near_miss_margin - self.low) * self._scale))
+        peak = self.counts[first:].max(initial=0)
+        if peak:
+            for b in range(first, self.bins):
+                low = self.low + b / self._scale
+                bar = '#' * int(round(self.counts[b] / peak * width))
+                lines.append(f"  {low:5.2f}-{low + 1 / self._scale:5.2f} {self.counts[b]:>10,} {bar}")
+        for a, b, s in sorted(self.samples['near_miss'], key=lambda x: x[2], reverse=True)[:5]:
+            lines.append(f"  near miss {s:.3f}: {a} | {b}")
+        return lines
+
+
 class DeduplicationReport:
     """
     Generate and manage deduplication reports.
@@ -27,6 +224,9 @@ class DeduplicationReport:
             'processing_time': 0.0
         }
         self.duplicate_groups = []
+        self.score_stats = {}
+        self.stages = []
+        self._open_stages = []
         self.start_time = None
         self.end_time = None
     
@@ -65,6 +265,147 @@ class DeduplicationReport:
         if self.start_time:
             self.stats['processing_time'] = (self.end_time - self.start_time).total_seconds()
     
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        """
+        Time a pipeline stage and record its metrics.
+        
+        Yields the stage's metrics dictionary; callers (or update_stage())
+        fill in rows_out, comparisons and pairs_found. Stages may be nested.
+        
+        Usage:
+            with report.stage('exact', rows_in=len(df)) as stage:
+                df = remove_exact(df)
+                stage['rows_out'] = len(df)
+        
+        Args:
+            name: Stage name
+            rows_in: Number of rows entering the stage
+        """
+        metrics = {
+            'stage': name,
+            'rows_in': rows_in,
+            'rows_out': None,
+            'comparisons': None,
+            'pairs_found': None,
+        }
+        self._open_stages.append(metrics)
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            seconds = time.perf_counter() - start
+            metrics['seconds'] = round(seconds, 4)
+            metrics['throughput_rows_per_s'] = (
+                round(rows_in / seconds, 2) if rows_in and seconds > 0 else None
+            )
+            # Peak RSS is process-wide, i.e. the high-water mark up to the end of this stage
+            metrics['peak_rss_mb'] = get_peak_rss_mb()
+            self._open_stages.remove(metrics)
+            self.stages.append(metrics)
+    
+    def update_stage(self, **values):
+        """
+        Set metrics (e.g. comparisons, pairs_found) on the innermost open stage.
+        
+        Does nothing when no stage is being timed.
+        """
+        if self._open_stages:
+            self._open_stages[-1].update(values)
+    
+    def new_score_stats(self, name: str, threshold: float, **options) -> ScoreStats:
+        """
+        Create and register score statistics for a stage.
+        
+        Args:
+            name: Stage name (e.g. 'fuzzy', 'semantic')
+            threshold: Acceptance threshold of the stage
+            **options: Extra ScoreStats arguments (bins, near_miss_margin, sample_size)
+        
+        Returns:
+            ScoreStats to feed while pairs are generated
+        """
+        stats = ScoreStats(threshold, **options)
+        self.score_stats[name] = stats
+        return stats
+    
+    def to_dict(self) -> dict:
+        """
+        Get summary statistics and per-stage metrics as a dictionary.
+        
+        Returns:
+            Dictionary with 'stats', 'stages', 'score_stats' and timestamps
+        """
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'started': self.start_time.isoformat(timespec='seconds') if self.start_time else None,
+            'finished': self.end_time.isoformat(timespec='seconds') if self.end_time else None,
+            'peak_rss_mb': get_peak_rss_mb(),
+            'stats': dict(self.stats),
+            'stages': list(self.stages),
+            'score_stats': {name: stats.to_dict() for name, stats in self.score_stats.items()},
+        }
+    
+    def save_metrics(self, filepath: str):
+        """
+        Save machine-readable metrics.
+        
+        A .ndjson path gets one JSON record per stage followed by a summary
+        record; any other path gets a single JSON document.
+        
+        Args:
+            filepath: Path to save metrics
+        """
+        data = self.to_dict()
+        with open(filepath, 'w', encoding='utf-8') as f:
+            if filepath.endswith('.ndjson'):
+                for stage in data['stages']:
+                    f.write(json.dumps({'type': 'stage', **stage}) + "\n")
+                for name, stats in data['score_stats'].items():
+                    f.write(json.dumps({'type': 'score_stats', 'stage': name, **stats}, ensure_ascii=False) + "\n")
+                summary = {k: v for k, v in data.items() if k not in ('stages', 'score_stats')}
+                f.write(json.dumps({'type': 'summary', **summary}) + "\n")
+            else:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        
+        logger.info(f"Metrics saved to {filepath}")
+    
+    def record_run(self, db_path: str, config: dict, input_file: str, output_file: str,
+                   outputs: Optional[List[str]] = None) -> int:
+        """
+        Append this run to the SQLite run history.
+        
+        Args:
+            db_path: Path to the run-history database
+            config: Configuration the run used
+            input_file: Input file path
+            output_file: Main output file path
+            outputs: Other output paths to record
+        
+        Returns:
+            Run id
+        """
+        from .run_history import RunHistory
+        
+        history = RunHistory(db_path)
+        try:
+            return history.record(self.to_dict(), config, input_file, output_file, outputs)
+        finally:
+            history.close()
+    
+    def _format_stages(self) -> List[str]:
+        """Format per-stage metrics as table lines."""
+        lines = [f"{'Stage':<20}{'Time (s)':>10}{'Rows in':>10}{'Rows out':>10}{'Rows/s':>12}{'Pairs':>10}{'Peak MB':>10}"]
+        for s in self.stages:
+            def fmt(value, spec):
+                return format(value, spec) if value is not None else '-'
+            lines.append(
+                f"{s['stage']:<20}{fmt(s['seconds'], '.2f'):>10}{fmt(s['rows_in'], ','):>10}"
+                f"{fmt(s['rows_out'], ','):>10}{fmt(s['throughput_rows_per_s'], ',.0f'):>12}"
+                f"{fmt(s['pairs_found'], ','):>10}{fmt(s['peak_rss_mb'], '.0f'):>10}"
+            )
+        return lines
+    
     def add_duplicate_group(self, group: List[str], representative: str, similarity: float = 1.0):
         """
         Add a duplicate group to the report.
@@ -95,6 +436,10 @@ class DeduplicationReport:
         print(f"Final count:                 {self.stats['final_count']:,}")
         print(f"Reduction:                   {self.stats['reduction_percentage']:.2f}%")
         print(f"Processing time:             {self.stats['processing_time']:.2f}s")
+        if self.stages:
+            print("-"*70)
+            for line in self._format_stages():
+                print(line)
         print("="*70)
     
     def save_to_file(self, filepath: str):
@@ -122,6 +467,23 @@ class DeduplicationReport:
             f.write(f"Processing time:             {self.stats['processing_time']:.2f}s\n")
             f.write("="*70 + "\n\n")
             
+            if self.stages:
+                f.write("STAGE TIMINGS\n")
+                f.write("-"*70 + "\n")
+                for line in self._format_stages():
+                    f.write(line + "\n")
+                f.write("="*70 + "\n\n")
+            
+            if self.score_stats:
+                f.write("SIMILARITY SCORE DISTRIBUTIONS\n")
+                f.write("-"*70 + "\n")
+                for name, stats in self.score_stats.items():
+                    f.write(f"{name}: ")
+                    for line in stats.format_lines():
+                        f.write(line + "\n")
+                    f.write("\n")
+                f.write("="*70 + "\n\n")
+            
             if self.duplicate_groups:
                 f.write("SAMPLE DUPLICATE GROUPS (first 20)\n")
                 f.write("-"*70 + "\n")
@@ -205,6 +567,83 @@ class DeduplicationReport:
         
         logger.info(f"Saved {groups_saved} duplicate groups to {output_dir}")
         return groups_saved
+    
+    def save_groups_table(self, output_path: str, df_original: pd.DataFrame,
+                          clusters: Dict[int, List[int]],
+                          representatives: Dict[int, int],
+                          file_format: str = "csv",
+                          partition_size: Optional[int] = None) -> int:
+        """
+        Save all duplicate groups into a single table.
+        
+        Rows of every cluster with more than one item are written in one
+        vectorized pass, with `cluster_id`, `cluster_size` and
+        `is_representative` columns. Each cluster's representative comes first.
+        
+        Args:
+            output_path: Output file path, or a directory when partitioning
+            df_original: Original dataframe
+            clusters: Dictionary mapping cluster_id -> list of item indices
+            representatives: Dictionary mapping cluster_id -> representative item index
+            file_format: "csv" or "parquet"
+            partition_size: If set, write one file per this many groups
+        
+        Returns:
+            Number of groups saved
+        """
+        from pathlib import Path
+        
+        if file_format not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported groups format: {file_format}")
+        
+        group_ids = [cid for cid, items in clusters.items() if len(items) > 1]
+        sizes = np.array([len(clusters[cid]) for cid in group_ids], dtype=np.int64)
+        
+        if group_ids:
+            items = np.concatenate([np.asarray(clusters[cid], dtype=np.int64) for cid in group_ids])
+        else:
+            items = np.empty(0, dtype=np.int64)
+        cluster_ids = np.repeat(np.asarray(group_ids, dtype=np.int64), sizes)
+        rep_items = np.repeat(np.asarray([representatives[cid] for cid in group_ids], dtype=np.int64), sizes)
+        cluster_sizes = np.repeat(sizes, sizes)
+        is_rep = items == rep_items
+        
+        # Cluster id first, representative first within each cluster (stable)
+        order = np.lexsort((~is_rep, cluster_ids))
+        items, cluster_ids, is_rep = items[order], cluster_ids[order], is_rep[order]
+        cluster_sizes = cluster_sizes[order]
+        
+        groups_df = df_original.iloc[items].reset_index(drop=True)
+        groups_df['is_representative'] = is_rep
+        groups_df['cluster_id'] = cluster_ids
+        groups_df['cluster_size'] = cluster_sizes
+        
+        def write(frame: pd.DataFrame, path: Path):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if file_format == "parquet":
+                frame.to_parquet(path, index=False)
+            else:
+                frame.to_csv(path, index=False, encoding='utf-8')
+        
+        output_path = Path(output_path)
+        if partition_size:
+            if groups_df.empty:
+                logger.info(f"No duplicate groups to save under {output_path}")
+                return 0
+            # Cluster ids are sparse (singletons are skipped), so partition on
+            # the dense group number: <dir>/groups_00000-00999.<ext>
+            group_numbers = pd.factorize(cluster_ids, sort=True)[0]
+            partitions = group_numbers // partition_size
+            boundaries = np.flatnonzero(np.diff(partitions)) + 1
+            for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(partitions)]):
+                low = int(partitions[start]) * partition_size
+                filename = f"groups_{low:05d}-{low + partition_size - 1:05d}.{file_format}"
+                write(groups_df.iloc[start:end], output_path / filename)
+        else:
+            write(groups_df, output_path)
+        
+        logger.info(f"Saved {len(group_ids)} duplicate groups ({len(groups_df)} rows) to {output_path}")
+        return len(group_ids)
 
 
 def print_sample_duplicates(groups: List[Dict], n: int = 5):
@@ -0,0 +1,320 @@
+"""
+Run-history store for comparing deduplication performance across runs.
+
+Every run's config hash, input fingerprint, summary statistics, per-stage
+metrics and output files are appended to a local SQLite database, so runs of
+the same input can be compared over time.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded TEXT NOT NULL,
+    started TEXT,
+    finished TEXT,
+    command TEXT,
+    input_file TEXT,
+    input_fingerprint TEXT,
+    output_file TEXT,
+    config_hash TEXT,
+    config_json TEXT,
+    original_count INTEGER,
+    final_count INTEGER,
+    processing_time REAL,
+    peak_rss_mb REAL,
+    stats_json TEXT
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    position INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    rows_in INTEGER,
+    rows_out INTEGER,
+    comparisons INTEGER,
+    pairs_found INTEGER,
+    seconds REAL,
+    throughput_rows_per_s REAL,
+    peak_rss_mb REAL,
+    PRIMARY KEY (run_id, position)
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    path TEXT NOT NULL,
+    size_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_input ON runs(input_fingerprint);
+"""
+
+STAGE_COLUMNS = ['stage', 'rows_in', 'rows_out', 'comparisons', 'pairs_found',
+                 'seconds', 'throughput_rows_per_s', 'peak_rss_mb']
+
+
+def config_hash(config: dict) -> str:
+    """
+    Stable short hash of a configuration dictionary.
+    
+    Args:
+        config: Configuration dictionary
+    
+    Returns:
+        First 16 hex characters of the SHA-256 of the canonical JSON
+    """
+    canonical = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def file_fingerprint(filepath: str, chunk_size: int = 1 << 20) -> Optional[str]:
+    """
+    Content fingerprint of a file: its size and the SHA-256 of all its bytes.
+    
+    Reads the whole file. Use it where a different input must never be
+    taken for the same one (e.g. checkpoint keys).
+    
+    Args:
+        filepath: Path to the file
+        chunk_size: Read size in bytes
+    
+    Returns:
+        "<size>:<first 16 hex chars of sha256>", or None if the file is missing
+    """
+    if not os.path.exists(filepath):
+        return None
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return f"{os.path.getsize(filepath)}:{digest.hexdigest()[:16]}"
+
+
+def quick_fingerprint(filepath: str, block_size: int = 1 << 20) -> Optional[str]:
+    """
+    Approximate fingerprint of a file: its size and a hash of its ends.
+    
+    Only the first and last block_size bytes are hashed, so multi-GB inputs
+    are fingerprinted in constant time. An edit that keeps the size and
+    touches neither end is not detected, so this is only for labelling
+    runs (run history), never for deciding that results can be reused.
+    
+    Args:
+        filepath: Path to the file
+        block_size: Bytes hashed at each end of the file
+    
+    Returns:
+        "<size>:<first 16 hex chars of sha256>", or None if the file is missing
+    """
+    if not os.path.exists(filepath):
+        return None
+    size = os.path.getsize(filepath)
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        digest.update(f.read(block_size))
+        if size > block_size:
+            f.seek(max(block_size, size - block_size))
+            digest.update(f.read(block_size))
+    return f"{size}:{digest.hexdigest()[:16]}"
+
+
+class RunHistory:
+    """
+    SQLite run log.
+    
+    Usage:
+        history = RunHistory("Data/run_history.sqlite")
+        run_id = history.record(report.to_dict(), config, input_file, output_file)
+        history.compare(run_a, run_b)
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        Open (and create if needed) the run-history database.
+        
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+    
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+    
+    def record(self, metrics: dict, config: dict, input_file: str, output_file: str,
+               outputs: Optional[List[str]] = None) -> int:
+        """
+        Append one run.
+        
+        Args:
+            metrics: DeduplicationReport.to_dict() output
+            config: Configuration the run used
+            input_file: Input file path
+            output_file: Main output file path
+            outputs: Other output paths to record (reports, group exports, ...)
+        
+        Returns:
+            New run id
+        """
+        stats = metrics.get('stats', {})
+        with self.conn:
+            cursor = self.conn.execute(
+                """INSERT INTO runs (recorded, started, finished, command, input_file,
+                                     input_fingerprint, output_file, config_hash, config_json,
+                                     original_count, final_count, processing_time, peak_rss_mb,
+                                     stats_json)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    datetime.now().isoformat(timespec='seconds'),
+                    metrics.get('started'),
+                    metrics.get('finished'),
+                    ' '.join(sys.argv),
+                    input_file,
+                    quick_fingerprint(input_file),
+                    output_file,
+                    config_hash(config),
+                    json.dumps(config, sort_keys=True, default=str),
+                    stats.get('original_count'),
+                    stats.get('final_count'),
+                    stats.get('processing_time'),
+                    metrics.get('peak_rss_mb'),
+                    json.dumps(stats),
+                )
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                f"INSERT INTO stages (run_id, position, {', '.join(STAGE_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(STAGE_COLUMNS))})",
+                [(run_id, position, *[stage.get(c) for c in STAGE_COLUMNS])
+                 for position, stage in enumerate(metrics.get('stages', []))]
+            )
+            self.conn.executemany(
+                "INSERT INTO outputs (run_id, path, size_bytes) VALUES (?, ?, ?)",
+                [(run_id, path, os.path.getsize(path) if os.path.isfile(path) else None)
+                 for path in [output_file] + list(outputs or [])]
+            )
+        logger.info(f"Recorded run {run_id} in {self.db_path}")
+        return run_id
+    
+    def list_runs(self, limit: int = 20, input_file: Optional[str] = None) -> List[dict]:
+        """
+        Most recent runs first.
+        
+        Args:
+            limit: Maximum number of runs
+            input_file: Only runs of this input path
+        
+        Returns:
+            List of run dictionaries
+        """
+        query = "SELECT * FROM runs"
+        params = []
+        if input_file:
+            query += " WHERE input_file = ?"
+            params.append(input_file)
+        query += " ORDER BY run_id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+    
+    def get_run(self, run_id: int) -> Optional[dict]:
+        """
+        Load one run with its stages and outputs.
+        
+        Args:
+            run_id: Run id
+        
+        Returns:
+            Run dictionary with 'stages' and 'outputs' lists, or None
+        """
+        row = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        run['stages'] = [dict(r) for r in self.conn.execute(
+            "SELECT * FROM stages WHERE run_id = ? ORDER BY position", (run_id,))]
+        run['outputs'] = [dict(r) for r in self.conn.execute(
+            "SELECT path, size_bytes FROM outputs WHERE run_id = ?", (run_id,))]
+        return run
+    
+    def compare(self, base_id: int, new_id: int, tolerance: float = 0.10,
+                min_seconds: float = 1.0) -> Dict:
+        """
+        Compare two runs stage by stage.
+        
+        Stages are matched by name and occurrence, so a stage that runs
+        more than once (e.g. per shard or per route) is compared with the
+        same repetition in the base run; repeats are labelled "name#2", ...
+        A stage is flagged as a regression when its throughput (rows/s, or
+        1/seconds for stages without row counts) dropped by more than
+        tolerance relative to the base run. Stages faster than min_seconds
+        in the new run are never flagged, since their timings are mostly noise.
+        
+        same_input compares the quick fingerprints (size and both ends of the
+        file, see quick_fingerprint), so it is approximate: an edit in the
+        middle of a same-size input still counts as the same input.
+        
+        Args:
+            base_id: Baseline run id
+            new_id: Run id to check
+            tolerance: Allowed relative throughput drop (0.10 = 10%)
+            min_seconds: Minimum new-run stage time to consider for regressions
+        
+        Returns:
+            Dictionary with both runs, per-stage rows and the regressed stage names
+        """
+        base = self.get_run(base_id)
+        new = self.get_run(new_id)
+        if base is None or new is None:
+            raise ValueError(f"Unknown run id: {base_id if base is None else new_id}")
+        
+        def speed(stage):
+            if stage['throughput_rows_per_s']:
+                return stage['throughput_rows_per_s']
+            return 1.0 / stage['seconds'] if stage['seconds'] else None
+        
+        def keyed(stages):
+            seen = {}
+            for stage in stages:
+                occurrence = seen[stage['stage']] = seen.get(stage['stage'], 0) + 1
+                yield (stage['stage'], occurrence), stage
+        
+        base_stages = dict(keyed(base['stages']))
+        rows = []
+        for (name, occurrence), stage in keyed(new['stages']):
+            old = base_stages.get((name, occurrence))
+            old_speed = speed(old) if old else None
+            new_speed = speed(stage)
+            change = (new_speed / old_speed - 1.0) if old_speed and new_speed else None
+            rows.append({
+                'stage': name if occurrence == 1 else f"{name}#{occurrence}",
+                'occurrence': occurrence,
+                'base_seconds': old['seconds'] if old else None,
+                'new_seconds': stage['seconds'],
+                'base_rows_out': old['rows_out'] if old else None,
+                'new_rows_out': stage['rows_out'],
+                'throughput_change': change,
+                'regression': (change is not None and change < -tolerance
+                               and (stage['seconds'] or 0) >= min_seconds),
+            })
+        
+        return {
+            'base': base,
+            'new': new,
+            'same_input': base['input_fingerprint'] == new['input_fingerprint'],
+            'same_config': base['config_hash'] == new['config_hash'],
+            'stages': rows,
+            'regressions': [r['stage'] for r in rows if r['regression']],
+        }
@@ -0,0 +1,147 @@
+"""
+Out-of-core partitioning of large inputs into shard files.
+
+The input is streamed in chunks and every row is appended to one of N
+shard files on disk, chosen by a 64-bit key (the hash of the normalized
+question, or of the blocking columns). Rows with the same key always land
+in the same shard, so each shard can be deduplicated on its own with
+memory bounded by the shard size.
+"""
+
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .io import CSV_SUFFIXES, PARQUET_SUFFIXES, EXCEL_CACHE_DIR, HAS_PYARROW, read_table
+from .text_processing import normalize_questions
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Column added to shard files with each row's position in the input
+SOURCE_ROW_COLUMN = '_source_row'
+
+
+def shard_keys(df: pd.DataFrame, question_column: str,
+               blocking_keys: Optional[List[str]] = None) -> np.ndarray:
+    """
+    64-bit shard key of each row.
+    
+    With blocking keys, rows of the same block share a key, so no block is
+    split across shards. Otherwise the key is the hash of the normalized
+    question, so exact duplicates always share a shard.
+    
+    Args:
+        df: Chunk of input rows
+        question_column: Name of column containing questions
+        blocking_keys: Metadata columns defining blocks (None/empty = by question)
+    
+    Returns:
+        uint64 array with one key per row
+    """
+    missing = [c for c in [question_column] + list(blocking_keys or []) if c not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found in data: {missing}")
+    if blocking_keys:
+        return pd.util.hash_pandas_object(df[blocking_keys], index=False).to_numpy()
+    return normalize_questions(df[question_column])['hash'].to_numpy()
+
+
+def partition_table(filepath: str, shard_dir: str, n_shards: int,
+                    key_fn: Callable[[pd.DataFrame], np.ndarray],
+                    usecols: Optional[List[str]] = None, chunk_rows: int = 100000,
+                    encoding: str = 'utf-8',
+                    excel_cache_dir: Optional[str] = EXCEL_CACHE_DIR) -> List[Tuple[str, int]]:
+    """
+    Split an input file into shard files by key.
+    
+    Only chunk_rows rows are held in memory at a time. Each shard keeps the
+    input's row order and gets a SOURCE_ROW_COLUMN with the rows' positions
+    in the input. CSV inputs produce CSV shards; Parquet and Excel inputs
+    produce Parquet shards.
+    
+    Args:
+        filepath: Input file path
+        shard_dir: Directory for the shard files (created if missing)
+        n_shards: Number of shards
+        key_fn: Maps a chunk to one uint64 key per row (see shard_keys)
+        usecols: Only keep these columns (None = all)
+        chunk_rows: Rows read per chunk
+        encoding: Text encoding for CSV files
+        excel_cache_dir: Directory for Parquet copies of Excel files (None = no cache)
+    
+    Returns:
+        List of (shard file path, row count), one per shard
+    """
+    suffix = Path(filepath).suffix.lower()
+    out_dir = Path(shard_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    usecols = list(usecols) if usecols is not None else None
+    
+    shard_suffix = '.csv' if suffix in CSV_SUFFIXES else '.parquet'
+    paths = [out_dir / f"shard_{k:04d}{shard_suffix}" for k in range(n_shards)]
+    for path in paths:
+        path.unlink(missing_ok=True)
+    counts = np.zeros(n_shards, dtype=np.int64)
+    
+    def shard_of(chunk: pd.DataFrame) -> np.ndarray:
+        return (np.asarray(key_fn(chunk), dtype=np.uint64) % np.uint64(n_shards)).astype(np.int64)
+    
+    if suffix in PARQUET_SUFFIXES:
+        if not HAS_PYARROW:
+            raise ImportError(f"Reading {filepath} requires pyarrow (pip install pyarrow)")
+        # Record batches are split and appended as Arrow data, keeping the column types
+        parquet_file = pq.ParquetFile(filepath)
+        if usecols is not None:
+            missing = [c for c in usecols if c not in parquet_file.schema_arrow.names]
+            if missing:
+                raise ValueError(f"Column not found in {filepath}: {missing}")
+        writers = {}
+        offset = 0
+        try:
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=usecols):
+                table = pa.Table.from_batches([batch])
+                table = table.append_column(SOURCE_ROW_COLUMN, pa.array(np.arange(offset, offset + len(table))))
+                shards = shard_of(batch.to_pandas())
+                for k in np.unique(shards):
+                    if k not in writers:
+                        writers[k] = pq.ParquetWriter(paths[k], table.schema, compression='zstd')
+                    writers[k].write_table(table.take(np.flatnonzero(shards == k)))
+                    counts[k] += int((shards == k).sum())
+                offset += len(table)
+        finally:
+            for writer in writers.values():
+                writer.close()
+    elif suffix in CSV_SUFFIXES:
+        # Fields are kept as text, so shard files hold the original values
+        # and are parsed like the input itself when each shard is loaded
+        offset = 0
+        for chunk in pd.read_csv(filepath, usecols=usecols, encoding=encoding, chunksize=chunk_rows,
+                                 dtype=str, keep_default_na=False):
+            chunk[SOURCE_ROW_COLUMN] = np.arange(offset, offset + len(chunk))
+            shards = shard_of(chunk)
+            for k in np.unique(shards):
+                part = chunk[shards == k]
+                part.to_csv(paths[k], mode='a', header=not paths[k].exists(), index=False, encoding='utf-8')
+                counts[k] += len(part)
+            offset += len(chunk)
+    else:
+        # Excel sheets are capped at ~1M rows, so the whole sheet is read at once
+        df = read_table(filepath, usecols=usecols, encoding=encoding, excel_cache_dir=excel_cache_dir)
+        df = df.reset_index(drop=True)
+        df[SOURCE_ROW_COLUMN] = np.arange(len(df))
+        shards = shard_of(df)
+        for k in np.unique(shards):
+            part = df[shards == k]
+            part.to_parquet(paths[k], index=False, compression='zstd')
+            counts[k] = len(part)
+    
+    logger.info(f"Partitioned {int(counts.sum())} rows of {filepath} into {n_shards} shards "
+                f"(largest {int(counts.max()) if n_shards else 0} rows)")
+    return [(str(path), int(count)) for path, count in zip(paths, counts)]
@@ -3,14 +3,35 @@ Similarity computation utilities.
 Handles fuzzy matching, embedding generation, and similarity calculations.
 """
 
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 import numpy as np
-from typing import List, Tuple, Optional
-from rapidfuzz import fuzz
+from typing import Dict, List, Tuple, Optional
+from rapidfuzz import fuzz, process
 from sklearn.metrics.pairwise import cosine_similarity
+from tqdm import tqdm
 import logging
 
+from .text_processing import detect_scripts
+from .embedding_service import EmbeddingClient, EmbeddingServiceError, RemoteModel
+
 logger = logging.getLogger(__name__)
 
+# Fuzzy tiles submitted to the worker pool at a time (bounds the texts pickled and in flight)
+TILE_ROUND = 64
+
+
+FUZZY_SCORERS = {
+    "ratio": fuzz.ratio,
+    "token_sort_ratio": fuzz.token_sort_ratio,
+    "token_set_ratio": fuzz.token_set_ratio,
+}
+
 
 def fuzzy_similarity(text1: str, text2: str, algorithm: str = "token_sort_ratio") -> float:
     """
@@ -68,14 +89,335 @@ def compute_fuzzy_similarity_matrix(texts: List[str],
     return similarity_matrix
 
 
+def find_fuzzy_pairs(texts: List[str], threshold: float, algorithm: str = "token_sort_ratio",
+                     max_comparisons: Optional[int] = None, score_stats=None,
+                     ids: Optional[np.ndarray] = None, show_progress: bool = False,
+                     block_rows: int = 1000, n_jobs: int = 1) -> Tuple[List[Tuple[int, int, float]], int]:
+    """
+    Find pairs of texts with fuzzy similarity at or above threshold.
+    
+    Compares all pairs, unless there are more than max_comparisons of them:
+    then each text is only compared with a sample of texts of similar length
+    (within +-2 buckets of 10 characters), up to max_comparisons in total.
+    All pairs are scored with rapidfuzz's cdist, block_rows texts against
+    the rest at a time, on n_jobs threads.
+    
+    Args:
+        texts: Cleaned texts
+        threshold: Minimum similarity (0-1)
+        algorithm: Fuzzy matching algorithm (see fuzzy_similarity)
+        max_comparisons: Comparison budget before switching to sampling (None = all pairs)
+        score_stats: Optional ScoreStats fed with every scored pair
+        ids: Optional ids of the texts; pairs are reported with these ids
+        show_progress: Show a progress bar
+        block_rows: Texts scored per cdist call (memory: block_rows x N float64)
+        n_jobs: Threads for cdist (1 = single thread, -1 = all cores)
+    
+    Returns:
+        Tuple of (list of (index1, index2, similarity) tuples, comparisons made)
+    """
+    n = len(texts)
+    if ids is None:
+        ids = np.arange(n)
+    ids = np.asarray(ids, dtype=np.int64)
+    total_comparisons = n * (n - 1) // 2
+    pairs = []
+    
+    if max_comparisons is None or total_comparisons <= max_comparisons:
+        if algorithm not in FUZZY_SCORERS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        for start in tqdm(range(0, n, block_rows), desc="Fuzzy matching", disable=not show_progress):
+            stop = min(start + block_rows, n)
+            # Row r (text start + r) is compared with texts start + r + 1 onwards
+            scores = process.cdist(texts[start:stop], texts[start + 1:], scorer=FUZZY_SCORERS[algorithm],
+                                   dtype=np.float64, workers=n_jobs) / 100.0
+            for r in range(stop - start):
+                i = start + r
+                row = scores[r, r:]
+                if score_stats is not None:
+                    score_stats.observe_many(np.full(len(row), ids[i]), ids[i + 1:], row)
+                for j in np.flatnonzero(row >= threshold):
+                    pairs.append((int(ids[i]), int(ids[i + 1 + j]), float(row[j])))
+        return pairs, total_comparisons
+    
+    ids = ids.tolist()
+    
+    # Group texts by length buckets (groups of 10 characters)
+    length_buckets = defaultdict(list)
+    for i, text in enumerate(texts):
+        length_buckets[len(text) // 10].append(i)
+    
+    comparisons_made = 0
+    max_per_question = min(100, max_comparisons // n)  # Limit comparisons per question
+    
+    for i in tqdm(range(n), desc="Fuzzy matching (optimized)", disable=not show_progress):
+        bucket = len(texts[i]) // 10
+        
+        # Candidates from nearby buckets, excluding self and already processed
+        candidates = []
+        for b in range(max(0, bucket - 2), bucket + 3):
+            candidates.extend(length_buckets[b])
+        candidates = [j for j in candidates if j > i]
+        
+        if len(candidates) > max_per_question:
+            candidates = random.sample(candidates, max_per_question)
+        
+        for j in candidates:
+            if comparisons_made >= max_comparisons:
+                break
+            
+            sim = fuzzy_similarity(texts[i], texts[j], algorithm)
+            if score_stats is not None:
+                score_stats.observe(ids[i], ids[j], sim)
+            if sim >= threshold:
+                pairs.append((ids[i], ids[j], sim))
+            
+            comparisons_made += 1
+        
+        if comparisons_made >= max_comparisons:
+            logger.info(f"Reached max comparisons limit ({max_comparisons:,})")
+            break
+    
+    return pairs, comparisons_made
+
+
+def _fuzzy_block_task(task: tuple) -> tuple:
+    """Worker for fuzzy_pairs_by_block: fuzzy pairs and score stats of one block."""
+    texts, ids, threshold, algorithm, max_comparisons, score_stats, block_rows = task
+    pairs, comparisons = find_fuzzy_pairs(texts, threshold, algorithm, max_comparisons, score_stats, ids,
+                                          block_rows=block_rows)
+    return pairs, comparisons, score_stats
+
+
+def _max_workers(n_jobs: int) -> int:
+    """Worker count for an n_jobs setting (-1 = all cores)."""
+    return (os.cpu_count() or 1) if n_jobs < 0 else n_jobs
+
+
+def fuzzy_pairs_by_block(texts: List[str], blocks: List[np.ndarray], threshold: float,
+                         algorithm: str = "token_sort_ratio", max_comparisons: Optional[int] = None,
+                         score_stats=None, n_jobs: int = 1, block_rows: int = 1000,
+                         executor: Optional[Executor] = None) -> Tuple[List[Tuple[int, int, float]], int]:
+    """
+    Fuzzy pairs within blocks only, with blocks spread over worker processes.
+    
+    Each block is matched like find_fuzzy_pairs, with max_comparisons
+    applying per block. Pairs are returned in block order whatever the
+    number of workers.
+    
+    Args:
+        texts: Cleaned texts
+        blocks: Arrays of text positions, one per block
+        threshold: Minimum similarity (0-1)
+        algorithm: Fuzzy matching algorithm
+        max_comparisons: Per-block comparison budget before sampling (None = all pairs)
+        score_stats: Optional ScoreStats; per-block statistics are merged into it
+        n_jobs: Worker processes (1 = in-process, -1 = all cores)
+        block_rows: Texts scored per cdist call within a block
+        executor: Shared process pool to use instead of starting one
+            (then used whatever n_jobs is)
+    
+    Returns:
+        Tuple of (list of (index1, index2, similarity) tuples over texts, comparisons made)
+    """
+    tasks = [
+        ([texts[i] for i in block], block, threshold, algorithm, max_comparisons,
+         score_stats.copy_empty(seed=k) if score_stats is not None else None, block_rows)
+        for k, block in enumerate(blocks) if len(block) > 1
+    ]
+    
+    if len(tasks) > 1 and (executor is not None or n_jobs != 1):
+        owned = ProcessPoolExecutor(max_workers=_max_workers(n_jobs)) if executor is None else None
+        with owned or nullcontext(executor) as pool:
+            results = list(tqdm(pool.map(_fuzzy_block_task, tasks, chunksize=max(1, len(tasks) // 64)),
+                                total=len(tasks), desc="Fuzzy matching (blocks)"))
+    else:
+        results = [_fuzzy_block_task(task) for task in tqdm(tasks, desc="Fuzzy matching (blocks)")]
+    
+    pairs, comparisons = [], 0
+    for block_pairs, block_comparisons, block_stats in results:
+        pairs.extend(block_pairs)
+        comparisons += block_comparisons
+        if score_stats is not None:
+            score_stats.merge(block_stats)
+    return pairs, comparisons
+
+
+def fuzzy_tiles(n: int, tile_rows: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Split the upper triangle of an n x n comparison space into tiles.
+    
+    Rows and columns are cut every tile_rows texts. Tile (a, b), a <= b,
+    compares the texts of range a with those of range b (only j > i on the
+    diagonal), so off-diagonal tiles hold tile_rows^2 comparisons and
+    diagonal tiles about half that.
+    
+    Args:
+        n: Number of texts
+        tile_rows: Texts per tile side
+    
+    Returns:
+        List of (row_start, row_stop, col_start, col_stop), row-major
+    """
+    bounds = list(range(0, n, tile_rows)) + [n]
+    return [(bounds[a], bounds[a + 1], bounds[b], bounds[b + 1])
+            for a in range(len(bounds) - 1) for b in range(a, len(bounds) - 1)]
+
+
+def _fuzzy_tile_task(task: tuple) -> tuple:
+    """Worker for find_fuzzy_pairs_tiled: above-threshold positions, scores and score stats of one tile."""
+    row_texts, col_texts, row_start, col_start, threshold, algorithm, score_stats, row_ids, col_ids = task
+    # Without score stats every score below the threshold is discarded, so rapidfuzz may skip them
+    cutoff = None if score_stats is not None else max(0.0, threshold * 100 - 1e-6)
+    scores = process.cdist(row_texts, col_texts, scorer=FUZZY_SCORERS[algorithm], dtype=np.float64,
+                           score_cutoff=cutoff, workers=1) / 100.0
+    if row_start == col_start:
+        rows, cols = np.triu_indices(len(row_texts), k=1, m=len(col_texts))
+        values = scores[rows, cols]
+        if score_stats is not None:
+            score_stats.observe_many(row_ids[rows], col_ids[cols], values)
+        keep = values >= threshold
+        rows, cols, values = rows[keep], cols[keep], values[keep]
+    else:
+        if score_stats is not None:
+            score_stats.observe_many(np.repeat(row_ids, len(col_ids)), np.tile(col_ids, len(row_ids)),
+                                     scores.ravel())
+        rows, cols = np.nonzero(scores >= threshold)
+        values = scores[rows, cols]
+    return rows + row_start, cols + col_start, values, score_stats
+
+
+def find_fuzzy_pairs_tiled(texts: List[str], threshold: float, algorithm: str = "token_sort_ratio",
+                           score_stats=None, ids: Optional[np.ndarray] = None, tile_rows: int = 1000,
+                           n_jobs: int = 1, executor: Optional[Executor] = None,
+                           show_progress: bool = False) -> Tuple[List[Tuple[int, int, float]], int]:
+    """
+    Fuzzy pairs over all pairs of texts, with tiles of the comparison space
+    scored in worker processes.
+    
+    The upper triangle is split into square tiles (fuzzy_tiles), each
+    scored with one rapidfuzz cdist call in a worker. Tiles are submitted
+    TILE_ROUND at a time, so only that many tiles' texts are in flight.
+    Pairs are returned in row-major order (by i, then j), as by
+    find_fuzzy_pairs, and per-tile score stats are merged in tile order, so
+    the result is the same whatever the number of workers.
+    
+    Args:
+        texts: Cleaned texts
+        threshold: Minimum similarity (0-1)
+        algorithm: Fuzzy matching algorithm (see fuzzy_similarity)
+        score_stats: Optional ScoreStats; per-tile statistics are merged into it
+        ids: Optional ids of the texts; pairs are reported with these ids
+        tile_rows: Texts per tile side (memory: tile_rows^2 float64 per worker)
+        n_jobs: Worker processes (1 = in-process, -1 = all cores)
+        executor: Shared process pool to use instead of starting one
+            (then used whatever n_jobs is)
+        show_progress: Show a progress bar
+    
+    Returns:
+        Tuple of (list of (index1, index2, similarity) tuples, comparisons made)
+    """
+    if algorithm not in FUZZY_SCORERS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    n = len(texts)
+    ids = np.arange(n) if ids is None else np.asarray(ids, dtype=np.int64)
+    tiles = fuzzy_tiles(n, tile_rows)
+    
+    def tasks(start: int):
+        for k, (r0, r1, c0, c1) in enumerate(tiles[start:start + TILE_ROUND], start):
+            yield (texts[r0:r1], texts[c0:c1], r0, c0, threshold, algorithm,
+                   score_stats.copy_empty(seed=k) if score_stats is not None else None, ids[r0:r1], ids[c0:c1])
+    
+    parallel = len(tiles) > 1 and (executor is not None or n_jobs != 1)
+    owned = ProcessPoolExecutor(max_workers=_max_workers(n_jobs)) if parallel and executor is None else None
+    results = []
+    with owned or nullcontext(executor) as pool, \
+            tqdm(total=len(tiles), desc="Fuzzy matching (tiles)", disable=not show_progress) as progress:
+        for start in range(0, len(tiles), TILE_ROUND):
+            round_tasks = tasks(start)
+            round_results = pool.map(_fuzzy_tile_task, round_tasks) if parallel else map(_fuzzy_tile_task, round_tasks)
+            for result in round_results:
+                results.append(result)
+                progress.update(1)
+    
+    rows = np.concatenate([r[0] for r in results]) if results else np.empty(0, dtype=np.int64)
+    cols = np.concatenate([r[1] for r in results]) if results else np.empty(0, dtype=np.int64)
+    values = np.concatenate([r[2] for r in results]) if results else np.empty(0)
+    if score_stats is not None:
+        for result in results:
+            score_stats.merge(result[3])
+    
+    order = np.lexsort((cols, rows))
+    pairs = [(int(ids[i]), int(ids[j]), float(s)) for i, j, s in zip(rows[order], cols[order], values[order])]
+    return pairs, n * (n - 1) // 2
+
+
+def semantic_pairs_by_block(embeddings: np.ndarray, blocks: List[np.ndarray], threshold: float,
+                            score_stats=None, n_jobs: int = 1,
+                            ids: Optional[np.ndarray] = None,
+                            block_rows: int = 1024) -> Tuple[List[Tuple[int, int, float]], int]:
+    """
+    Cosine-similarity pairs within blocks only, with blocks searched in parallel threads.
+    
+    Each block is searched on its own (NumPy releases the GIL during the
+    matrix products), block_rows rows at a time, so no similarity matrix
+    over all rows is ever built.
+    
+    Args:
+        embeddings: NxD embeddings
+        blocks: Arrays of row positions, one per block
+        threshold: Minimum cosine similarity
+        score_stats: Optional ScoreStats; per-block statistics are merged into it
+            (histograms exactly, pair samples approximately, see ScoreStats.merge)
+        n_jobs: Worker threads (1 = sequential, -1 = all cores)
+        ids: Optional ids of the embedding rows; pairs are reported with these ids
+        block_rows: Rows of a block scored per matrix product
+    
+    Returns:
+        Tuple of (list of (index1, index2, similarity) tuples sorted by similarity, comparisons made)
+    """
+    blocks = [block for block in blocks if len(block) > 1]
+    
+    def search(task):
+        k, block = task
+        block_stats = score_stats.copy_empty(seed=k) if score_stats is not None else None
+        block_ids = np.asarray(ids)[block] if ids is not None else block
+        pairs = find_similar_pairs_blockwise(embeddings[block], threshold, score_stats=block_stats,
+                                             ids=block_ids, block_rows=block_rows)
+        return pairs, block_stats
+    
+    if n_jobs != 1 and len(blocks) > 1:
+        with ThreadPoolExecutor(max_workers=_max_workers(n_jobs)) as executor:
+            results = list(executor.map(search, enumerate(blocks)))
+    else:
+        results = [search(task) for task in enumerate(blocks)]
+    
+    pairs = []
+    for block_pairs, block_stats in results:
+        pairs.extend(block_pairs)
+        if score_stats is not None:
+            score_stats.merge(block_stats)
+    pairs.sort(key=lambda x: x[2], reverse=True)
+    return pairs, sum(len(b) * (len(b) - 1) // 2 for b in blocks)
+
+
 class EmbeddingGenerator:
     """
     Generate semantic embeddings using sentence transformers.
+    
+    When the embedding daemon (scripts/embedding_daemon.py) answers on its
+    socket, texts are encoded there with its already-loaded models instead
+    of loading a local copy; if it goes away mid-run, the model is loaded
+    locally and encoding continues.
     """
     
     def __init__(self, model_name: str = "paraphrase-multilingual-mpnet-base-v2", 
                  use_gpu: bool = False,
-                 batch_size: int = 32):
+                 batch_size: int = 32,
+                 english_model_name: Optional[str] = None,
+                 chunk_size: Optional[int] = None,
+                 service_socket: Optional[str] = None,
+                 use_service: bool = True):
         """
         Initialize embedding generator.
         
@@ -83,19 +425,48 @@ class EmbeddingGenerator:
             model_name: Name of the sentence transformer model
             use_gpu: Whether to use GPU
             batch_size: Batch size for encoding
+            english_model_name: Optional faster model for pure-English (Latin script)
+                texts, used by encode_by_script()
+            chunk_size: Texts passed to the model per call; embeddings are
+                written into one preallocated array (None = all texts at once)
+            service_socket: Embedding daemon socket (None = EMBEDDING_SERVICE_SOCKET
+                or the default path)
+            use_service: Use the daemon when it is running
         """
+        self.model_name = model_name
+        self.english_model_name = english_model_name
+        self.english_model = None
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.device = 'cuda' if use_gpu else 'cpu'
+        # One model call at a time when the generator is shared between threads
+        self._lock = threading.RLock()
+        
+        self.service = None
+        if use_service:
+            client = EmbeddingClient(service_socket)
+            status = client.ping()
+            if status is not None and use_gpu and status.get('device') != 'cuda':
+                # A CPU daemon would silently replace the requested GPU model
+                logger.info(f"Embedding service at {client.socket_path} runs on CPU, loading the model on GPU")
+            elif status is not None:
+                logger.info(f"Using embedding service at {client.socket_path} for {model_name}")
+                self.service = client
+                self.model = RemoteModel(client, model_name)
+                return
+        
+        self.model = self._load_local(model_name)
+    
+    def _load_local(self, model_name: str):
+        """Load a sentence transformer in this process."""
         try:
             from sentence_transformers import SentenceTransformer
         except ImportError:
             raise ImportError("sentence-transformers not installed. Run: pip install sentence-transformers")
-        
-        self.model_name = model_name
-        self.batch_size = batch_size
-        
-        device = 'cuda' if use_gpu else 'cpu'
-        logger.info(f"Loading model {model_name} on {device}...")
-        self.model = SentenceTransformer(model_name, device=device)
+        logger.info(f"Loading model {model_name} on {self.device}...")
+        model = SentenceTransformer(model_name, device=self.device)
         logger.info("Model loaded successfully")
+        return model
     
     def encode(self, texts: List[str], show_progress: bool = True) -> np.ndarray:
         """
@@ -108,13 +479,102 @@ class EmbeddingGenerator:
         Returns:
             NxD embedding matrix (N texts, D dimensions)
         """
-        embeddings = self.model.encode(
-            texts,
-            batch_size=self.batch_size,
-            show_progress_bar=show_progress,
-            convert_to_numpy=True
-        )
+        return self._encode_with(self.model, texts, show_progress)
+    
+    def _encode_with(self, model, texts: List[str], show_progress: bool) -> np.ndarray:
+        """Encode texts with a model, chunk_size texts per call."""
+        try:
+            return self._encode_chunks(model, texts, show_progress)
+        except EmbeddingServiceError as e:
+            if not isinstance(model, RemoteModel):
+                raise
+            # The daemon went away: continue with a local copy of the model
+            logger.warning(f"{e}; loading {model.model_name} locally")
+            local = self._load_local(model.model_name)
+            if self.model is model:
+                self.model = local
+            if self.english_model is model:
+                self.english_model = local
+            return self._encode_chunks(local, texts, show_progress)
+    
+    def _encode_chunks(self, model, texts: List[str], show_progress: bool) -> np.ndarray:
+        """Encode texts with a model, chunk_size texts per call."""
+        if not self.chunk_size or len(texts) <= self.chunk_size:
+            with self._lock:
+                return model.encode(
+                    texts,
+                    batch_size=self.batch_size,
+                    show_progress_bar=show_progress,
+                    convert_to_numpy=True
+                )
+        
+        # Chunks are copied into one array, so the model's per-call buffers stay small
+        embeddings = None
+        for start in tqdm(range(0, len(texts), self.chunk_size), desc="Encoding", disable=not show_progress):
+            # Released between chunks, so threads sharing the generator take turns
+            with self._lock:
+                chunk = model.encode(
+                    texts[start:start + self.chunk_size],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False,
+                    convert_to_numpy=True
+                )
+            if embeddings is None:
+                embeddings = np.empty((len(texts), chunk.shape[1]), dtype=chunk.dtype)
+            embeddings[start:start + len(chunk)] = chunk
         return embeddings
+    
+    def _get_english_model(self):
+        """Load the English model on first use."""
+        with self._lock:
+            if self.english_model is None:
+                if self.service is not None:
+                    self.english_model = RemoteModel(self.service, self.english_model_name)
+                else:
+                    self.english_model = self._load_local(self.english_model_name)
+        return self.english_model
+    
+    def encode_by_script(self, texts: List[str],
+                         show_progress: bool = True) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Encode texts, routing pure-English rows to the English model.
+        
+        Rows whose only script is Latin (or that contain no letters) go to
+        english_model_name; Devanagari, Gurmukhi and mixed rows go to the
+        multilingual model. The two models produce different embedding
+        spaces, so the groups must be indexed and searched separately.
+        
+        Args:
+            texts: List of text strings
+            show_progress: Show progress bar
+        
+        Returns:
+            Dictionary mapping route ('english' / 'multilingual') to
+            (row positions, embedding matrix). Without an English model
+            everything is returned under 'multilingual'.
+        """
+        if not self.english_model_name:
+            return {'multilingual': (np.arange(len(texts)), self.encode(texts, show_progress))}
+        
+        scripts = detect_scripts(texts)
+        english_mask = np.isin(scripts, ['latin', 'none'])
+        routes = {
+            'english': (np.flatnonzero(english_mask), self._get_english_model()),
+            'multilingual': (np.flatnonzero(~english_mask), self.model),
+        }
+        
+        encoded = {}
+        for route, (positions, model) in routes.items():
+            if len(positions) == 0:
+                continue
+            start = time.perf_counter()
+            embeddings = self._encode_with(model, [texts[i] for i in positions], show_progress)
+            elapsed = time.perf_counter() - start
+            logger.info(f"Encoded {len(positions)} {route} texts in {elapsed:.1f}s "
+                        f"({len(positions) / max(elapsed, 1e-9):.0f} texts/s)")
+            encoded[route] = (positions, embeddings)
+        
+        return encoded
 
 
 def compute_cosine_similarity_matrix(embeddings: np.ndarray) -> np.ndarray:
@@ -131,25 +591,76 @@ def compute_cosine_similarity_matrix(embeddings: np.ndarray) -> np.ndarray:
 
 
 def find_similar_pairs(similarity_matrix: np.ndarray, 
-                      threshold: float = 0.85) -> List[Tuple[int, int, float]]:
+                      threshold: float = 0.85,
+                      score_stats=None,
+                      ids: Optional[np.ndarray] = None) -> List[Tuple[int, int, float]]:
     """
     Find pairs of similar items from similarity matrix.
     
     Args:
         similarity_matrix: NxN similarity matrix
         threshold: Minimum similarity threshold
+        score_stats: Optional ScoreStats fed with every scored pair
+        ids: Optional ids of the matrix rows; pairs are reported with these ids
     
     Returns:
         List of (index1, index2, similarity) tuples
     """
     n = similarity_matrix.shape[0]
+    if ids is None:
+        ids = np.arange(n)
     pairs = []
     
     for i in range(n):
-        for j in range(i + 1, n):
-            sim = similarity_matrix[i, j]
-            if sim >= threshold:
-                pairs.append((i, j, sim))
+        row = similarity_matrix[i, i + 1:]
+        cols = np.arange(i + 1, n)
+        if score_stats is not None:
+            score_stats.observe_many(np.full(len(cols), ids[i]), ids[cols], row)
+        for j in np.flatnonzero(row >= threshold):
+            pairs.append((int(ids[i]), int(ids[i + 1 + j]), row[j]))
+    
+    # Sort by similarity (descending)
+    pairs.sort(key=lambda x: x[2], reverse=True)
+    
+    return pairs
+
+
+def find_similar_pairs_blockwise(embeddings: np.ndarray, threshold: float = 0.85,
+                                 score_stats=None, ids: Optional[np.ndarray] = None,
+                                 block_rows: int = 1024) -> List[Tuple[int, int, float]]:
+    """
+    Find pairs of similar embeddings without building the NxN matrix.
+    
+    Scores block_rows rows against all later rows at a time, so memory is
+    bounded by block_rows x N similarities. Gives the same pairs as
+    find_similar_pairs(compute_cosine_similarity_matrix(embeddings)).
+    
+    Args:
+        embeddings: NxD embedding matrix
+        threshold: Minimum cosine similarity
+        score_stats: Optional ScoreStats fed with every scored pair
+        ids: Optional ids of the embedding rows; pairs are reported with these ids
+        block_rows: Rows scored per matrix product
+    
+    Returns:
+        List of (index1, index2, similarity) tuples sorted by similarity
+    """
+    n = embeddings.shape[0]
+    if ids is None:
+        ids = np.arange(n)
+    ids = np.asarray(ids)
+    pairs = []
+    
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        block = cosine_similarity(embeddings[start:stop], embeddings[start:])
+        for r in range(stop - start):
+            i = start + r
+            row = block[r, r + 1:]
+            if score_stats is not None:
+                score_stats.observe_many(np.full(len(row), ids[i]), ids[i + 1:], row)
+            for j in np.flatnonzero(row >= threshold):
+                pairs.append((int(ids[i]), int(ids[i + 1 + j]), row[j]))
     
     # Sort by similarity (descending)
     pairs.sort(key=lambda x: x[2], reverse=True)
@@ -172,3 +683,382 @@ def compute_semantic_similarity(text1: str, text2: str, model) -> float:
     embeddings = model.encode([text1, text2], show_progress=False)
     similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
     return float(similarity)
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize embeddings so that dot products equal cosine similarities.
+    
+    Args:
+        embeddings: NxD embedding matrix
+    
+    Returns:
+        NxD float32 matrix with unit-length rows (zero rows are left as zeros)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings.reshape(1, -1)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+class EmbeddingIndex:
+    """
+    Exact nearest-neighbour index over L2-normalized embeddings.
+    
+    Vectors are stored as one contiguous float32 matrix and searched in
+    chunks, so memory stays bounded by chunk_size x index size.
+    """
+    
+    def __init__(self, dim: Optional[int] = None, chunk_size: int = 1024):
+        """
+        Initialize an empty index.
+        
+        Args:
+            dim: Embedding dimension (inferred from the first add() if None)
+            chunk_size: Number of query rows scored per matrix multiplication
+        """
+        self.dim = dim
+        self.chunk_size = chunk_size
+        self.vectors = np.empty((0, dim or 0), dtype=np.float32)
+    
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+    
+    def add(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Add embeddings to the index.
+        
+        Args:
+            embeddings: NxD embedding matrix
+        
+        Returns:
+            Array of ids assigned to the added vectors
+        """
+        vectors = normalize_embeddings(embeddings)
+        if self.dim is None or len(self) == 0:
+            self.dim = vectors.shape[1]
+            self.vectors = self.vectors.reshape(0, self.dim)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+        
+        start = len(self)
+        self.vectors = np.vstack([self.vectors, vectors])
+        return np.arange(start, len(self))
+    
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k most similar indexed vectors for each query.
+        
+        Args:
+            queries: MxD query embedding matrix
+            k: Number of neighbours to return
+        
+        Returns:
+            Tuple of (scores, ids), both Mxk. Missing neighbours have id -1 and score -inf.
+        """
+        queries = normalize_embeddings(queries)
+        m = queries.shape[0]
+        scores = np.full((m, k), -np.inf, dtype=np.float32)
+        ids = np.full((m, k), -1, dtype=np.int64)
+        n = len(self)
+        if n == 0 or m == 0:
+            return scores, ids
+        
+        kk = min(k, n)
+        for start in range(0, m, self.chunk_size):
+            sims = queries[start:start + self.chunk_size] @ self.vectors.T
+            if kk < n:
+                top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+            else:
+                top = np.tile(np.arange(n), (sims.shape[0], 1))
+            top_scores = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            ids[start:start + sims.shape[0], :kk] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + sims.shape[0], :kk] = np.take_along_axis(top_scores, order, axis=1)
+        
+        return scores, ids
+    
+    def save(self, filepath: str):
+        """Save index vectors to a .npy file."""
+        np.save(filepath, self.vectors)
+    
+    @classmethod
+    def load(cls, filepath: str, chunk_size: int = 1024) -> "EmbeddingIndex":
+        """Load an index previously written with save()."""
+        vectors = np.load(filepath)
+        index = cls(dim=vectors.shape[1], chunk_size=chunk_size)
+        index.vectors = vectors.astype(np.float32, copy=False)
+        return index
+
+
+def ivf_list_count(n: int) -> int:
+    """Default number of IVF lists for n vectors (about sqrt(n))."""
+    return max(1, int(round(np.sqrt(max(n, 1)))))
+
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index over L2-normalized embeddings.
+    
+    Vectors are clustered into n_lists inverted lists by spherical k-means,
+    and a query is only scored against the vectors of its n_probe nearest
+    lists. With n_probe = n_lists the search is exact. Vectors are kept in
+    one growable float32 buffer, so repeated add() calls stay cheap.
+    
+    Usage:
+        index = IVFIndex(n_lists=256, n_probe=8)
+        index.add(embeddings)           # trains the lists on the first call
+        scores, ids = index.search(queries, k=1)
+    """
+    
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = 8, seed: int = 0,
+                 chunk_size: int = 1024):
+        """
+        Initialize an empty index.
+        
+        Args:
+            n_lists: Number of inverted lists (None = about sqrt of the first batch size)
+            n_probe: Lists searched per query
+            seed: Random seed for k-means initialization
+            chunk_size: Rows scored per matrix multiplication
+        """
+        if n_probe < 1:
+            raise ValueError(f"n_probe must be positive, got {n_probe}")
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.centroids = None
+        self._vectors = None
+        self._size = 0
+        self._members: List[List[int]] = []
+        self._member_arrays: Dict[int, np.ndarray] = {}
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def vectors(self) -> np.ndarray:
+        """Indexed vectors in id order."""
+        if self._vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._vectors[:self._size]
+    
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+    
+    def train(self, embeddings: np.ndarray, iterations: int = 10, max_train: int = 256):
+        """
+        Fit the list centroids by spherical k-means.
+        
+        Args:
+            embeddings: NxD training embeddings
+            iterations: k-means iterations
+            max_train: Training vectors used per list (a random subset beyond that)
+        """
+        vectors = normalize_embeddings(embeddings)
+        n = vectors.shape[0]
+        if n == 0:
+            raise ValueError("Cannot train an IVF index on zero vectors")
+        rng = np.random.default_rng(self.seed)
+        n_lists = min(self.n_lists or ivf_list_count(n), n)
+        if n > n_lists * max_train:
+            vectors = vectors[np.sort(rng.choice(n, n_lists * max_train, replace=False))]
+        
+        centroids = vectors[rng.choice(vectors.shape[0], n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = self._nearest(vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            counts = np.bincount(assign, minlength=n_lists)
+            # Lists that lost all their vectors are reseeded from random vectors
+            empty = np.flatnonzero(counts == 0)
+            sums[empty] = vectors[rng.choice(vectors.shape[0], len(empty))]
+            centroids = normalize_embeddings(sums)
+        
+        self.n_lists = n_lists
+        self.centroids = centroids
+        self._members = [[] for _ in range(n_lists)]
+        self._member_arrays = {}
+    
+    def _nearest(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Index of the closest centroid of each vector."""
+        assign = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], self.chunk_size):
+            assign[start:start + self.chunk_size] = np.argmax(
+                vectors[start:start + self.chunk_size] @ centroids.T, axis=1)
+        return assign
+    
+    def probe(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Lists searched for each query.
+        
+        Args:
+            queries: MxD L2-normalized query embeddings
+        
+        Returns:
+            M x n_probe array of list numbers, nearest list first
+        """
+        n_probe = min(self.n_probe, self.n_lists)
+        lists = np.empty((queries.shape[0], n_probe), dtype=np.int64)
+        for start in range(0, queries.shape[0], self.chunk_size):
+            sims = queries[start:start + self.chunk_size] @ self.centroids.T
+            if n_probe < self.n_lists:
+                top = np.argpartition(-sims, n_probe - 1, axis=1)[:, :n_probe]
+            else:
+                top = np.tile(np.arange(self.n_lists), (sims.shape[0], 1))
+            order = np.argsort(-np.take_along_axis(sims, top, axis=1), axis=1, kind='stable')
+            lists[start:start + sims.shape[0]] = np.take_along_axis(top, order, axis=1)
+        return lists
+    
+    def members(self, list_no: int) -> np.ndarray:
+        """Ids of the vectors in an inverted list, ascending."""
+        array = self._member_arrays.get(list_no)
+        if array is None:
+            array = np.asarray(self._members[list_no], dtype=np.int64)
+            self._member_arrays[list_no] = array
+        return array
+    
+    def add(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Add embeddings to the index, training it on the first batch.
+        
+        Args:
+            embeddings: NxD embedding matrix
+        
+        Returns:
+            Array of ids assigned to the added vectors
+        """
+        vectors = normalize_embeddings(embeddings)
+        if vectors.shape[0] == 0:
+            return np.empty(0, dtype=np.int64)
+        if not self.is_trained:
+            self.train(vectors)
+        if vectors.shape[1] != self.centroids.shape[1]:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match "
+                             f"index dimension {self.centroids.shape[1]}")
+        
+        start, stop = self._size, self._size + vectors.shape[0]
+        if self._vectors is None or stop > self._vectors.shape[0]:
+            # Grow the buffer geometrically so n adds copy O(n) vectors overall
+            capacity = max(stop, 2 * (self._vectors.shape[0] if self._vectors is not None else 0), 1024)
+            grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            if self._vectors is not None:
+                grown[:start] = self._vectors[:start]
+            self._vectors = grown
+        self._vectors[start:stop] = vectors
+        self._size = stop
+        
+        assign = self._nearest(vectors, self.centroids)
+        for offset, list_no in enumerate(assign.tolist()):
+            self._members[list_no].append(start + offset)
+        for list_no in np.unique(assign).tolist():
+            self._member_arrays.pop(list_no, None)
+        return np.arange(start, stop)
+    
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find (approximately) the k most similar indexed vectors for each query.
+        
+        Args:
+            queries: MxD query embedding matrix
+            k: Number of neighbours to return
+        
+        Returns:
+            Tuple of (scores, ids), both Mxk. Missing neighbours have id -1 and score -inf.
+        """
+        queries = normalize_embeddings(queries)
+        m = queries.shape[0]
+        scores = np.full((m, k), -np.inf, dtype=np.float32)
+        ids = np.full((m, k), -1, dtype=np.int64)
+        if len(self) == 0 or m == 0:
+            return scores, ids
+        
+        lists = self.probe(queries)
+        for list_no in np.unique(lists).tolist():
+            members = self.members(list_no)
+            if len(members) == 0:
+                continue
+            query_rows = np.flatnonzero((lists == list_no).any(axis=1))
+            for start in range(0, len(query_rows), self.chunk_size):
+                rows = query_rows[start:start + self.chunk_size]
+                sims = queries[rows] @ self._vectors[members].T
+                kk = min(k, len(members))
+                top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk] if kk < len(members) \
+                    else np.tile(np.arange(len(members)), (len(rows), 1))
+                # Merge this list's best candidates into the running top k
+                all_scores = np.hstack([scores[rows], np.take_along_axis(sims, top, axis=1)])
+                all_ids = np.hstack([ids[rows], members[top]])
+                order = np.argsort(-all_scores, axis=1, kind='stable')[:, :k]
+                scores[rows] = np.take_along_axis(all_scores, order, axis=1)
+                ids[rows] = np.take_along_axis(all_ids, order, axis=1)
+        
+        return scores, ids
+
+
+def find_similar_pairs_ivf(embeddings: np.ndarray, threshold: float = 0.85,
+                           n_lists: Optional[int] = None, n_probe: int = 8,
+                           score_stats=None, ids: Optional[np.ndarray] = None,
+                           block_rows: int = 1024, seed: int = 0) -> Tuple[List[Tuple[int, int, float]], int]:
+    """
+    Find pairs of similar embeddings with an IVF index instead of all pairs.
+    
+    Each vector is scored only against the later vectors in its n_probe
+    nearest lists, so roughly n_probe / n_lists of all pairs are compared.
+    Pairs whose vectors never share a probed list are missed; with
+    n_probe = n_lists the result equals find_similar_pairs_blockwise().
+    
+    Args:
+        embeddings: NxD embedding matrix
+        threshold: Minimum cosine similarity
+        n_lists: Number of IVF lists (None = about sqrt(N))
+        n_probe: Lists searched per vector
+        score_stats: Optional ScoreStats fed with every scored pair
+        ids: Optional ids of the embedding rows; pairs are reported with these ids
+        block_rows: Query rows scored per matrix product
+        seed: Random seed for k-means initialization
+    
+    Returns:
+        Tuple of (pairs sorted by similarity, number of pairs compared)
+    """
+    n = embeddings.shape[0]
+    if ids is None:
+        ids = np.arange(n)
+    ids = np.asarray(ids)
+    if n < 2:
+        return [], 0
+    
+    index = IVFIndex(n_lists=n_lists, n_probe=n_probe, seed=seed, chunk_size=block_rows)
+    index.add(embeddings)
+    vectors = index.vectors
+    lists = index.probe(vectors)
+    
+    # Every vector sits in exactly one list, so a pair (i, j) is scored at
+    # most once: in j's list, if i probes it
+    pairs = []
+    comparisons = 0
+    for list_no in range(index.n_lists):
+        members = index.members(list_no)
+        if len(members) == 0:
+            continue
+        query_rows = np.flatnonzero((lists == list_no).any(axis=1))
+        for start in range(0, len(query_rows), block_rows):
+            rows = query_rows[start:start + block_rows]
+            sims = vectors[rows] @ vectors[members].T
+            later = members[None, :] > rows[:, None]
+            r_idx, c_idx = np.nonzero(later)
+            if len(r_idx) == 0:
+                continue
+            i_idx, j_idx = rows[r_idx], members[c_idx]
+            values = sims[r_idx, c_idx]
+            comparisons += len(values)
+            if score_stats is not None:
+                score_stats.observe_many(ids[i_idx], ids[j_idx], values)
+            for k in np.flatnonzero(values >= threshold):
+                pairs.append((int(ids[i_idx[k]]), int(ids[j_idx[k]]), values[k]))
+    
+    pairs.sort(key=lambda x: x[2], reverse=True)
+    return pairs, comparisons
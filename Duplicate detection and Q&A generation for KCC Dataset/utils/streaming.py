@@ -0,0 +1,423 @@
+"""
+Streaming deduplication: record batches in, keep/drop decisions out.
+
+Rows arrive as NDJSON or CSV on a text stream and are decided a batch at a
+time against everything seen before. A StreamIndex holds a map from
+normalized-text hash to cluster id (exact matches) and an ANN index of the
+embeddings of each cluster's representative (semantic matches), so memory
+grows with the number of unique questions, not with the number of rows.
+
+BoundedPipeline runs the steps of a streaming run (read, normalize and
+encode, search, write) on their own threads, connected by bounded queues.
+"""
+
+import csv
+import itertools
+import json
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .similarity import EmbeddingIndex, IVFIndex, normalize_embeddings
+
+logger = logging.getLogger(__name__)
+
+STREAM_FORMATS = ('ndjson', 'csv')
+
+# Fields added to every output record
+DECISION_FIELDS = ['decision', 'cluster_id', 'match', 'similarity']
+
+# Seconds a pipeline thread waits on a queue before checking for cancellation
+_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class _Failed:
+    """Exception raised in a pipeline thread, passed downstream in place of an item."""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class BoundedPipeline:
+    """
+    Steps of a streaming run on their own threads, connected by bounded queues.
+    
+    Each step is one thread that takes items from the previous step, in
+    order, and puts its results on a queue of queue_size items. Busy
+    seconds per step (time spent producing, not waiting) are kept in
+    busy. A step waits while its queue is full, so at most about
+    (queue_size + 1) items per step are held at a time, and reading, CPU
+    work, BLAS and writing overlap. An exception in any step is re-raised where the
+    results are consumed; close() stops all steps.
+    
+    Usage:
+        pipeline = BoundedPipeline(queue_size=2)
+        chunks = pipeline.source('read', read_chunks())
+        encoded = pipeline.stage('encode', encode, chunks)
+        try:
+            for result in encoded:
+                ...
+        finally:
+            pipeline.close()
+    """
+    
+    def __init__(self, queue_size: int = 2):
+        """
+        Initialize pipeline.
+        
+        Args:
+            queue_size: Items buffered between two steps
+        """
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be positive, got {queue_size}")
+        self.queue_size = queue_size
+        self.busy: Dict[str, float] = {}
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+    
+    def source(self, name: str, items: Iterable) -> Iterator:
+        """
+        Step producing the items of an iterable (e.g. chunks read from disk).
+        
+        Args:
+            name: Step name (for busy times and the thread name)
+            items: Iterable to read on the step's thread
+        
+        Returns:
+            Iterator over the items
+        """
+        def produce() -> Iterator:
+            items_iter = iter(items)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items_iter)
+                except StopIteration:
+                    return
+                self.busy[name] += time.perf_counter() - start
+                yield item
+        
+        return self._start(name, produce)
+    
+    def stage(self, name: str, fn: Callable, items: Iterator) -> Iterator:
+        """
+        Step applying fn to every item of the previous step.
+        
+        Args:
+            name: Step name (for busy times and the thread name)
+            fn: Function applied to each item
+            items: Iterator returned by source() or stage()
+        
+        Returns:
+            Iterator over fn's results, in input order
+        """
+        def produce() -> Iterator:
+            for item in items:
+                start = time.perf_counter()
+                result = fn(item)
+                self.busy[name] += time.perf_counter() - start
+                yield result
+        
+        return self._start(name, produce)
+    
+    def _start(self, name: str, produce: Callable[[], Iterator]) -> Iterator:
+        """Run produce() on a new thread and return an iterator over its queued results."""
+        out = queue.Queue(maxsize=self.queue_size)
+        self.busy[name] = 0.0
+        
+        def put(item) -> bool:
+            while not self._stopped.is_set():
+                try:
+                    out.put(item, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def run():
+            try:
+                for result in produce():
+                    if not put(result):
+                        return
+                put(_DONE)
+            except BaseException as e:
+                put(_Failed(e))
+        
+        thread = threading.Thread(target=run, name=f'pipeline-{name}', daemon=True)
+        self._threads.append(thread)
+        thread.start()
+        
+        def results() -> Iterator:
+            while not self._stopped.is_set():
+                try:
+                    item = out.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failed):
+                    raise item.error
+                yield item
+        
+        return results()
+    
+    def close(self):
+        """Stop all steps and wait for their threads."""
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def read_record_batches(stream: TextIO, batch_size: int,
+                        input_format: str = 'auto') -> Tuple[str, Iterator[List[dict]]]:
+    """
+    Read records from a text stream in batches.
+    
+    Args:
+        stream: Input stream (e.g. sys.stdin)
+        batch_size: Records per batch
+        input_format: "ndjson", "csv" (with a header row), or "auto" to
+            detect from the first line ("{" = NDJSON)
+    
+    Returns:
+        Tuple of (detected format, iterator over lists of record dicts)
+    """
+    first = stream.readline()
+    if input_format == 'auto':
+        input_format = 'ndjson' if first.lstrip().startswith('{') else 'csv'
+    if input_format not in STREAM_FORMATS:
+        raise ValueError(f"Unknown stream format: {input_format} (expected one of {STREAM_FORMATS})")
+    lines = itertools.chain([first], stream) if first else iter(())
+    
+    if input_format == 'ndjson':
+        records = (json.loads(line) for line in lines if line.strip())
+    else:
+        records = csv.DictReader(lines)
+    
+    def batches() -> Iterator[List[dict]]:
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                return
+            yield batch
+    
+    return input_format, batches()
+
+
+class RecordWriter:
+    """
+    Write decided records to a text stream as NDJSON or CSV, flushing after
+    every batch so downstream readers see decisions as soon as they are made.
+    """
+    
+    def __init__(self, stream: TextIO, output_format: str):
+        """
+        Initialize writer.
+        
+        Args:
+            stream: Output stream (e.g. sys.stdout)
+            output_format: "ndjson" or "csv"
+        """
+        if output_format not in STREAM_FORMATS:
+            raise ValueError(f"Unknown stream format: {output_format} (expected one of {STREAM_FORMATS})")
+        self.stream = stream
+        self.output_format = output_format
+        self._csv_writer = None
+    
+    def write(self, records: List[dict]):
+        """Write a batch of records and flush."""
+        if self.output_format == 'ndjson':
+            for record in records:
+                self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        elif records:
+            if self._csv_writer is None:
+                # Header from the first record: the input columns plus the decision fields
+                self._csv_writer = csv.DictWriter(self.stream, fieldnames=list(records[0].keys()),
+                                                  extrasaction='ignore', lineterminator='\n')
+                self._csv_writer.writeheader()
+            self._csv_writer.writerows(records)
+        self.stream.flush()
+
+
+class StreamIndex:
+    """
+    Exact-hash map plus ANN index of the clusters seen so far in a stream.
+    
+    The first row of a new question starts a cluster and is kept; later
+    rows with the same normalized text (exact) or an embedding within
+    threshold of a cluster representative (semantic) join that cluster and
+    are dropped. Representatives are searched exactly until train_size of
+    them have been seen, then an IVF index is trained on them and used from
+    there on. The IVF lists are retrained on all representatives whenever
+    their number has grown retrain_factor times since the last training, so
+    the lists keep up with the stream's topics and n_lists (when not set)
+    keeps growing with about the square root of the index size.
+    
+    Usage:
+        index = StreamIndex(threshold=0.88)
+        positions = index.candidates(hashes)          # rows that need embeddings
+        clusters, match, similarity = index.assign(hashes, embeddings, positions)
+    """
+    
+    def __init__(self, threshold: Optional[float] = None, n_lists: Optional[int] = None, n_probe: int = 8,
+                 train_size: int = 10000, chunk_size: int = 1024,
+                 retrain_factor: Optional[float] = 2.0):
+        """
+        Initialize an empty index.
+        
+        Args:
+            threshold: Cosine similarity threshold for a semantic match (None = exact matching only)
+            n_lists: IVF lists (None = about sqrt(train_size))
+            n_probe: IVF lists searched per query
+            train_size: Representatives searched exactly before the IVF index is trained
+            chunk_size: Rows scored per matrix multiplication
+            retrain_factor: Retrain the IVF index each time it grows by this factor
+                (None = train once)
+        """
+        if retrain_factor is not None and retrain_factor <= 1:
+            raise ValueError(f"retrain_factor must be greater than 1, got {retrain_factor}")
+        self.threshold = threshold
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size
+        self.chunk_size = chunk_size
+        self.retrain_factor = retrain_factor
+        self.trained_size = 0
+        self.clusters: Dict[int, int] = {}
+        self.n_clusters = 0
+        self.index = EmbeddingIndex(chunk_size=chunk_size)
+        self.representative_clusters = np.empty(0, dtype=np.int64)
+    
+    def __len__(self) -> int:
+        return self.n_clusters
+    
+    def candidates(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Rows of a batch that may start a new cluster and so need embeddings:
+        the first row of each hash not seen before.
+        
+        Args:
+            hashes: uint64 normalized-text hashes of the batch's valid rows
+        
+        Returns:
+            Ascending row positions
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        _, first = np.unique(hashes, return_index=True)
+        first = np.sort(first)
+        return first[[int(h) not in self.clusters for h in hashes[first]]].astype(np.int64)
+    
+    def assign(self, hashes: np.ndarray, embeddings: Optional[np.ndarray] = None,
+               positions: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Assign a batch of rows to clusters and add its new clusters to the index.
+        
+        Args:
+            hashes: uint64 normalized-text hashes of the batch's valid rows
+            embeddings: Embeddings of the rows at positions (None = exact matching only)
+            positions: Rows the embeddings belong to (from candidates(), possibly
+                computed before an earlier batch was assigned)
+        
+        Returns:
+            Tuple of (cluster id per row, match per row: "new", "exact" or
+            "semantic", similarity per row: 1.0 for exact, the cosine
+            similarity for semantic, NaN for new)
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        n = len(hashes)
+        cluster_ids = np.full(n, -1, dtype=np.int64)
+        match = np.full(n, 'exact', dtype=object)
+        similarity = np.ones(n, dtype=np.float64)
+        
+        known = np.array([self.clusters.get(int(h), -1) for h in hashes], dtype=np.int64)
+        cluster_ids[known >= 0] = known[known >= 0]
+        
+        # First row of each hash new to the index decides for its repeats in the batch
+        codes, _ = pd.factorize(hashes)
+        _, first = np.unique(codes, return_index=True)
+        first = np.sort(first)
+        first = first[known[first] < 0]
+        
+        if len(first) > 0:
+            if embeddings is not None and self.threshold is not None:
+                row_of = {int(p): k for k, p in enumerate(np.asarray(positions))}
+                missing = [int(p) for p in first if int(p) not in row_of]
+                if missing:
+                    raise ValueError(f"No embeddings for {len(missing)} new rows (positions {missing[:5]})")
+                vectors = normalize_embeddings(np.asarray(embeddings)[[row_of[int(p)] for p in first]])
+                first_clusters, first_match, first_similarity = self._assign_semantic(vectors)
+            else:
+                first_clusters = self.n_clusters + np.arange(len(first))
+                self.n_clusters += len(first)
+                first_match = np.full(len(first), 'new', dtype=object)
+                first_similarity = np.full(len(first), np.nan)
+            cluster_ids[first] = first_clusters
+            match[first] = first_match
+            similarity[first] = first_similarity
+            for p, cid in zip(first.tolist(), first_clusters.tolist()):
+                self.clusters[int(hashes[p])] = cid
+        
+        # Repeats of a new hash within the batch are exact matches of its first row
+        unresolved = cluster_ids < 0
+        cluster_ids[unresolved] = [self.clusters[int(h)] for h in hashes[unresolved]]
+        return cluster_ids, match, similarity
+    
+    def _assign_semantic(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Clusters of new questions: a known representative within threshold, an earlier new question, or a new cluster."""
+        m = vectors.shape[0]
+        clusters = np.full(m, -1, dtype=np.int64)
+        match = np.full(m, 'new', dtype=object)
+        similarity = np.full(m, np.nan)
+        
+        if len(self.index) > 0:
+            scores, ids = self.index.search(vectors, k=1)
+            hit = (ids[:, 0] >= 0) & (scores[:, 0] >= self.threshold)
+            clusters[hit] = self.representative_clusters[ids[hit, 0]]
+            match[hit] = 'semantic'
+            similarity[hit] = scores[hit, 0]
+        
+        # Within the batch, a question joins the most similar earlier new representative
+        rest = np.flatnonzero(clusters < 0)
+        representatives = []
+        for start in range(0, len(rest), self.chunk_size):
+            rows = rest[start:start + self.chunk_size]
+            sims = vectors[rows] @ vectors[rest].T
+            for r, i in enumerate(rows):
+                if representatives:
+                    rep_sims = sims[r, np.searchsorted(rest, representatives)]
+                    best = int(np.argmax(rep_sims))
+                    if rep_sims[best] >= self.threshold:
+                        clusters[i] = clusters[representatives[best]]
+                        match[i] = 'semantic'
+                        similarity[i] = rep_sims[best]
+                        continue
+                clusters[i] = self.n_clusters
+                self.n_clusters += 1
+                representatives.append(i)
+        
+        if representatives:
+            self._add_representatives(vectors[representatives], clusters[representatives])
+        return clusters, match, similarity
+    
+    def _add_representatives(self, vectors: np.ndarray, clusters: np.ndarray):
+        """Index new representatives, switching to IVF once train_size are indexed and retraining as it grows."""
+        self.index.add(vectors)
+        self.representative_clusters = np.concatenate([self.representative_clusters, clusters])
+        if isinstance(self.index, EmbeddingIndex):
+            train = len(self.index) >= self.train_size
+        else:
+            train = (self.retrain_factor is not None
+                     and len(self.index) >= self.retrain_factor * self.trained_size)
+        if train:
+            logger.info(f"Training IVF index on {len(self.index)} representatives")
+            ivf = IVFIndex(n_lists=self.n_lists, n_probe=self.n_probe, chunk_size=self.chunk_size)
+            ivf.add(self.index.vectors)
+            self.index = ivf
+            self.trained_size = len(ivf)
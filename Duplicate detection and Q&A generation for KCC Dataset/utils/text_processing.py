@@ -3,9 +3,28 @@ Text processing utilities for question deduplication.
 Handles normalization, cleaning, and preprocessing of text data.
 """
 
+import hashlib
 import re
 import unicodedata
-from typing import List, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Precompiled patterns shared by the per-row and batch normalizers
+_WHITESPACE_RE = re.compile(r'\s+')
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_WORD_CHAR_RE = re.compile(r'\w')
+
+QUESTION_PREFIXES = ('question:', 'query:', 'q:', 'प्रश्न:')
+
+# Unicode blocks used for script detection
+SCRIPT_PATTERNS = {
+    'latin': re.compile(r'[A-Za-z\u00C0-\u024F]'),
+    'devanagari': re.compile(r'[\u0900-\u097F]'),
+    'gurmukhi': re.compile(r'[\u0A00-\u0A7F]'),
+}
 
 
 def normalize_text(text: str, 
@@ -39,12 +58,12 @@ def normalize_text(text: str,
     
     # Remove extra whitespace
     if remove_extra_whitespace:
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         text = text.strip()
     
     # Remove punctuation (optional)
     if remove_punctuation:
-        text = re.sub(r'[^\w\s]', '', text)
+        text = _PUNCTUATION_RE.sub('', text)
     
     return text
 
@@ -73,19 +92,18 @@ def clean_question(text: str) -> str:
     Returns:
         Cleaned question text
     """
-    # Normalize
-    text = normalize_text(text)
-    
+    return _strip_question_affixes(normalize_text(text))
+
+
+def _strip_question_affixes(text: str) -> str:
+    """Remove question prefixes and trailing question marks from normalized text."""
     # Remove common prefixes/suffixes
-    prefixes = ['question:', 'query:', 'q:', 'प्रश्न:']
-    for prefix in prefixes:
+    for prefix in QUESTION_PREFIXES:
         if text.startswith(prefix):
             text = text[len(prefix):].strip()
     
     # Remove question marks at the end (for comparison purposes)
-    text = text.rstrip('?')
-    
-    return text
+    return text.rstrip('?')
 
 
 def extract_keywords(text: str, min_length: int = 3) -> List[str]:
@@ -132,7 +150,179 @@ def is_valid_question(text: str, min_length: int = 10, max_length: int = 500) ->
         return False
     
     # Check if it's not just whitespace or special characters
-    if not re.search(r'\w', text):
+    if not _WORD_CHAR_RE.search(text):
         return False
     
     return True
+
+
+def detect_script(text: str) -> str:
+    """
+    Detect which writing system a text uses.
+    
+    Args:
+        text: Input text
+    
+    Returns:
+        'latin', 'devanagari' or 'gurmukhi' if only that script occurs,
+        'mixed' if several occur, 'none' if no letters of these scripts occur
+    """
+    if not isinstance(text, str):
+        return 'none'
+    found = [name for name, pattern in SCRIPT_PATTERNS.items() if pattern.search(text)]
+    if not found:
+        return 'none'
+    return found[0] if len(found) == 1 else 'mixed'
+
+
+def detect_scripts(texts) -> np.ndarray:
+    """
+    Detect the script of every text in a column.
+    
+    Runs one vectorized regex scan per script instead of a per-row Python call.
+    
+    Args:
+        texts: List or Series of texts
+    
+    Returns:
+        Array of labels as returned by detect_script()
+    """
+    # Object dtype keeps Python's regex engine (Arrow-backed strings use RE2, which rejects \\u escapes)
+    values = pd.Series(texts, dtype=object).fillna('').astype(str).astype(object)
+    found = {name: values.str.contains(pattern).to_numpy() for name, pattern in SCRIPT_PATTERNS.items()}
+    n_found = sum(mask.astype(int) for mask in found.values()) if found else np.zeros(len(values), dtype=int)
+    
+    labels = np.full(len(values), 'none', dtype=object)
+    for name, mask in found.items():
+        labels[mask & (n_found == 1)] = name
+    labels[n_found > 1] = 'mixed'
+    return labels
+
+
+def _normalize_question_record(text: str) -> Tuple[bool, str, str]:
+    """Compute (is_valid, normalized, cleaned) for one question string."""
+    normalized = normalize_text(text)
+    return is_valid_question(text), normalized, _strip_question_affixes(normalized)
+
+
+def normalize_questions(values: pd.Series, n_jobs: int = 1, chunk_size: int = 1000,
+                        executor: Optional[Executor] = None) -> pd.DataFrame:
+    """
+    Normalize a question column, processing each distinct value only once.
+    
+    The column is factorized, every unique string is validated, normalized
+    and cleaned in a single pass (optionally across a process pool), and
+    the results are broadcast back to all rows. KCC files repeat the same
+    question many times, so this is much cheaper than per-row apply().
+    
+    Args:
+        values: Series of raw question text
+        n_jobs: Number of worker processes (1 = in-process, -1 = all cores)
+        chunk_size: Unique values sent to a worker per task
+        executor: Shared process pool to use instead of starting one
+            (then used whatever n_jobs is)
+    
+    Returns:
+        DataFrame with the same index as values and columns
+        'valid' (bool), 'normalized' (normalize_text), 'cleaned' (clean_question)
+        and 'hash' (uint64 hash_texts of the normalized text).
+        Missing and non-string values (e.g. numbers) are invalid and
+        normalize to "", as in normalize_text() and is_valid_question().
+    """
+    codes, uniques = pd.factorize(values)
+    is_text = np.array([isinstance(u, str) for u in uniques], dtype=bool)
+    unique_texts = [u for u, text in zip(uniques, is_text) if text]
+    
+    if executor is not None and len(unique_texts) > chunk_size:
+        records = list(executor.map(_normalize_question_record, unique_texts, chunksize=chunk_size))
+    elif n_jobs != 1 and len(unique_texts) > chunk_size:
+        max_workers = None if n_jobs < 0 else n_jobs
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            records = list(executor.map(_normalize_question_record, unique_texts, chunksize=chunk_size))
+    else:
+        records = [_normalize_question_record(t) for t in unique_texts]
+    
+    # Non-string uniques keep the invalid defaults; the extra slot at the end
+    # holds the result for missing values (code -1)
+    valid = np.zeros(len(uniques) + 1, dtype=bool)
+    normalized = np.full(len(uniques) + 1, "", dtype=object)
+    cleaned = np.full(len(uniques) + 1, "", dtype=object)
+    text_slots = np.flatnonzero(is_text)
+    if len(records):
+        valid[text_slots] = [r[0] for r in records]
+        normalized[text_slots] = [r[1] for r in records]
+        cleaned[text_slots] = [r[2] for r in records]
+    hashes = hash_texts(normalized)
+    
+    return pd.DataFrame({
+        'valid': valid[codes],
+        'normalized': normalized[codes],
+        'cleaned': cleaned[codes],
+        'hash': hashes[codes]
+    }, index=values.index)
+
+
+def hash_texts(texts) -> np.ndarray:
+    """
+    Stable 64-bit content hashes of texts.
+    
+    Uses an 8-byte BLAKE2b digest, so hashes are identical across processes
+    and runs (unlike Python's salted hash()) and can be persisted. Each
+    distinct text is hashed once.
+    
+    Args:
+        texts: Iterable or Series of strings
+    
+    Returns:
+        uint64 array with one hash per text
+    """
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(str(t).encode('utf-8'), digest_size=8).digest(), 'little')
+         for t in uniques),
+        dtype=np.uint64, count=len(uniques)
+    )
+    # Missing values (code -1) hash like the empty string
+    empty = int.from_bytes(hashlib.blake2b(b'', digest_size=8).digest(), 'little')
+    return np.append(hashes, np.uint64(empty))[codes]
+
+
+def find_exact_matches(texts, reference_texts) -> np.ndarray:
+    """
+    Find the first reference text equal to each text by joining on 64-bit hashes.
+    
+    Hash hits are verified against the texts themselves, so a hash collision
+    can never produce a false match. Texts whose hash hit a different
+    reference text are looked up by text, so a collision cannot hide a
+    true match either.
+    
+    Args:
+        texts: Iterable of (already normalized) texts to look up
+        reference_texts: Iterable of (already normalized) reference texts
+    
+    Returns:
+        int64 array with the position of the first equal reference text per
+        text, or -1 where there is none
+    """
+    texts = pd.Series(texts, dtype=object).to_numpy()
+    reference_texts = pd.Series(reference_texts, dtype=object).to_numpy()
+    matches = np.full(len(texts), -1, dtype=np.int64)
+    if len(texts) == 0 or len(reference_texts) == 0:
+        return matches
+    
+    reference_hashes, first = np.unique(hash_texts(reference_texts), return_index=True)
+    hashes = hash_texts(texts)
+    positions = np.minimum(np.searchsorted(reference_hashes, hashes), len(reference_hashes) - 1)
+    hit = np.flatnonzero(reference_hashes[positions] == hashes)
+    candidates = first[positions[hit]]
+    
+    same = reference_texts[candidates] == texts[hit]
+    matches[hit[same]] = candidates[same]
+    
+    collided = hit[~same]
+    if len(collided):
+        first_by_text = {}
+        for position, text in enumerate(reference_texts):
+            first_by_text.setdefault(text, position)
+        matches[collided] = [first_by_text.get(text, -1) for text in texts[collided]]
+    return matches
@@ -1,4 +1,10 @@
 import pandas as pd
+import sys
+from pathlib import Path
+
+# Shared keyword taxonomy engine lives in the KCC Dataset root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from taxonomy import KeywordTaxonomy
 
 # ==========================
 # CONFIG
@@ -34,13 +40,10 @@ TOPIC_RULES = {
     ]
 }
 
+TOPIC_TAXONOMY = KeywordTaxonomy(TOPIC_RULES)
+
 def infer_topic(text):
-    text = str(text).lower()
-    for topic, keywords in TOPIC_RULES.items():
-        for kw in keywords:
-            if kw in text:
-                return topic
-    return "Other"
+    return TOPIC_TAXONOMY.classify(text, default="Other")
 
 # ==========================
 # LOAD DATA
@@ -60,9 +63,10 @@ print("Creating topics...")
 if SUBTOPIC_COL not in df.columns:
     df[SUBTOPIC_COL] = ""
     
-df["Topic"] = (
-    df[SUBTOPIC_COL].fillna("") + " " + df[QUESTION_COL].fillna("")
-).apply(infer_topic)
+df["Topic"] = TOPIC_TAXONOMY.classify_column(
+    df[SUBTOPIC_COL].fillna("") + " " + df[QUESTION_COL].fillna(""),
+    default="Other"
+)
 
 # ==========================
 # SORT DATA
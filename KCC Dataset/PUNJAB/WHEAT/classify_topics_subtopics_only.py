@@ -1,4 +1,10 @@
 import pandas as pd
+import sys
+from pathlib import Path
+
+# Shared keyword taxonomy engine lives in the KCC Dataset root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from taxonomy import KeywordTaxonomy
 
 # ==========================
 # CONFIG
@@ -73,23 +79,15 @@ TOPIC_SUBTOPIC_KEYWORDS = {
 # ==========================
 # FUNCTIONS
 # ==========================
+TOPIC_SUBTOPIC_TAXONOMY = KeywordTaxonomy(TOPIC_SUBTOPIC_KEYWORDS)
+
 def classify_topic_subtopic(query_text):
     """
     Classify query into Topic and Subtopic based on keywords.
-    Returns (Topic, Subtopic)
+    Returns (Topic, Subtopic) of the first matching subtopic in dictionary order.
     If no match found, returns ('OTHER', 'OTHER')
     """
-    query_lower = str(query_text).lower()
-    
-    # Check each topic and its subtopics
-    for topic, subtopics_dict in TOPIC_SUBTOPIC_KEYWORDS.items():
-        for subtopic, keywords in subtopics_dict.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    return (topic, subtopic)
-    
-    # If no keywords matched, classify as OTHER
-    return ('OTHER', 'OTHER')
+    return TOPIC_SUBTOPIC_TAXONOMY.classify(query_text, default=('OTHER', 'OTHER'))
 
 # ==========================
 # LOAD DATA
@@ -102,9 +100,8 @@ print(f"Loaded {len(df)} questions")
 # CLASSIFY INTO TOPICS & SUBTOPICS
 # ==========================
 print("Classifying into Topics and Subtopics...")
-df[['Topic', 'Subtopic']] = df['QueryText'].apply(
-    lambda x: pd.Series(classify_topic_subtopic(x))
-)
+topic_subtopic = TOPIC_SUBTOPIC_TAXONOMY.classify_column(df['QueryText'], default=('OTHER', 'OTHER'))
+df[['Topic', 'Subtopic']] = pd.DataFrame(topic_subtopic.tolist(), index=df.index)
 
 # Show distribution
 print(f"\nTopic Distribution:")
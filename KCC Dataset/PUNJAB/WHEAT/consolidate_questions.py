@@ -2,6 +2,12 @@ import pandas as pd
 from difflib import SequenceMatcher
 import re
 import os
+import sys
+from pathlib import Path
+
+# Shared keyword taxonomy engine lives in the KCC Dataset root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from taxonomy import KeywordTaxonomy
 
 input_file = r"D:\Kanak Data\OS Folders\Documents\KCC Dataset filtering\kcc dataset part- 1\PUNJAB_COTTON_KAPAS_QUERIES.csv"
 output_file = r"D:\Kanak Data\OS Folders\Documents\KCC Dataset filtering\kcc dataset part- 1\PUNJAB_COTTON_KAPAS_QUERIES_consolidated_SIMILARITY_MERGED.csv"
@@ -31,28 +37,22 @@ topic_keywords = {
     'General Practice': ['information', 'advisory', 'practice', 'method', 'technique', 'timing', 'schedule']
 }
 
+topic_taxonomy = KeywordTaxonomy(topic_keywords)
+
 def classify_topic(query_text):
     """Classify query into topic based on keywords"""
-    query_lower = str(query_text).lower()
-    
-    # Check each topic's keywords
-    for topic, keywords in topic_keywords.items():
-        for keyword in keywords:
-            if keyword in query_lower:
-                return topic
-    
-    return 'OTHER'
+    return topic_taxonomy.classify(query_text, default='OTHER')
 
 # Add Topic column - classify based on QueryText content
 if 'Topic' not in df.columns:
     print("Classifying topics from query text...")
-    df['Topic'] = df['QueryText'].apply(classify_topic)
+    df['Topic'] = topic_taxonomy.classify_column(df['QueryText'], default='OTHER')
     print("Created Topic column from query content")
 else:
     # If Topic exists but is all "OTHER", reclassify
     if (df['Topic'] == 'OTHER').all():
         print("Reclassifying OTHER topics from query text...")
-        df['Topic'] = df['QueryText'].apply(classify_topic)
+        df['Topic'] = topic_taxonomy.classify_column(df['QueryText'], default='OTHER')
 
 # Show topic distribution
 print(f"\nProcessing {len(df)} questions with {df['Topic'].nunique()} topic groups")
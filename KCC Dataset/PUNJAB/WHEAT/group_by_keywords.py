@@ -1,6 +1,12 @@
 import pandas as pd
 import re
 from collections import defaultdict
+import sys
+from pathlib import Path
+
+# Shared keyword taxonomy engine lives in the KCC Dataset root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from taxonomy import KeywordTaxonomy
 
 # Configuration
 State = "PUNJAB"
@@ -46,25 +52,18 @@ keyword_groups = {
     'STORAGE': ['storage', 'भंडारण'],
 }
 
+keyword_taxonomy = KeywordTaxonomy(keyword_groups)
+
 def extract_keywords_from_text(text):
     """Extract all matching keyword groups from text."""
-    text_lower = str(text).lower()
-    matched_groups = []
-    
-    for group_name, keywords in keyword_groups.items():
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                matched_groups.append(group_name)
-                break  # One match per group is enough
-    
-    return matched_groups if matched_groups else ['OTHER']
+    return keyword_taxonomy.classify_all(text) or ['OTHER']
 
 # Group questions by keywords
 print("\n" + "=" * 80)
 print("EXTRACTING KEYWORDS AND GROUPING QUESTIONS")
 print("=" * 80)
 
-df['keyword_groups'] = df['QueryText'].apply(extract_keywords_from_text)
+df['keyword_groups'] = keyword_taxonomy.classify_column(df['QueryText'], mode='all', default=['OTHER'])
 
 # Create a dictionary to store groups
 grouped_questions = defaultdict(list)
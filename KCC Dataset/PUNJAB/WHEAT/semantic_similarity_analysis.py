@@ -1,7 +1,14 @@
 import pandas as pd
+import numpy as np
 import re
 import os
 from difflib import SequenceMatcher
+import sys
+from pathlib import Path
+
+# Shared keyword-set kernel lives in the KCC Dataset root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from keyword_sets import TokenizedCorpus
 
 # File path
 input_file = r"d:\Kanak Data\OS Folders\Documents\KCC Dataset filtering\kcc dataset part- 1\PUNJAB_wheat_questions_CLEANED.csv"
@@ -32,51 +39,42 @@ def extract_keywords(text):
     
     return keywords
 
-# Calculate semantic similarity based on shared keywords
-def semantic_similarity(text1, text2):
-    """Calculate semantic similarity based on common keywords"""
-    keywords1 = extract_keywords(text1)
-    keywords2 = extract_keywords(text2)
-    
-    if not keywords1 or not keywords2:
-        return 0
-    
-    intersection = len(keywords1 & keywords2)
-    union = len(keywords1 | keywords2)
-    
-    return intersection / union if union > 0 else 0
+questions_list = df['QueryText'].tolist()
 
+# Extract keywords once and intern them as integer token ids
+corpus = TokenizedCorpus.from_texts(questions_list, extract_keywords)
+
+# Calculate semantic similarity based on shared keywords
+def semantic_similarity_to_all(i):
+    """Jaccard similarity of question i's keywords against every question"""
+    return corpus.one_vs_all(i)
+
 # Find semantic clusters (threshold = 0.4 for semantic similarity)
 semantic_threshold = 0.4
 print(f"Analyzing semantic similarity (threshold: {semantic_threshold:.0%})\n")
 
-processed = set()
+processed = np.zeros(len(questions_list), dtype=bool)
 clusters = []
-questions_list = df['QueryText'].tolist()
 
-# Store similarity scores
+# Store similarity scores (cluster main question -> member)
 similarity_scores = {}
 
 for i in range(len(questions_list)):
-    if i in processed:
+    if processed[i]:
         continue
     
-    cluster = [i]
-    processed.add(i)
+    processed[i] = True
     
     # Find similar questions
-    for j in range(i + 1, len(questions_list)):
-        if j in processed:
-            continue
-        
-        similarity_score = semantic_similarity(questions_list[i], questions_list[j])
-        similarity_scores[(i, j)] = similarity_score
-        
-        if similarity_score >= semantic_threshold:
-            cluster.append(j)
-            processed.add(j)
+    scores = semantic_similarity_to_all(i)
+    members = np.flatnonzero((scores >= semantic_threshold) & ~processed)
+    members = members[members > i]
+    processed[members] = True
+    
+    for j in members:
+        similarity_scores[(i, j)] = scores[j]
     
-    clusters.append(cluster)
+    clusters.append([i] + members.tolist())
 
 print(f"[OK] Found {len(clusters)} semantic groups")
 print(f"   Groups with multiple questions: {sum(1 for c in clusters if len(c) > 1)}\n")
@@ -0,0 +1,94 @@
+"""
+Keyword-set similarity shared by the KCC semantic similarity scripts.
+
+Each question's keywords are interned once as integer token ids and stored
+CSR-style: question i owns indices[offsets[i]:offsets[i + 1]], a sorted
+int32 array. Jaccard or overlap similarity of one question against all
+others is then a boolean lookup plus a bincount over the integer arrays,
+instead of Python set operations per pair.
+"""
+
+import numpy as np
+
+
+class TokenizedCorpus:
+    """
+    Keyword sets of a corpus stored as interned integer token ids.
+
+    Usage:
+        corpus = TokenizedCorpus.from_texts(questions, extract_keywords)
+        scores = corpus.one_vs_all(i)            # Jaccard of question i vs all
+    """
+
+    def __init__(self, vocabulary, indices, offsets):
+        """
+        Initialize from prebuilt arrays (use from_texts() to tokenize).
+
+        Args:
+            vocabulary: Mapping of token -> token id
+            indices: Concatenated sorted token ids (int32)
+            offsets: Document boundaries into indices (length n_docs + 1)
+        """
+        self.vocabulary = vocabulary
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.sizes = np.diff(self.offsets)
+        # Document id of every entry in indices, used by the kernels
+        self.doc_ids = np.repeat(np.arange(len(self.sizes)), self.sizes)
+
+    @classmethod
+    def from_texts(cls, texts, extract_keywords):
+        """
+        Tokenize a corpus and intern the tokens.
+
+        Args:
+            texts: Iterable of texts
+            extract_keywords: Function mapping a text to its keywords (any iterable)
+
+        Returns:
+            TokenizedCorpus
+        """
+        vocabulary = {}
+        indices = []
+        offsets = [0]
+        for text in texts:
+            indices.extend(sorted({vocabulary.setdefault(w, len(vocabulary)) for w in extract_keywords(text)}))
+            offsets.append(len(indices))
+        return cls(vocabulary, np.array(indices, dtype=np.int32), np.array(offsets, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def tokens(self, i):
+        """Sorted token ids of document i."""
+        return self.indices[self.offsets[i]:self.offsets[i + 1]]
+
+    def intersection_counts(self, i):
+        """Number of tokens document i shares with every document (int array of length n_docs)."""
+        mask = np.zeros(len(self.vocabulary), dtype=bool)
+        mask[self.tokens(i)] = True
+        hits = mask[self.indices]
+        return np.bincount(self.doc_ids[hits], minlength=len(self)).astype(np.int64)
+
+    def one_vs_all(self, i, metric="jaccard"):
+        """
+        Keyword-set similarity of document i against every document.
+
+        Args:
+            i: Document index
+            metric: "jaccard" (|A&B| / |A or B|) or "overlap" (|A&B| / min(|A|, |B|))
+
+        Returns:
+            float array of length n_docs; 0 where either set is empty
+        """
+        inter = self.intersection_counts(i)
+        if metric == "jaccard":
+            denom = self.sizes[i] + self.sizes - inter
+        elif metric == "overlap":
+            denom = np.minimum(self.sizes[i], self.sizes)
+        else:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        scores = np.zeros(len(self), dtype=np.float64)
+        np.divide(inter, denom, out=scores, where=(denom > 0) & (self.sizes > 0) & (self.sizes[i] > 0))
+        return scores
@@ -0,0 +1,202 @@
+"""
+Keyword taxonomy classifier shared by the KCC topic/keyword scripts.
+
+All keywords of a taxonomy (English, Hindi and Punjabi transliterations)
+are compiled into one Aho-Corasick automaton, so each question is scanned
+once regardless of how many keywords the taxonomy has. Labels keep the
+priority order of the dictionary they were defined in:
+
+- first-match mode returns the earliest label (in dictionary order) that
+  has any keyword in the text, exactly like the old nested
+  `for keyword in keywords: if keyword in text: return label` loops
+- all-matches mode returns every matching label in dictionary order
+
+Matching is case-insensitive substring matching, the same as `in`.
+If the optional `pyahocorasick` package is installed it is used as the
+automaton backend; otherwise a pure-Python automaton is built.
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def _flatten_taxonomy(taxonomy):
+    """
+    Yield (label, keywords) pairs in priority order.
+
+    Flat taxonomies map label -> [keywords]; nested ones map
+    topic -> {subtopic -> [keywords]} and yield (topic, subtopic) labels.
+    """
+    for key, value in taxonomy.items():
+        if isinstance(value, dict):
+            for sub_key, keywords in value.items():
+                yield (key, sub_key), keywords
+        else:
+            yield key, value
+
+
+class _PythonAutomaton:
+    """Minimal Aho-Corasick automaton whose outputs are label bitmasks."""
+
+    def __init__(self, keyword_masks):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [0]
+
+        # Trie
+        for keyword, mask in keyword_masks.items():
+            state = 0
+            for ch in keyword:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(0)
+                state = nxt
+            self.out[state] |= mask
+
+        # Failure links (breadth-first), merging outputs of suffix states
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] |= self.out[self.fail[nxt]]
+
+    def scan(self, text):
+        """Return the bitmask of all labels with a keyword in text."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        mask = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            mask |= out[state]
+        return mask
+
+
+class _PyAhoCorasickAutomaton:
+    """Adapter around pyahocorasick with the same scan() interface."""
+
+    def __init__(self, keyword_masks):
+        self.automaton = ahocorasick.Automaton()
+        for keyword, mask in keyword_masks.items():
+            self.automaton.add_word(keyword, mask)
+        self.automaton.make_automaton()
+
+    def scan(self, text):
+        mask = 0
+        for _, value in self.automaton.iter(text):
+            mask |= value
+        return mask
+
+
+class KeywordTaxonomy:
+    """
+    Compiled keyword taxonomy.
+
+    Usage:
+        taxonomy = KeywordTaxonomy({'Pest': ['aphid', 'chupa'], 'Weed': ['weed', 'kharpat']})
+        taxonomy.classify("aphid in wheat", default='OTHER')        # 'Pest'
+        taxonomy.classify_all("weed and aphid")                     # ['Pest', 'Weed']
+        df['Topic'] = taxonomy.classify_column(df['QueryText'], default='OTHER')
+    """
+
+    def __init__(self, taxonomy):
+        """
+        Compile a taxonomy.
+
+        Args:
+            taxonomy: dict of label -> [keywords], or
+                      dict of topic -> {subtopic -> [keywords]}
+        """
+        self.labels = []
+        keyword_masks = {}
+        for label, keywords in _flatten_taxonomy(taxonomy):
+            bit = 1 << len(self.labels)
+            self.labels.append(label)
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    keyword_masks[keyword] = keyword_masks.get(keyword, 0) | bit
+
+        if ahocorasick is not None:
+            self._automaton = _PyAhoCorasickAutomaton(keyword_masks)
+        else:
+            self._automaton = _PythonAutomaton(keyword_masks)
+
+    def match_mask(self, text):
+        """Bitmask of matching label positions for one text."""
+        return self._automaton.scan(str(text).lower())
+
+    def classify(self, text, default=None):
+        """Return the highest-priority matching label, or default."""
+        mask = self.match_mask(text)
+        if not mask:
+            return default
+        return self.labels[(mask & -mask).bit_length() - 1]
+
+    def classify_all(self, text):
+        """Return all matching labels in priority order."""
+        mask = self.match_mask(text)
+        labels = []
+        position = 0
+        while mask:
+            if mask & 1:
+                labels.append(self.labels[position])
+            mask >>= 1
+            position += 1
+        return labels
+
+    def classify_column(self, values, mode='first', default=None, join=None):
+        """
+        Classify a whole column, scanning each distinct text only once.
+
+        Args:
+            values: pandas Series of texts
+            mode: 'first' for the highest-priority label, 'all' for every match
+            default: value used for rows without any match
+            join: in 'all' mode, join labels into one string with this separator
+
+        Returns:
+            pandas Series aligned with values
+        """
+        if mode not in ('first', 'all'):
+            raise ValueError(f"Unknown mode: {mode}")
+
+        codes, uniques = pd.factorize(values)
+        # Missing values are classified as str(NaN), like the per-row functions did
+        texts = [str(u) for u in uniques] + [str(np.nan)]
+
+        results = np.empty(len(texts), dtype=object)
+        for i, text in enumerate(texts):
+            if mode == 'first':
+                results[i] = self.classify(text, default)
+            else:
+                labels = self.classify_all(text)
+                if not labels:
+                    results[i] = default
+                elif join is not None:
+                    results[i] = join.join(labels)
+                else:
+                    results[i] = labels
+
+        column = results[codes]
+        if mode == 'all' and join is None:
+            # Give every row its own list so callers can mutate safely
+            column = [list(labels) if isinstance(labels, list) else labels for labels in column]
+        return pd.Series(column, index=values.index, dtype=object)
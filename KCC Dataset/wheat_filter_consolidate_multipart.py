@@ -2,6 +2,7 @@ import pandas as pd
 import re
 import os
 from collections import defaultdict
+from taxonomy import KeywordTaxonomy
 
 # Configuration
 State = "PUNJAB"
@@ -111,39 +112,29 @@ print("Grouping questions by similarity...")
 grouped = df.groupby('normalized_query', sort=False)
 
 # Create keyword groups
-def extract_keywords(text):
-    """Extract main keywords from query."""
-    text_lower = str(text).lower()
-    
-    keywords = []
-    
+keyword_groups = {
     # Diseases/Pests
-    if 'aphid' in text_lower or 'chupa' in text_lower:
-        keywords.append('APHIDS')
-    if 'yellow rust' in text_lower or 'peela rog' in text_lower:
-        keywords.append('YELLOW_RUST')
-    if 'brown rust' in text_lower or 'leaf rust' in text_lower:
-        keywords.append('BROWN_RUST')
-    if 'termite' in text_lower or 'deemak' in text_lower:
-        keywords.append('TERMITES')
-    if 'weed' in text_lower or 'kharpat' in text_lower:
-        keywords.append('WEEDS')
+    'APHIDS': ['aphid', 'chupa'],
+    'YELLOW_RUST': ['yellow rust', 'peela rog'],
+    'BROWN_RUST': ['brown rust', 'leaf rust'],
+    'TERMITES': ['termite', 'deemak'],
+    'WEEDS': ['weed', 'kharpat'],
     
     # Agronomic practices
-    if 'variety' in text_lower or 'varieties' in text_lower:
-        keywords.append('VARIETIES')
-    if 'fertilizer' in text_lower or 'urea' in text_lower or 'dap' in text_lower:
-        keywords.append('FERTILIZER')
-    if 'seed' in text_lower:
-        keywords.append('SEED')
-    if 'irrigation' in text_lower or 'water' in text_lower:
-        keywords.append('IRRIGATION')
-    if 'sowing' in text_lower:
-        keywords.append('SOWING')
-    
+    'VARIETIES': ['variety', 'varieties'],
+    'FERTILIZER': ['fertilizer', 'urea', 'dap'],
+    'SEED': ['seed'],
+    'IRRIGATION': ['irrigation', 'water'],
+    'SOWING': ['sowing'],
+}
+keyword_taxonomy = KeywordTaxonomy(keyword_groups)
+
+def extract_keywords(text):
+    """Extract main keywords from query."""
+    keywords = keyword_taxonomy.classify_all(text)
     return ', '.join(keywords) if keywords else 'OTHER'
 
-df['keyword_group'] = df['QueryText'].apply(extract_keywords)
+df['keyword_group'] = keyword_taxonomy.classify_column(df['QueryText'], mode='all', default='OTHER', join=', ')
 
 # Sort by keyword_group, then by normalized_query
 df_sorted = df.sort_values(['keyword_group', 'normalized_query', 'QueryText'])